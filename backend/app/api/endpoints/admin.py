@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import datetime
 from app.db.database import get_db
-from app.models.models import User, Website, Import, Page
+from app.models.models import User, Website, Import, Page, DeletionJob, ProviderRetry, ReindexJob, RefreshRun
 from app.api.endpoints.auth import get_current_user
-from app.schemas.admin import DashboardStats, WebsiteDetail
+from app.services.website_cleanup import delete_website_batch, process_bulk_delete
+from app.services.keyword_store import get_page_keywords
+from app.services.retry_queue import retry_queue_stats
+from app.services.refresh_scheduler import (
+    refresh_stale_websites, retry_deferred_websites, count_stale_websites, calls_used_today,
+    provider_calls_per_website
+)
+from app.services.reindex import run_reindex, activate_reindex, can_resume
+from app.services.vector_targets import vector_targets, SHADOW_STATUSES
+from app.core.config import settings
+from app.schemas.admin import (
+    DashboardStats, WebsiteDetail, BulkDeleteRequest, DeletionJobStatus, RetryQueueStats,
+    RefreshStatus, ReindexRequest, ReindexJobStatus
+)
 
 router = APIRouter()
 
@@ -63,6 +77,7 @@ def get_website_detail(
         raise HTTPException(status_code=404, detail="Website not found")
 
     pages = db.query(Page).filter(Page.website_id == website_id).limit(100).all()
+    page_keywords = get_page_keywords([page.id for page in pages], db)
 
     return WebsiteDetail(
         id=website.id,
@@ -77,7 +92,7 @@ def get_website_detail(
         pages=[
             {
                 "url": page.url,
-                "keywords": page.keywords,
+                "keywords": page_keywords.get(page.id, []),
                 "vector_id": page.vector_id
             }
             for page in pages
@@ -96,11 +111,295 @@ def delete_website(
     if not website:
         raise HTTPException(status_code=404, detail="Website not found")
 
-    # Delete pages first
-    db.query(Page).filter(Page.website_id == website_id).delete()
+    # Delete vectors, pages and the website itself
+    result = delete_website_batch([website_id], db)
+    db.commit()
+    if result["failed_websites"]:
+        raise HTTPException(status_code=503, detail="Could not delete the website's vectors, try again later")
+
+    return {"message": "Website deleted successfully"}
+
+@router.post("/websites/bulk-delete")
+def bulk_delete_websites(
+    request: BulkDeleteRequest,
+    background_tasks: BackgroundTasks,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Delete many websites by ID and/or filter in a background job"""
+
+    criteria = request.model_dump(exclude_none=True)
+    if not criteria:
+        raise HTTPException(status_code=400, detail="Provide website_ids or at least one filter")
+
+    job = DeletionJob(
+        user_id=admin.id,
+        criteria=criteria,
+        status="pending"
+    )
+    db.add(job)
+    db.commit()
+
+    background_tasks.add_task(process_bulk_delete, job.id)
+
+    return {"message": "Bulk deletion started", "job_id": job.id}
+
+@router.get("/deletions/{job_id}/status", response_model=DeletionJobStatus)
+def get_deletion_status(
+    job_id: int,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Get progress of a bulk deletion job"""
+
+    job = db.query(DeletionJob).filter(DeletionJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+
+    return DeletionJobStatus(
+        id=job.id,
+        status=job.status,
+        total_websites=job.total_websites or 0,
+        deleted_websites=job.deleted_websites or 0,
+        failed_websites=job.failed_websites or 0,
+        deleted_vectors=job.deleted_vectors or 0,
+        failed_vectors=job.failed_vectors or 0,
+        error=job.error
+    )
+
+@router.get("/retries", response_model=RetryQueueStats)
+def get_retry_queue(
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Websites waiting for a deferred provider retry"""
+
+    pending = db.query(ProviderRetry).filter(ProviderRetry.status == "pending")
+    next_retry = pending.order_by(ProviderRetry.next_attempt_at).first()
+
+    return RetryQueueStats(
+        providers=retry_queue_stats(db),
+        due=pending.filter(ProviderRetry.next_attempt_at <= datetime.utcnow()).count(),
+        next_attempt_at=next_retry.next_attempt_at if next_retry else None
+    )
+
+def _budget_websites(db: Session) -> int:
+    """Websites today's remaining refresh call budget covers; 429 when it is used up"""
+    remaining = (settings.REFRESH_DAILY_CALL_BUDGET - calls_used_today(db)) // provider_calls_per_website()
+    if remaining < 1:
+        raise HTTPException(status_code=429, detail="The daily refresh call budget is used up")
+    return remaining
+
+@router.post("/retries/run")
+def run_deferred_retries(
+    background_tasks: BackgroundTasks,
+    limit: int = 100,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Retry due provider calls now in a background job; the run claims its
+    calls from the daily call budget like scheduled runs
+    """
+
+    if limit < 1 or limit > 10000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 10000")
+
+    remaining = _budget_websites(db)
+    background_tasks.add_task(retry_deferred_websites, limit)
+
+    return {"message": "Deferred retries started", "budget_websites": remaining}
+
+@router.get("/refresh", response_model=RefreshStatus)
+def get_refresh_status(
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Stale websites, the daily provider call budget and recent refresh runs"""
+
+    stale = count_stale_websites(db)
+    runs = db.query(RefreshRun).order_by(RefreshRun.started_at.desc()).limit(20).all()
+
+    return RefreshStatus(
+        enabled=settings.REFRESH_ENABLED,
+        retries_enabled=settings.RETRY_QUEUE_ENABLED,
+        stale_websites=stale["stale"],
+        stale_demanded_websites=stale["stale_demanded"],
+        daily_call_budget=settings.REFRESH_DAILY_CALL_BUDGET,
+        calls_used_today=calls_used_today(db),
+        recent_runs=runs
+    )
+
+@router.post("/refresh/run")
+def run_refresh(
+    background_tasks: BackgroundTasks,
+    limit: int = 50,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Refresh the stalest websites now; the run claims its calls from the
+    daily call budget like scheduled runs, so it may refresh fewer than `limit`
+    """
+
+    if limit < 1 or limit > 10000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 10000")
+
+    remaining = _budget_websites(db)
+    background_tasks.add_task(refresh_stale_websites, limit)
+
+    return {"message": "Refresh started", "budget_websites": remaining}
+
+def _reindex_status(job: ReindexJob) -> ReindexJobStatus:
+    total = job.total_pages or 0
+    processed = job.processed_pages or 0
+    eta_seconds = None
+    if job.pages_per_second and job.status in ("building", "activating"):
+        eta_seconds = round(max(total - processed, 0) / job.pages_per_second, 1)
+
+    return ReindexJobStatus(
+        id=job.id,
+        status=job.status,
+        model=job.model,
+        dimension=job.dimension,
+        index_name=job.index_name,
+        namespace=job.namespace or "",
+        dual_write=bool(job.dual_write),
+        total_pages=total,
+        processed_pages=processed,
+        last_page_id=job.last_page_id or 0,
+        percent=round(min(processed / total, 1.0) * 100, 1) if total else 0.0,
+        pages_per_second=job.pages_per_second,
+        eta_seconds=eta_seconds,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        completed_at=job.completed_at,
+        activated_at=job.activated_at
+    )
+
+def _get_reindex_job(job_id: int, db: Session) -> ReindexJob:
+    job = db.query(ReindexJob).filter(ReindexJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Re-index job not found")
+    return job
+
+@router.post("/reindex", response_model=ReindexJobStatus)
+def start_reindex(
+    request: ReindexRequest,
+    background_tasks: BackgroundTasks,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Re-embed all pages into a shadow index; searches keep using the active index"""
+
+    running = db.query(ReindexJob).filter(ReindexJob.status.in_(("pending",) + SHADOW_STATUSES)).first()
+    if running:
+        raise HTTPException(status_code=409, detail=f"Re-index job {running.id} is already {running.status}")
+
+    active = vector_targets.active()
+    index_name = request.index_name
+    if not index_name:
+        index_name = active.index_name if request.dimension == active.dimension else f"{settings.PINECONE_INDEX}-{request.dimension}"
+    if index_name == active.index_name and request.dimension != active.dimension:
+        raise HTTPException(status_code=400, detail="A different dimension needs a different index")
+
+    job = ReindexJob(
+        user_id=admin.id,
+        status="pending",
+        model=request.model,
+        dimension=request.dimension,
+        index_name=index_name,
+        dual_write=request.dual_write
+    )
+    db.add(job)
+    db.flush()
+    job.namespace = request.namespace if request.namespace is not None else f"reindex-{job.id}"
+    if index_name == active.index_name and job.namespace == active.namespace:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Target is the active index and namespace")
+    db.commit()
+
+    background_tasks.add_task(run_reindex, job.id)
+
+    return _reindex_status(job)
+
+@router.get("/reindex", response_model=List[ReindexJobStatus])
+def list_reindex_jobs(
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Recent re-index jobs, newest first"""
+
+    jobs = db.query(ReindexJob).order_by(ReindexJob.id.desc()).limit(20).all()
+    return [_reindex_status(job) for job in jobs]
+
+@router.get("/reindex/{job_id}", response_model=ReindexJobStatus)
+def get_reindex_status(
+    job_id: int,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Progress and throughput of a re-index job"""
+
+    return _reindex_status(_get_reindex_job(job_id, db))
+
+@router.post("/reindex/{job_id}/resume", response_model=ReindexJobStatus)
+def resume_reindex(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Continue a failed re-index job from its checkpoint, or a building job
+    whose worker died (its lease expired)
+    """
+
+    job = _get_reindex_job(job_id, db)
+    if not can_resume(job):
+        detail = "Job is still building" if job.status == "building" else f"Cannot resume a {job.status} job"
+        raise HTTPException(status_code=400, detail=detail)
+
+    background_tasks.add_task(run_reindex, job.id)
+
+    return _reindex_status(job)
+
+@router.post("/reindex/{job_id}/activate", response_model=ReindexJobStatus)
+def activate_reindex_job(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Catch up on new pages, then switch searches to the re-indexed target"""
+
+    job = _get_reindex_job(job_id, db)
+    if job.status != "ready":
+        raise HTTPException(status_code=400, detail=f"Only ready jobs can be activated, job is {job.status}")
+
+    job.status = "activating"
+    job.error = None
+    db.commit()
+
+    background_tasks.add_task(activate_reindex, job.id)
+
+    return _reindex_status(job)
+
+@router.post("/reindex/{job_id}/cancel", response_model=ReindexJobStatus)
+def cancel_reindex(
+    job_id: int,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Stop a re-index job; the shadow index is left as is"""
+
+    job = _get_reindex_job(job_id, db)
+    if job.status not in ("pending",) + SHADOW_STATUSES + ("failed",):
+        raise HTTPException(status_code=400, detail=f"Cannot cancel a {job.status} job")
 
-    # Delete website
-    db.delete(website)
+    job.status = "cancelled"
     db.commit()
+    vector_targets.reload()
 
-    return {"message": "Website deleted successfully"}
\ No newline at end of file
+    return _reindex_status(job)
\ No newline at end of file
@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from app.db.database import SessionLocal
+from app.services.vector_service import vector_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/live")
+def liveness():
+    """The process is up and serving requests"""
+    return {"status": "ok"}
+
+@router.get("/ready")
+def readiness():
+    """
+    Whether this worker can serve traffic.
+    The database is required; Pinecone being unavailable only degrades search.
+    """
+    checks = {}
+
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+    except Exception as e:
+        logger.error(f"Readiness check failed for database: {e}")
+        checks["database"] = "unavailable"
+    finally:
+        db.close()
+
+    if not vector_service.pinecone_api_key:
+        checks["vector_index"] = "disabled"
+    else:
+        checks["vector_index"] = "ok" if vector_service.is_ready() else "unavailable"
+
+    if checks["database"] != "ok":
+        return JSONResponse(status_code=503, content={"status": "unavailable", "checks": checks})
+
+    status = "ok" if checks["vector_index"] != "unavailable" else "degraded"
+    return {"status": status, "checks": checks}
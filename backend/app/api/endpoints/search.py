@@ -1,50 +1,245 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Dict, Optional, Union
+from app.core.config import settings
 from app.db.database import get_db
 from app.models.models import Website
 from app.services.vector_service import vector_service
-from app.schemas.search import SearchRequest, SearchResult
+from app.services.reranker import reranker
+from app.services.candidate_sets import candidate_sets
+from app.services.search_facets import compute_facets
+from app.services.website_demand import demand_tracker
+from app.services.website_filters import apply_website_filters
+from app.services.keyword_store import get_keywords_by_vector_ids, find_websites_by_keyword
+from app.core.metrics import SEARCH_STAGE_SECONDS, StageTimer
+from app.schemas.search import (
+    SearchRequest, SearchResult, BatchSearchRequest, BatchSearchResponse, MergedSearchResult,
+    KeywordWebsiteResult, FacetedSearchResponse, RefineSearchRequest
+)
 
 router = APIRouter()
 
-@router.post("/", response_model=List[SearchResult])
+@router.post("/", response_model=Union[List[SearchResult], FacetedSearchResponse])
 def search_websites(
     request: SearchRequest,
+    response: Response,
+    timing: bool = Query(False, description="Return per-stage durations in a Server-Timing header"),
     db: Session = Depends(get_db)
 ):
     """
     Public endpoint for searching websites by keyword and filters.
     Uses vector similarity search for relevance ranking.
+    With facets=true, also returns DR/traffic/price band counts over the
+    unfiltered candidates and a candidate set handle; later filter changes
+    go to /refine instead of repeating the vector search.
     """
+    stages = StageTimer(SEARCH_STAGE_SECONDS, endpoint="search")
+    # Embed and query against the same index even if a re-index switches it meanwhile
+    target = vector_service.active_target()
 
     # First, perform vector similarity search with the keyword
-    vector_results = vector_service.search_similar(
-        query=request.keyword,
-        top_k=100  # Get more results initially for filtering
+    with stages.stage("embed"):
+        embeddings = vector_service.embed_queries([request.keyword], target)
+
+    with stages.stage("vector_query"):
+        vector_results = vector_service.query_similar(
+            embeddings[0],
+            top_k=100,  # Get more results initially for filtering
+            target=target
+        ) if embeddings else []
+
+    with stages.stage("keyword_lookup"):
+        keywords_by_vector_id = get_keywords_by_vector_ids([r["id"] for r in vector_results], db)
+
+    search_results = _filtered_results(request, vector_results, keywords_by_vector_id, stages, db)
+
+    result = search_results
+    if request.facets:
+        with stages.stage("facets"):
+            facets = compute_facets(_candidate_urls(vector_results), db)
+            handle = candidate_sets.save({
+                "keyword": request.keyword,
+                "vector_results": vector_results,
+                "keywords_by_vector_id": keywords_by_vector_id,
+                "facets": facets
+            })
+        result = FacetedSearchResponse(
+            results=search_results,
+            facets=facets,
+            candidate_set=handle,
+            expires_in_seconds=settings.CANDIDATE_SET_TTL_SECONDS
+        )
+
+    if timing:
+        response.headers["Server-Timing"] = stages.server_timing()
+
+    return result
+
+@router.post("/refine", response_model=FacetedSearchResponse)
+def refine_search(
+    request: RefineSearchRequest,
+    response: Response,
+    timing: bool = Query(False, description="Return per-stage durations in a Server-Timing header"),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply new filters to the candidates of an earlier faceted search.
+    Only the SQL filter and re-ranking run; facets are returned as computed
+    by the original search. Returns 404 once the candidate set has expired.
+    """
+    stages = StageTimer(SEARCH_STAGE_SECONDS, endpoint="refine")
+
+    candidates = candidate_sets.load(request.candidate_set)
+    if candidates is None:
+        raise HTTPException(status_code=404, detail="Candidate set expired or unknown, search again")
+
+    search_results = _filtered_results(
+        request, candidates["vector_results"], candidates["keywords_by_vector_id"], stages, db
+    )
+
+    if timing:
+        response.headers["Server-Timing"] = stages.server_timing()
+
+    return FacetedSearchResponse(
+        results=search_results,
+        facets=candidates["facets"],
+        candidate_set=request.candidate_set,
+        expires_in_seconds=settings.CANDIDATE_SET_TTL_SECONDS
     )
 
-    # Extract unique website URLs from vector results
-    website_urls = list(set([r["website_url"] for r in vector_results]))
+def _candidate_urls(vector_results: List[dict]) -> List[str]:
+    """Unique website URLs of vector results, best match first"""
+    return list(dict.fromkeys(r["website_url"] for r in vector_results))
+
+def _filtered_results(
+    request: Union[SearchRequest, RefineSearchRequest],
+    vector_results: List[dict],
+    keywords_by_vector_id: Dict[str, List[str]],
+    stages: StageTimer,
+    db: Session
+) -> List[SearchResult]:
+    """Filter the candidate websites with SQL, re-rank them and apply the limit"""
+
+    # Build database query with DR, traffic and price filters
+    with stages.stage("sql_filter"):
+        query = db.query(Website).filter(Website.url.in_(_candidate_urls(vector_results)))
+        query = apply_website_filters(query, **request.filter_values())
+
+        websites = query.all()
+
+    with stages.stage("aggregation"):
+        search_results = _build_search_results(websites, vector_results, keywords_by_vector_id)
+
+    with stages.stage("rerank"):
+        search_results = _rerank_results(search_results, vector_results)
+
+    # Limit results
+    if request.limit:
+        search_results = search_results[:request.limit]
+
+    # Websites users see are refreshed sooner
+    demand_tracker.record(r.id for r in search_results)
+
+    return search_results
+
+@router.post("/batch", response_model=BatchSearchResponse)
+def batch_search_websites(
+    request: BatchSearchRequest,
+    response: Response,
+    timing: bool = Query(False, description="Return per-stage durations in a Server-Timing header"),
+    db: Session = Depends(get_db)
+):
+    """
+    Search many keywords at once.
+    Embeds all keywords in one call, runs the vector queries concurrently and
+    loads the websites for the union of results with a single SQL query.
+    """
+    stages = StageTimer(SEARCH_STAGE_SECONDS, endpoint="batch")
+
+    # Deduplicate keywords while keeping the campaign order
+    keywords = list(dict.fromkeys(k.strip() for k in request.keywords if k.strip()))
+
+    target = vector_service.active_target()
+
+    with stages.stage("embed"):
+        embeddings = vector_service.embed_queries(keywords, target)
+
+    with stages.stage("vector_query"):
+        vector_results_by_keyword = vector_service.query_similar_batch(
+            dict(zip(keywords, embeddings)),
+            top_k=100,
+            target=target
+        )
+
+    website_urls = list({
+        r["website_url"]
+        for vector_results in vector_results_by_keyword.values()
+        for r in vector_results
+    })
+
+    with stages.stage("sql_filter"):
+        query = db.query(Website).filter(Website.url.in_(website_urls))
+        query = apply_website_filters(query, **request.filter_values())
+
+        websites_by_url = {website.url: website for website in query.all()}
+
+    with stages.stage("aggregation"):
+        keywords_by_vector_id = get_keywords_by_vector_ids(
+            list({r["id"] for vector_results in vector_results_by_keyword.values() for r in vector_results}),
+            db
+        )
+
+        results = {}
+        for keyword in keywords:
+            vector_results = vector_results_by_keyword.get(keyword, [])
+            keyword_urls = dict.fromkeys(r["website_url"] for r in vector_results)
+            keyword_websites = [websites_by_url[url] for url in keyword_urls if url in websites_by_url]
+            results[keyword] = _build_search_results(keyword_websites, vector_results, keywords_by_vector_id)
+
+    with stages.stage("rerank"):
+        for keyword in keywords:
+            results[keyword] = _rerank_results(results[keyword], vector_results_by_keyword.get(keyword, []))
+
+    with stages.stage("merge"):
+        merged = {}
+        for keyword in keywords:
+            keyword_results = results[keyword]
+            for result in keyword_results:
+                entry = merged.get(result.id)
+                if entry is None:
+                    merged[result.id] = MergedSearchResult(
+                        **result.model_dump(),
+                        matched_queries=[keyword],
+                        combined_score=result.rank_score
+                    )
+                else:
+                    entry.matched_queries.append(keyword)
+                    entry.combined_score += result.rank_score
+                    entry.relevance_score = max(entry.relevance_score, result.relevance_score)
+                    entry.rank_score = max(entry.rank_score, result.rank_score)
+                    entry.matching_keywords = list(dict.fromkeys(entry.matching_keywords + result.matching_keywords))[:10]
+
+            if request.limit:
+                results[keyword] = keyword_results[:request.limit]
 
-    # Build database query with filters
-    query = db.query(Website).filter(Website.url.in_(website_urls))
+        # Sites relevant to many campaign keywords rank first
+        merged_results = sorted(merged.values(), key=lambda x: x.combined_score, reverse=True)
+        if request.merged_limit:
+            merged_results = merged_results[:request.merged_limit]
 
-    # Apply DR filter
-    if request.min_dr is not None:
-        query = query.filter(Website.dr >= request.min_dr)
-    if request.max_dr is not None:
-        query = query.filter(Website.dr <= request.max_dr)
+        demand_tracker.record(r.id for r in merged_results)
 
-    # Apply traffic filter
-    if request.min_traffic is not None:
-        query = query.filter(Website.traffic >= request.min_traffic)
+    if timing:
+        response.headers["Server-Timing"] = stages.server_timing()
 
-    # Apply price filter
-    if request.max_price is not None:
-        query = query.filter(Website.price <= request.max_price)
+    return BatchSearchResponse(results=results, merged=merged_results)
 
-    websites = query.all()
+def _build_search_results(
+    websites: List[Website],
+    vector_results: List[dict],
+    keywords_by_vector_id: Dict[str, List[str]]
+) -> List[SearchResult]:
+    """Attach relevance scores and matching keywords to websites"""
 
     # Create relevance score map from vector results
     relevance_scores = {}
@@ -64,44 +259,68 @@ def search_websites(
             dr=website.dr,
             traffic=website.traffic,
             relevance_score=relevance_scores.get(website.url, 0),
-            matching_keywords=self._get_matching_keywords(
-                website.url, vector_results
+            matching_keywords=_get_matching_keywords(
+                website.url, vector_results, keywords_by_vector_id
             )
         ))
 
-    # Sort by relevance score
-    search_results.sort(key=lambda x: x.relevance_score, reverse=True)
+    return search_results
 
-    # Limit results
-    if request.limit:
-        search_results = search_results[:request.limit]
+def _rerank_results(search_results: List[SearchResult], vector_results: List[dict]) -> List[SearchResult]:
+    """
+    Score websites on relevance, the best position and search volume of their
+    matched pages and their DR, traffic and price, and sort by that score
+    """
+    pages = {}
+    for result in vector_results:
+        position, search_volume = pages.get(result["website_url"], (None, None))
+        if result.get("position") is not None and (position is None or result["position"] < position):
+            position = result["position"]
+        if result.get("search_volume") is not None and (search_volume is None or result["search_volume"] > search_volume):
+            search_volume = result["search_volume"]
+        pages[result["website_url"]] = (position, search_volume)
 
-    return search_results
+    matrix = reranker.feature_matrix(
+        similarity=[r.relevance_score for r in search_results],
+        position=[pages.get(r.url, (None, None))[0] for r in search_results],
+        search_volume=[pages.get(r.url, (None, None))[1] for r in search_results],
+        dr=[r.dr for r in search_results],
+        traffic=[r.traffic for r in search_results],
+        price=[r.price for r in search_results]
+    )
+    scores, order = reranker.rank(matrix)
+    for result, score in zip(search_results, scores.tolist()):
+        result.rank_score = round(score, 6)
+
+    return [search_results[i] for i in order]
 
-def _get_matching_keywords(website_url: str, vector_results: List[dict]) -> List[str]:
+def _get_matching_keywords(
+    website_url: str,
+    vector_results: List[dict],
+    keywords_by_vector_id: Dict[str, List[str]]
+) -> List[str]:
     """Extract matching keywords for a specific website from vector results"""
     keywords = []
     for result in vector_results:
         if result["website_url"] == website_url:
-            if result.get("keywords"):
-                # Extract first few keywords
-                kw_list = result["keywords"].split()[:5]
-                keywords.extend(kw_list)
+            # Take the first few keywords of each matching page
+            keywords.extend(keywords_by_vector_id.get(result["id"], [])[:5])
 
-    return list(set(keywords))[:10]  # Return unique keywords, max 10
+    return list(dict.fromkeys(keywords))[:10]  # Return unique keywords, max 10
 
 @router.get("/filters")
 def get_search_filters(db: Session = Depends(get_db)):
     """Get available filter ranges based on existing data"""
 
-    dr_min = db.query(Website.dr).filter(Website.dr.isnot(None)).order_by(Website.dr).first()
-    dr_max = db.query(Website.dr).filter(Website.dr.isnot(None)).order_by(Website.dr.desc()).first()
+    with SEARCH_STAGE_SECONDS.labels(endpoint="filters", stage="sql_aggregate").time():
+        dr_min = db.query(Website.dr).filter(Website.dr.isnot(None)).order_by(Website.dr).first()
+        dr_max = db.query(Website.dr).filter(Website.dr.isnot(None)).order_by(Website.dr.desc()).first()
 
-    traffic_min = db.query(Website.traffic).filter(Website.traffic.isnot(None)).order_by(Website.traffic).first()
-    traffic_max = db.query(Website.traffic).filter(Website.traffic.isnot(None)).order_by(Website.traffic.desc()).first()
+        traffic_min = db.query(Website.traffic).filter(Website.traffic.isnot(None)).order_by(Website.traffic).first()
+        traffic_max = db.query(Website.traffic).filter(Website.traffic.isnot(None)).order_by(Website.traffic.desc()).first()
 
-    price_min = db.query(Website.price).order_by(Website.price).first()
-    price_max = db.query(Website.price).order_by(Website.price.desc()).first()
+        price_min = db.query(Website.price).order_by(Website.price).first()
+        price_max = db.query(Website.price).order_by(Website.price.desc()).first()
 
     return {
         "dr_range": {
@@ -116,4 +335,33 @@ def get_search_filters(db: Session = Depends(get_db)):
             "min": price_min[0] if price_min else 0,
             "max": price_max[0] if price_max else 10000
         }
-    }
\ No newline at end of file
+    }
+
+@router.get("/keywords/{keyword}/websites", response_model=List[KeywordWebsiteResult])
+def get_keyword_websites(
+    keyword: str,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Websites with pages ranking for an exact keyword, best position first"""
+
+    rankings = find_websites_by_keyword(keyword, db, limit=limit)
+    websites = {
+        website.id: website
+        for website in db.query(Website).filter(Website.id.in_([r["website_id"] for r in rankings]))
+    }
+
+    return [
+        KeywordWebsiteResult(
+            id=ranking["website_id"],
+            url=websites[ranking["website_id"]].url,
+            dr=websites[ranking["website_id"]].dr,
+            traffic=websites[ranking["website_id"]].traffic,
+            price=websites[ranking["website_id"]].price,
+            best_position=ranking["best_position"],
+            search_volume=ranking["search_volume"],
+            pages=ranking["pages"]
+        )
+        for ranking in rankings
+        if ranking["website_id"] in websites
+    ]
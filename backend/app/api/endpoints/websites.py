@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import asyncio
 import csv
 import io
-from app.db.database import get_db
+import json
+from app.db.database import get_db, SessionLocal
 from app.models.models import User, Website, Import
-from app.api.endpoints.auth import get_current_user
+from app.api.endpoints.auth import get_current_user, get_user_from_token, optional_oauth2_scheme
 from app.services.data_processor import process_website_data
+from app.services.website_export import stream_websites_export
+from app.services.import_progress import progress_broker, ImportStatusPoller, TERMINAL_STATUSES
+from app.schemas.search import WebsiteFilters
 from app.schemas.website import WebsiteResponse, ImportStatus
 
 router = APIRouter()
@@ -69,6 +75,85 @@ def get_import_status(
         processed_websites=import_record.processed_websites
     )
 
+@router.get("/imports/{import_id}/events")
+def stream_import_progress(
+    import_id: int,
+    token: Optional[str] = Query(None, description="Access token, for EventSource clients that cannot set headers"),
+    bearer_token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of import progress.
+    Authorization and the import lookup happen once when the stream opens;
+    updates are pushed from the import worker through the progress broker.
+    When nothing was pushed within the keepalive interval the stream checks
+    the broker's latest snapshot and then the import status in the database,
+    polled once per import for all its streams, so it also ends for imports
+    running on another worker.
+    """
+    access_token = bearer_token or token
+    if not access_token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    current_user = get_user_from_token(access_token, db)
+
+    import_record = db.query(Import).filter(
+        Import.id == import_id,
+        Import.user_id == current_user.id
+    ).first()
+
+    if not import_record:
+        raise HTTPException(status_code=404, detail="Import not found")
+
+    return StreamingResponse(
+        _progress_events(import_id, _import_event(import_record)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _import_event(import_record: Import) -> dict:
+    return {
+        "import_id": import_record.id,
+        "status": import_record.status,
+        "total_websites": import_record.total_websites,
+        "processed_websites": import_record.processed_websites
+    }
+
+def _stored_import_event(import_id: int) -> Optional[dict]:
+    """Import state from the database, read in a short-lived session"""
+    db = SessionLocal()
+    try:
+        import_record = db.query(Import).filter(Import.id == import_id).first()
+        return _import_event(import_record) if import_record else None
+    finally:
+        db.close()
+
+import_status_poller = ImportStatusPoller(_stored_import_event)
+
+async def _progress_events(import_id: int, fallback: dict):
+    def format_event(event: dict) -> str:
+        return f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+    first = True
+    async for event in progress_broker.subscribe(import_id):
+        if first:
+            # Nothing published yet (or the import ran elsewhere): start from the database state
+            first = False
+            event = event or fallback
+        elif event is None:
+            # The import may run on another worker whose progress this broker cannot see
+            event = await asyncio.to_thread(progress_broker.latest, import_id)
+            if event is None or event["status"] not in TERMINAL_STATUSES:
+                event = await import_status_poller.status(import_id)
+            if event is None:
+                break
+            if event["status"] not in TERMINAL_STATUSES:
+                yield ": keepalive\n\n"
+                continue
+
+        yield format_event(event)
+        if event["status"] in TERMINAL_STATUSES:
+            break
+
 @router.get("/", response_model=List[WebsiteResponse])
 def get_websites(
     skip: int = 0,
@@ -77,4 +162,29 @@ def get_websites(
     db: Session = Depends(get_db)
 ):
     websites = db.query(Website).offset(skip).limit(limit).all()
-    return websites
\ No newline at end of file
+    return websites
+
+@router.get("/export")
+def export_websites(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: WebsiteFilters = Depends(),
+    keyword: Optional[str] = Query(None, description="Only websites with a page ranking for this keyword"),
+    include_page_counts: bool = False,
+    include_top_keywords: bool = False,
+    top_keywords_limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all websites matching the search filters as CSV or NDJSON"""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_websites_export(
+            export_format=format,
+            filters=filters.filter_values(),
+            keyword=keyword,
+            include_page_counts=include_page_counts,
+            include_top_keywords=include_top_keywords,
+            top_keywords_limit=top_keywords_limit
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=websites.{format}"}
+    )
\ No newline at end of file
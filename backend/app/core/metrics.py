@@ -0,0 +1,79 @@
+from prometheus_client import Counter, Histogram
+from contextlib import contextmanager
+from typing import Dict
+import time
+
+# Stage latencies span sub-millisecond SQL to multi-second provider calls
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+IMPORT_STAGE_SECONDS = Histogram(
+    "lqs_import_stage_seconds",
+    "Time spent per website in each import stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+
+IMPORT_WEBSITES = Counter(
+    "lqs_import_websites_total",
+    "Websites handled by imports by outcome",
+    ["outcome"]
+)
+
+SEARCH_STAGE_SECONDS = Histogram(
+    "lqs_search_stage_seconds",
+    "Time spent in each search stage",
+    ["endpoint", "stage"],
+    buckets=STAGE_BUCKETS
+)
+
+PROVIDER_ERRORS = Counter(
+    "lqs_provider_errors_total",
+    "Failed external provider calls",
+    ["provider", "kind"]
+)
+
+PROVIDER_RETRIES = Counter(
+    "lqs_provider_retries_total",
+    "Retried external provider calls",
+    ["provider"]
+)
+
+REINDEX_PAGES = Counter(
+    "lqs_reindex_pages_total",
+    "Pages embedded into a shadow index by re-index jobs"
+)
+
+CACHE_REQUESTS = Counter(
+    "lqs_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"]
+)
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+class StageTimer:
+    """
+    Times named stages into a histogram and keeps the durations of this
+    request so they can be returned in a Server-Timing header
+    """
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+            self.histogram.labels(stage=name, **self.labels).observe(elapsed)
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.durations.items()
+        )
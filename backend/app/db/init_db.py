@@ -0,0 +1,14 @@
+from app.db.database import engine, Base
+import app.models.models  # noqa: F401 - registers the models on Base.metadata
+import logging
+
+logger = logging.getLogger(__name__)
+
+def init_db():
+    """Create any missing tables"""
+    Base.metadata.create_all(bind=engine)
+    logger.info("Database schema initialized")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    init_db()
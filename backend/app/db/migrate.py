@@ -0,0 +1,225 @@
+"""
+Schema and data migrations create_all cannot apply to an existing database:
+columns added to existing tables, their indexes and data backfills.
+Run once after deploying (each step is idempotent and resumable):
+
+    cd backend && python -m app.db.migrate [--drop-legacy-columns]
+"""
+from sqlalchemy import JSON, Integer, column, exists, inspect, select, table, text
+from sqlalchemy.orm import Session
+from types import SimpleNamespace
+from typing import Dict, List
+from app.db.database import Base, SessionLocal, engine
+from app.db.init_db import init_db
+from app.models.models import PageKeyword, Website
+from app.services.domain_utils import canonical_domain
+from app.services.keyword_store import store_page_keywords
+from app.services.website_cleanup import delete_website_batch
+from datetime import datetime
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK_SIZE = 1000
+
+# Model columns added to tables that existed before, as (table, column, value for existing rows)
+ADDED_COLUMNS = [
+    ("websites", "domain", None),
+    ("websites", "last_demanded_at", None),
+    ("deletion_jobs", "failed_websites", 0),
+    ("reindex_jobs", "lease_owner", None),
+    ("reindex_jobs", "lease_expires_at", None),
+]
+
+# Indexes of the added columns, created after the backfills so unique ones hold
+ADDED_INDEXES = [
+    "ix_websites_domain",
+    "ix_websites_last_demanded_at",
+    "ix_websites_updated_at",
+    "ix_pages_vector_id",
+]
+
+# The JSON keyword list pages had before page_keywords
+legacy_pages = table("pages", column("id", Integer), column("website_id", Integer), column("keywords", JSON))
+
+def _has_column(table_name: str, column_name: str, db: Session) -> bool:
+    return column_name in {c["name"] for c in inspect(db.get_bind()).get_columns(table_name)}
+
+def _existing_indexes(table_name: str, db: Session) -> set:
+    return {index["name"] for index in inspect(db.get_bind()).get_indexes(table_name)}
+
+def add_missing_columns(db: Session) -> List[str]:
+    """
+    Add the ADDED_COLUMNS an existing table lacks, with the column type of
+    the model (constraints and indexes come later) and fill existing rows.
+    Missing tables are left to create_all. Returns the columns added.
+    """
+    added = []
+    for table_name, column_name, value in ADDED_COLUMNS:
+        if not inspect(db.get_bind()).has_table(table_name) or _has_column(table_name, column_name, db):
+            continue
+        column = Base.metadata.tables[table_name].c[column_name]
+        column_type = column.type.compile(db.get_bind().dialect)
+        db.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+        if value is not None:
+            db.execute(text(f"UPDATE {table_name} SET {column_name} = :value"), {"value": value})
+        db.commit()
+        added.append(f"{table_name}.{column_name}")
+        logger.info(f"Added column {table_name}.{column_name}")
+    return added
+
+def create_missing_indexes(db: Session) -> List[str]:
+    """Create the ADDED_INDEXES an existing table lacks. Returns the indexes created."""
+    indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+    created = []
+    for index_name in ADDED_INDEXES:
+        index = indexes[index_name]
+        if not inspect(db.get_bind()).has_table(index.table.name) or index_name in _existing_indexes(index.table.name, db):
+            continue
+        index.create(db.connection())
+        db.commit()
+        created.append(index_name)
+        logger.info(f"Created index {index_name}")
+    return created
+
+def _enrichment_rank(website: Website):
+    return (website.keywords_data is not None, website.dr is not None, website.updated_at or datetime.min)
+
+def _merge_websites(website: Website, other: Website, domain: str, db: Session) -> bool:
+    """
+    Keep the better enriched of two websites with the same canonical domain,
+    fill its missing fields from the other and delete the other with its
+    pages and vectors. Returns False if the other's vectors could not be
+    deleted; it is then kept without a domain and merged on the next run.
+    """
+    keep, drop = sorted([website, other], key=_enrichment_rank, reverse=True)
+    if keep.domain != domain:
+        drop.domain = None
+        db.flush()
+        keep.domain = domain
+
+    for field in ("email", "price", "dr", "traffic"):
+        if getattr(keep, field) is None:
+            setattr(keep, field, getattr(drop, field))
+    if drop.last_demanded_at and (keep.last_demanded_at is None or drop.last_demanded_at > keep.last_demanded_at):
+        keep.last_demanded_at = drop.last_demanded_at
+    db.flush()
+
+    drop_id = drop.id
+    db.expunge(drop)
+    return delete_website_batch([drop_id], db)["deleted_websites"] == 1
+
+def backfill_website_domains(db: Session) -> Dict[str, int]:
+    """
+    Fill the canonical domain of websites stored before the domain column
+    existed, merging websites whose URLs share a canonical domain
+    (e.g. "http://www.x.com/" and "https://x.com").
+    Returns the number of websites filled, merged and skipped (no valid domain).
+    """
+    counts = {"filled": 0, "merged": 0, "invalid": 0}
+    after_id = 0
+    while True:
+        websites = db.query(Website).filter(
+            Website.id > after_id,
+            Website.domain.is_(None)
+        ).order_by(Website.id).limit(BACKFILL_CHUNK_SIZE).all()
+        if not websites:
+            return counts
+
+        for website in websites:
+            domain = canonical_domain(website.url)
+            if not domain:
+                logger.warning(f"Website {website.id} has no valid domain: {website.url}")
+                counts["invalid"] += 1
+                continue
+
+            existing = db.query(Website).filter(Website.domain == domain).first()
+            if existing is None:
+                website.domain = domain
+                db.flush()
+                counts["filled"] += 1
+            elif _merge_websites(website, existing, domain, db):
+                counts["merged"] += 1
+
+        after_id = websites[-1].id
+        db.commit()
+        logger.info(f"Website domains: {counts}")
+
+def backfill_page_keywords(db: Session) -> int:
+    """
+    Move keywords of pages stored before page_keywords existed (the legacy
+    pages.keywords JSON column) into keywords/page_keywords.
+    Pages that already have page_keywords rows are skipped.
+    Returns the number of pages migrated.
+    """
+    if not _has_column("pages", "keywords", db):
+        return 0
+
+    migrated = 0
+    after_id = 0
+    while True:
+        rows = db.execute(
+            select(legacy_pages.c.id, legacy_pages.c.website_id, legacy_pages.c.keywords).where(
+                legacy_pages.c.id > after_id,
+                legacy_pages.c.keywords.isnot(None),
+                ~exists().where(PageKeyword.page_id == legacy_pages.c.id)
+            ).order_by(legacy_pages.c.id).limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            return migrated
+
+        pages = [SimpleNamespace(id=page_id, website_id=website_id) for page_id, website_id, _ in rows]
+        # Legacy pages stored no position or search volume
+        store_page_keywords(pages, [{"keywords": keywords or []} for _, _, keywords in rows], db)
+        db.commit()
+
+        migrated += len(rows)
+        after_id = rows[-1][0]
+        logger.info(f"Backfilled page keywords of {migrated} pages")
+
+def drop_legacy_page_keywords(db: Session) -> bool:
+    """Drop pages.keywords once every page with keywords has been backfilled"""
+    if not _has_column("pages", "keywords", db):
+        return False
+
+    pending = db.execute(
+        select(legacy_pages.c.id).where(
+            legacy_pages.c.keywords.isnot(None),
+            ~exists().where(PageKeyword.page_id == legacy_pages.c.id)
+        ).limit(1)
+    ).first()
+    if pending:
+        logger.warning("Not dropping pages.keywords: some pages are not backfilled yet")
+        return False
+
+    db.execute(text("ALTER TABLE pages DROP COLUMN keywords"))
+    db.commit()
+    logger.info("Dropped pages.keywords")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Create missing tables and backfill data for schema changes")
+    parser.add_argument(
+        "--drop-legacy-columns",
+        action="store_true",
+        help="Drop legacy columns once their data has been backfilled"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        logger.info(f"Columns added: {add_missing_columns(db)}")
+        logger.info(f"Website domains: {backfill_website_domains(db)}")
+        logger.info(f"Page keywords: {backfill_page_keywords(db)} pages backfilled")
+        logger.info(f"Indexes created: {create_missing_indexes(db)}")
+        if args.drop_legacy_columns:
+            drop_legacy_page_keywords(db)
+    finally:
+        db.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
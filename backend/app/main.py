@@ -1,13 +1,51 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import auth, websites, search, admin
+from app.api.endpoints import auth, websites, search, admin, health
 from app.core.config import settings
-from app.db.database import engine, Base
+from app.db.init_db import init_db
+from app.services.reranker import reranker
+from app.services.refresh_scheduler import refresh_scheduler
+from app.services.website_demand import demand_tracker
+import logging
 
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Link Qualification System")
 
+@app.on_event("startup")
+def create_schema():
+    """Schema setup runs at startup rather than import; failures surface via /health/ready"""
+    if not settings.AUTO_CREATE_SCHEMA:
+        return
+    try:
+        init_db()
+    except Exception as e:
+        logger.error(f"Error initializing database schema: {e}")
+
+@app.on_event("startup")
+def load_rerank_model():
+    """Load the search re-rank model once per worker, if one is configured"""
+    reranker.load()
+
+@app.on_event("startup")
+async def start_refresh_scheduler():
+    """Run deferred retries and refresh stale websites in the background, spread over the day"""
+    refresh_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_refresh_scheduler():
+    await refresh_scheduler.stop()
+
+@app.on_event("startup")
+async def start_demand_tracker():
+    """Write which websites searches returned, even while refreshes are disabled"""
+    demand_tracker.start()
+
+@app.on_event("shutdown")
+async def stop_demand_tracker():
+    await demand_tracker.stop()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", settings.FRONTEND_URL],
@@ -20,6 +58,12 @@ app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(websites.router, prefix="/api/websites", tags=["websites"])
 app.include_router(search.router, prefix="/api/search", tags=["search"])
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(health.router, prefix="/health", tags=["health"])
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/")
 def read_root():
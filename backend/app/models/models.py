@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, Date, DateTime, Boolean, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from datetime import datetime
@@ -19,14 +19,17 @@ class Website(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, unique=True, index=True)
+    domain = Column(String, unique=True, index=True)
     email = Column(String)
     price = Column(Float)
     dr = Column(Integer)
     traffic = Column(Integer)
     keywords_data = Column(JSON)
     vector_ids = Column(JSON)
+    # Last time the website was returned by a search or exported; refreshed more often
+    last_demanded_at = Column(DateTime, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     pages = relationship("Page", back_populates="website")
 
@@ -36,11 +39,33 @@ class Page(Base):
     id = Column(Integer, primary_key=True, index=True)
     website_id = Column(Integer, ForeignKey("websites.id"))
     url = Column(String)
-    keywords = Column(JSON)
-    vector_id = Column(String)
+    vector_id = Column(String, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     website = relationship("Website", back_populates="pages")
+    keyword_links = relationship("PageKeyword", back_populates="page")
+
+class Keyword(Base):
+    __tablename__ = "keywords"
+
+    id = Column(Integer, primary_key=True, index=True)
+    text = Column(String, unique=True, index=True)
+
+class PageKeyword(Base):
+    __tablename__ = "page_keywords"
+
+    page_id = Column(Integer, ForeignKey("pages.id", ondelete="CASCADE"), primary_key=True)
+    keyword_id = Column(Integer, ForeignKey("keywords.id"), primary_key=True)
+    website_id = Column(Integer, ForeignKey("websites.id", ondelete="CASCADE"), index=True)
+    position = Column(Integer)
+    search_volume = Column(Integer)
+
+    page = relationship("Page", back_populates="keyword_links")
+    keyword = relationship("Keyword")
+
+    __table_args__ = (
+        Index("ix_page_keywords_keyword_website", "keyword_id", "website_id"),
+    )
 
 class Import(Base):
     __tablename__ = "imports"
@@ -54,4 +79,86 @@ class Import(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime)
 
-    user = relationship("User", back_populates="imports")
\ No newline at end of file
+    user = relationship("User", back_populates="imports")
+
+class DeletionJob(Base):
+    __tablename__ = "deletion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    criteria = Column(JSON)
+    status = Column(String, default="pending")
+    total_websites = Column(Integer, default=0)
+    deleted_websites = Column(Integer, default=0)
+    # Websites kept because their vectors could not be deleted
+    failed_websites = Column(Integer, default=0)
+    deleted_vectors = Column(Integer, default=0)
+    failed_vectors = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime)
+
+
+class ProviderRetry(Base):
+    __tablename__ = "provider_retries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    website_id = Column(Integer, ForeignKey("websites.id", ondelete="CASCADE"), index=True)
+    provider = Column(String)
+    status = Column(String, default="pending")
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("website_id", "provider", name="uq_provider_retries_website_provider"),
+    )
+
+class ReindexJob(Base):
+    __tablename__ = "reindex_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    status = Column(String, default="pending", index=True)
+    model = Column(String)
+    dimension = Column(Integer)
+    index_name = Column(String)
+    namespace = Column(String, default="")
+    dual_write = Column(Boolean, default=True)
+    total_pages = Column(Integer, default=0)
+    processed_pages = Column(Integer, default=0)
+    # Checkpoint: every page up to this ID is in the new index
+    last_page_id = Column(Integer, default=0)
+    # Held by the worker building the job, renewed at every checkpoint
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    pages_per_second = Column(Float)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    activated_at = Column(DateTime)
+
+class RefreshBudget(Base):
+    __tablename__ = "refresh_budgets"
+
+    # UTC day, and Ahrefs/DataForSEO calls claimed by refresh and retry runs on it
+    day = Column(Date, primary_key=True)
+    calls = Column(Integer, default=0, nullable=False)
+
+class RefreshRun(Base):
+    __tablename__ = "refresh_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # "refresh" (stale websites) or "retry" (deferred provider retries)
+    kind = Column(String, default="refresh")
+    status = Column(String, default="running")
+    websites = Column(Integer, default=0)
+    # Estimated Ahrefs and DataForSEO calls, counted against the daily budget
+    provider_calls = Column(Integer, default=0)
+    outcomes = Column(JSON)
+    error = Column(Text)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
+    completed_at = Column(DateTime)
\ No newline at end of file
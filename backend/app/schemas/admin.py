@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -35,4 +35,81 @@ class WebsiteDetail(BaseModel):
     pages: List[PageInfo]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BulkDeleteRequest(BaseModel):
+    website_ids: Optional[List[int]] = None
+    min_dr: Optional[int] = None
+    max_dr: Optional[int] = None
+    min_traffic: Optional[int] = None
+    max_traffic: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+class DeletionJobStatus(BaseModel):
+    id: int
+    status: str
+    total_websites: int
+    deleted_websites: int
+    failed_websites: int
+    deleted_vectors: int
+    failed_vectors: int
+    error: Optional[str]
+
+class RetryQueueStats(BaseModel):
+    # Queued retries per provider and status (pending, abandoned)
+    providers: Dict[str, Dict[str, int]]
+    due: int
+    next_attempt_at: Optional[datetime]
+
+class RefreshRunStatus(BaseModel):
+    id: int
+    kind: str
+    status: str
+    websites: int
+    provider_calls: int
+    outcomes: Optional[Dict[str, int]]
+    error: Optional[str]
+    started_at: datetime
+    completed_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+class RefreshStatus(BaseModel):
+    enabled: bool
+    retries_enabled: bool
+    stale_websites: int
+    stale_demanded_websites: int
+    daily_call_budget: int
+    calls_used_today: int
+    recent_runs: List[RefreshRunStatus]
+
+class ReindexRequest(BaseModel):
+    model: str
+    dimension: int = Field(..., gt=0, le=20000)
+    # Defaults: the active index if the dimension is unchanged, else a new index;
+    # always a fresh namespace so old vectors never mix in
+    index_name: Optional[str] = None
+    namespace: Optional[str] = None
+    dual_write: bool = True
+
+class ReindexJobStatus(BaseModel):
+    id: int
+    status: str
+    model: str
+    dimension: int
+    index_name: str
+    namespace: str
+    dual_write: bool
+    total_pages: int
+    processed_pages: int
+    last_page_id: int
+    percent: float
+    pages_per_second: Optional[float]
+    eta_seconds: Optional[float]
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    activated_at: Optional[datetime]
\ No newline at end of file
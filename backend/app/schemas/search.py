@@ -1,13 +1,24 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Any, Optional, List, Dict
 
-class SearchRequest(BaseModel):
-    keyword: str
+class WebsiteFilters(BaseModel):
+    """DR/traffic/price filters, the same for every endpoint that takes them"""
     min_dr: Optional[int] = None
     max_dr: Optional[int] = None
     min_traffic: Optional[int] = None
+    max_traffic: Optional[int] = None
+    min_price: Optional[float] = None
     max_price: Optional[float] = None
+
+    def filter_values(self) -> Dict[str, Any]:
+        """Keyword arguments for apply_website_filters"""
+        return self.model_dump(include=set(WebsiteFilters.model_fields))
+
+class SearchRequest(WebsiteFilters):
+    keyword: str
     limit: Optional[int] = 20
+    # Also return facet counts and a candidate set handle for /refine
+    facets: bool = False
 
 class SearchResult(BaseModel):
     id: int
@@ -17,7 +28,57 @@ class SearchResult(BaseModel):
     dr: Optional[int]
     traffic: Optional[int]
     relevance_score: float
+    # Re-ranking score combining relevance with page ranking and site metrics
+    rank_score: Optional[float] = None
     matching_keywords: List[str]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class FacetBand(BaseModel):
+    min: float
+    max: Optional[float]
+    count: int
+
+class Facet(BaseModel):
+    bands: List[FacetBand]
+    unknown: int
+
+class SearchFacets(BaseModel):
+    total: int
+    dr: Facet
+    traffic: Facet
+    price: Facet
+
+class FacetedSearchResponse(BaseModel):
+    results: List[SearchResult]
+    facets: SearchFacets
+    candidate_set: str
+    expires_in_seconds: int
+
+class RefineSearchRequest(WebsiteFilters):
+    candidate_set: str
+    limit: Optional[int] = 20
+
+class BatchSearchRequest(WebsiteFilters):
+    keywords: List[str] = Field(..., min_length=1, max_length=200)
+    limit: Optional[int] = 20
+    merged_limit: Optional[int] = 100
+
+class MergedSearchResult(SearchResult):
+    matched_queries: List[str]
+    combined_score: float
+
+class BatchSearchResponse(BaseModel):
+    results: Dict[str, List[SearchResult]]
+    merged: List[MergedSearchResult]
+
+class KeywordWebsiteResult(BaseModel):
+    id: int
+    url: str
+    dr: Optional[int]
+    traffic: Optional[int]
+    price: Optional[float]
+    best_position: Optional[int]
+    search_volume: Optional[int]
+    pages: int
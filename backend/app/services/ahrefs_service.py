@@ -1,6 +1,8 @@
 import requests
 from typing import Dict, Optional
 from app.core.config import settings
+from app.core.metrics import PROVIDER_ERRORS
+from app.services.rate_limiter import get_provider_client, provider_timeout, ProviderError
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,51 +10,70 @@ logger = logging.getLogger(__name__)
 class AhrefsService:
     def __init__(self):
         self.api_key = settings.AHREFS_API_KEY
-        self.base_url = "https://api.ahrefs.com/v2"
+        self.base_url = settings.AHREFS_BASE_URL.rstrip("/")
+        self._session = None
+        self.client = get_provider_client("ahrefs")
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session, created on first use and reused for connection pooling"""
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
 
     def get_domain_metrics(self, domain: str) -> Dict[str, Optional[int]]:
         """
         Get DR (Domain Rating) and traffic data from Ahrefs API
+        Raises ProviderError when Ahrefs could not be reached or kept throttling
         """
         if not self.api_key:
             logger.warning("Ahrefs API key not configured")
             return {"dr": None, "traffic": None}
 
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Accept": "application/json"
+        }
+
+        # Get domain rating
+        dr_data = self._get(f"{self.base_url}/domain-rating", domain, headers)
+
+        # Get organic traffic
+        traffic_data = self._get(f"{self.base_url}/organic-traffic", domain, headers)
+
+        return {
+            "dr": self._metric(dr_data, "domain_rating"),
+            "traffic": self._metric(traffic_data, "traffic")
+        }
+
+    @staticmethod
+    def _metric(data: Optional[Dict], key: str) -> Optional[int]:
+        """Metric as an int; None when Ahrefs has no data or returned null for it"""
+        if data is None:
+            return None
+        value = data.get(key, 0)
+        return int(value) if value is not None else None
+
+    def _get(self, url: str, domain: str, headers: Dict) -> Optional[Dict]:
+        """
+        GET through the shared Ahrefs limiter
+        Returns the JSON body, None when Ahrefs has no data for the domain,
+        and raises ProviderError when the request failed
+        """
+        response = self.client.request(
+            lambda: self.session.get(url, params={"target": domain}, headers=headers, timeout=provider_timeout())
+        )
+
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            PROVIDER_ERRORS.labels(provider="ahrefs", kind=f"http_{response.status_code}").inc()
+            raise ProviderError("ahrefs", f"HTTP {response.status_code} for {domain}", response.status_code)
+
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Accept": "application/json"
-            }
-
-            # Get domain rating
-            dr_response = requests.get(
-                f"{self.base_url}/domain-rating",
-                params={"target": domain},
-                headers=headers
-            )
-
-            # Get organic traffic
-            traffic_response = requests.get(
-                f"{self.base_url}/organic-traffic",
-                params={"target": domain},
-                headers=headers
-            )
-
-            dr = None
-            traffic = None
-
-            if dr_response.status_code == 200:
-                dr_data = dr_response.json()
-                dr = int(dr_data.get("domain_rating", 0))
-
-            if traffic_response.status_code == 200:
-                traffic_data = traffic_response.json()
-                traffic = int(traffic_data.get("traffic", 0))
-
-            return {"dr": dr, "traffic": traffic}
-
-        except Exception as e:
-            logger.error(f"Error fetching Ahrefs data for {domain}: {e}")
-            return {"dr": None, "traffic": None}
+            return response.json()
+        except ValueError as e:
+            PROVIDER_ERRORS.labels(provider="ahrefs", kind=type(e).__name__).inc()
+            raise ProviderError("ahrefs", f"Invalid response for {domain}: {e}")
 
 ahrefs_service = AhrefsService()
\ No newline at end of file
@@ -0,0 +1,102 @@
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.metrics import record_cache
+from collections import OrderedDict
+import json
+import logging
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+def _key(handle: str) -> str:
+    return f"search-candidates:{handle}"
+
+class MemoryCandidateStore:
+    """
+    In-process store of search candidate sets with a TTL and an entry cap.
+    Reading a set extends its TTL. Handles are only known to the worker that
+    created them.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, handle: str, candidates: dict):
+        with self._lock:
+            self._entries[handle] = (time.monotonic() + self.ttl_seconds, candidates)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, handle: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            expires_at, candidates = entry
+            if expires_at < time.monotonic():
+                del self._entries[handle]
+                return None
+            self._entries[handle] = (time.monotonic() + self.ttl_seconds, candidates)
+            self._entries.move_to_end(handle)
+            return candidates
+
+class RedisCandidateStore:
+    """Candidate sets in Redis, so any worker can refine a search; reading extends the TTL"""
+
+    def __init__(self, redis_url: str, ttl_seconds: float):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def put(self, handle: str, candidates: dict):
+        try:
+            self.client.set(_key(handle), json.dumps(candidates), ex=int(self.ttl_seconds))
+        except Exception as e:
+            logger.error(f"Error storing candidate set {handle}: {e}")
+
+    def get(self, handle: str) -> Optional[dict]:
+        try:
+            payload = self.client.getex(_key(handle), ex=int(self.ttl_seconds))
+        except Exception as e:
+            logger.error(f"Error reading candidate set {handle}: {e}")
+            return None
+        return json.loads(payload) if payload else None
+
+class CandidateSets:
+    """
+    Short-lived handles to the unfiltered result of a search (vector matches,
+    their keywords and the facet counts), so filter changes can be applied
+    with SQL alone instead of another embed and vector query
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def save(self, candidates: Dict) -> str:
+        handle = secrets.token_urlsafe(16)
+        self.store.put(handle, candidates)
+        return handle
+
+    def load(self, handle: str) -> Optional[Dict]:
+        candidates = self.store.get(handle)
+        record_cache("candidate_set", candidates is not None)
+        return candidates
+
+def _create_store():
+    if settings.CANDIDATE_SET_BACKEND == "redis":
+        return RedisCandidateStore(settings.REDIS_URL, settings.CANDIDATE_SET_TTL_SECONDS)
+    return MemoryCandidateStore(settings.CANDIDATE_SET_TTL_SECONDS, settings.CANDIDATE_SET_MAX_ENTRIES)
+
+candidate_sets = CandidateSets(_create_store())
\ No newline at end of file
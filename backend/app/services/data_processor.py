@@ -1,98 +1,442 @@
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from typing import List, Dict, Set, Tuple, Callable
+from app.core.config import settings
+from app.db.database import SessionLocal
 from app.models.models import Website, Page, Import
 from app.services.ahrefs_service import ahrefs_service
 from app.services.dataforseo_service import dataforseo_service
 from app.services.vector_service import vector_service
+from app.services.domain_utils import canonical_domain
+from app.services.keyword_store import merge_page_items, store_page_keywords
+from app.services.rate_limiter import ProviderError
+from app.services.retry_queue import schedule_retry, clear_retry, due_retries
+from app.services.website_cleanup import replace_website_pages
+from app.core.metrics import IMPORT_STAGE_SECONDS, IMPORT_WEBSITES, StageTimer
+from app.services.import_progress import ImportProgress
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import queue
+import threading
 from datetime import datetime
-from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
-def process_website_data(websites_data: list, import_id: int, db: Session):
+LOOKUP_CHUNK_SIZE = 500
+
+PROVIDERS = ("ahrefs", "dataforseo")
+
+# (website, domain, website url, providers to fetch)
+EnrichmentJob = Tuple[Website, str, str, Set[str]]
+
+def deduplicate_websites(websites_data: list) -> Dict[str, dict]:
     """
-    Background task to process imported websites:
-    1. Get DR and traffic from Ahrefs
-    2. Get keywords from DataForSEO
-    3. Vectorize keywords with Pinecone
-    4. Store everything in database
+    Collapse CSV rows to one entry per canonical domain (first row wins)
     """
+    unique_websites = {}
+    for website_data in websites_data:
+        domain = canonical_domain(website_data['url'])
+        if not domain:
+            logger.warning(f"Skipping invalid website URL: {website_data['url']}")
+            continue
+        if domain not in unique_websites:
+            unique_websites[domain] = website_data
+    return unique_websites
+
+def _legacy_urls(domain: str, url: str) -> List[str]:
+    """URL spellings websites were stored under before the domain column existed"""
+    return [url] + [
+        f"{scheme}://{prefix}{domain}{suffix}"
+        for scheme in ("https", "http")
+        for prefix in ("", "www.")
+        for suffix in ("", "/")
+    ]
+
+def find_existing_websites(domains: List[str], urls: List[str], db: Session) -> Dict[str, Website]:
+    """
+    Load existing websites by canonical domain, falling back to common URL
+    spellings for rows created before the domain column existed and not yet
+    backfilled (python -m app.db.migrate)
+    """
+    existing = {}
+    for start in range(0, len(domains), LOOKUP_CHUNK_SIZE):
+        domain_chunk = domains[start:start + LOOKUP_CHUNK_SIZE]
+        url_chunk = [
+            legacy_url
+            for domain, url in zip(domain_chunk, urls[start:start + LOOKUP_CHUNK_SIZE])
+            for legacy_url in _legacy_urls(domain, url)
+        ]
+        websites = db.query(Website).filter(
+            or_(Website.domain.in_(domain_chunk), Website.url.in_(url_chunk))
+        ).all()
+        # Rows with the domain set win over legacy rows matched by URL
+        for website in sorted(websites, key=lambda website: website.domain is not None):
+            existing[website.domain or canonical_domain(website.url)] = website
+    return existing
+
+def _clean_url(url: str) -> str:
+    if not url.startswith(('http://', 'https://')):
+        url = f"https://{url}"
+    return url
+
+def vectorize_pages(domain: str, website_url: str, pages_data: List[Dict]) -> Dict:
+    """Embed and store a website's pages; a ProviderError defers DataForSEO for the website"""
+    result = {"errors": {}}
     try:
-        import_record = db.query(Import).filter(Import.id == import_id).first()
+        vector_ids = []
+        if pages_data:
+            logger.info(f"Vectorizing keywords for {domain}")
+            vector_ids = vector_service.store_vectors(website_url, pages_data)
 
-        for idx, website_data in enumerate(websites_data):
-            try:
-                # Clean URL
-                url = website_data['url']
-                if not url.startswith(('http://', 'https://')):
-                    url = f"https://{url}"
-
-                domain = urlparse(url).netloc
-
-                # Check if website already exists
-                existing = db.query(Website).filter(Website.url == url).first()
-                if existing:
-                    website = existing
-                else:
-                    website = Website(
-                        url=url,
-                        email=website_data['email'],
-                        price=website_data['price']
-                    )
-                    db.add(website)
-                    db.flush()
+        result["pages_data"] = pages_data
+        result["vector_ids"] = vector_ids
+    except ProviderError as e:
+        # Pages are only stored together with their vectors, so any failure
+        # along the keyword pipeline retries it as a whole
+        result["errors"]["dataforseo"] = str(e)
+    return result
+
+def fetch_website_data(domain: str, website_url: str, providers: Set[str], stages: StageTimer) -> Dict:
+    """
+    Network half of enriching a website, run in worker threads.
+    Providers fail independently: a ProviderError is recorded in "errors"
+    so the other provider's data is still stored and only the failed one is retried.
+    """
+    result = {"errors": {}}
 
-                # Step 1: Get Ahrefs metrics
-                logger.info(f"Fetching Ahrefs data for {domain}")
-                ahrefs_data = ahrefs_service.get_domain_metrics(domain)
-                website.dr = ahrefs_data.get("dr")
-                website.traffic = ahrefs_data.get("traffic")
+    if "ahrefs" in providers:
+        logger.info(f"Fetching Ahrefs data for {domain}")
+        try:
+            with stages.stage("ahrefs"):
+                result["ahrefs"] = ahrefs_service.get_domain_metrics(domain)
+        except ProviderError as e:
+            result["errors"]["ahrefs"] = str(e)
 
-                # Step 2: Get keywords from DataForSEO
-                logger.info(f"Fetching DataForSEO data for {domain}")
+    if "dataforseo" in providers:
+        logger.info(f"Fetching DataForSEO data for {domain}")
+        try:
+            with stages.stage("dataforseo"):
                 pages_data = dataforseo_service.get_website_pages_keywords(domain)
+        except ProviderError as e:
+            result["errors"]["dataforseo"] = str(e)
+        else:
+            vectorized = vectorize_pages(domain, website_url, pages_data)
+            result["errors"].update(vectorized.pop("errors"))
+            result.update(vectorized)
+
+    return result
+
+def apply_website_data(website: Website, result: Dict, db: Session, stages: StageTimer, progress: ImportProgress = None):
+    """
+    Database half of enriching a website: store what was fetched and queue
+    deferred retries for the providers that failed
+    """
+    if "ahrefs" in result:
+        # Keep known metrics when Ahrefs has no data (or no API key) this time
+        if result["ahrefs"].get("dr") is not None:
+            website.dr = result["ahrefs"]["dr"]
+        if result["ahrefs"].get("traffic") is not None:
+            website.traffic = result["ahrefs"]["traffic"]
+        clear_retry(website.id, "ahrefs", db)
+        if progress:
+            progress.stage_done("ahrefs")
+
+    if "pages_data" in result:
+        pages_data = result["pages_data"]
+        vector_ids = result["vector_ids"]
+        if progress:
+            progress.stage_done("dataforseo")
+
+        # A refresh replaces the stored pages, unless it came back without any vectors
+        refreshing = website.keywords_data is not None
+        if pages_data and (vector_ids or not refreshing):
+            # Store pages and their interned keywords in database
+            with stages.stage("store_pages"):
+                if refreshing:
+                    replace_website_pages(website.id, vector_ids, db)
+                # DataForSEO returns one item per ranked keyword, several per page URL
+                pages_by_vector_id = {
+                    vector_service.make_vector_id(website.url, page_data["url"]): page_data
+                    for page_data in merge_page_items(pages_data)
+                }
+                stored_pages_data = [pages_by_vector_id[vector_id] for vector_id in vector_ids]
+                pages = [
+                    Page(
+                        website_id=website.id,
+                        url=page_data["url"],
+                        vector_id=vector_id
+                    )
+                    for page_data, vector_id in zip(stored_pages_data, vector_ids)
+                ]
+                db.add_all(pages)
+                db.flush()
+                store_page_keywords(pages, stored_pages_data, db)
+
+            website.keywords_data = {
+                "total_pages": len(pages_by_vector_id),
+                "vectorized_pages": len(vector_ids)
+            }
+            website.vector_ids = vector_ids
+            if progress:
+                progress.stage_done("vectorized")
+                progress.stage_done("pages", len(vector_ids))
+
+        clear_retry(website.id, "dataforseo", db)
+
+    for provider, error in result["errors"].items():
+        logger.warning(f"Deferring {provider} for {website.url}: {error}")
+        schedule_retry(website.id, provider, error, db)
+
+def _failed_result(provider: str, error: str) -> Dict:
+    return {"errors": {provider: error}}
+
+def use_dataforseo_tasks(website_count: int) -> bool:
+    """Whether to fetch DataForSEO data with the batched task flow instead of the live endpoint"""
+    mode = settings.DATAFORSEO_MODE
+    return mode == "tasks" or (mode == "auto" and website_count >= settings.DATAFORSEO_TASKS_MIN_WEBSITES)
+
+def run_enrichment(
+    jobs: List[EnrichmentJob],
+    db: Session,
+    stages: StageTimer,
+    on_done: Callable[[Website, str], None],
+    progress: ImportProgress = None
+):
+    """
+    Enrich websites with provider calls running concurrently in a thread pool.
+    Provider concurrency itself is governed by the shared rate limiters; the
+    pool only keeps enough requests in flight to use it.
+
+    For large runs DataForSEO data comes from the task flow instead of one
+    live request per website: its stream yields websites as their tasks
+    complete, and each is handed to the pool for embedding right away.
+
+    Once all results of a website are in, they are applied and committed on
+    this thread, one website at a time. on_done receives each website with
+    its outcome: processed, deferred or failed.
+    """
+    if not jobs:
+        return
+
+    workers = max(1, settings.IMPORT_WORKERS)
+    bulk_jobs = [index for index, job in enumerate(jobs) if "dataforseo" in job[3]]
+    use_tasks = use_dataforseo_tasks(len(bulk_jobs))
+    if not use_tasks:
+        bulk_jobs = []
 
-                if pages_data:
-                    # Step 3: Vectorize and store in Pinecone
-                    logger.info(f"Vectorizing keywords for {domain}")
-                    vector_ids = vector_service.store_vectors(url, pages_data)
-
-                    # Store pages in database
-                    for page_data, vector_id in zip(pages_data[:len(vector_ids)], vector_ids):
-                        page = Page(
-                            website_id=website.id,
-                            url=page_data["url"],
-                            keywords=page_data["keywords"],
-                            vector_id=vector_id
-                        )
-                        db.add(page)
-
-                    website.keywords_data = {
-                        "total_pages": len(pages_data),
-                        "vectorized_pages": len(vector_ids)
-                    }
-                    website.vector_ids = vector_ids
-
-                # Update import progress
-                import_record.processed_websites = idx + 1
-                db.commit()
-
-                logger.info(f"Processed website {idx + 1}/{len(websites_data)}: {url}")
+    # Results each website still waits for: its direct fetch and/or its task stream result
+    remaining = [0] * len(jobs)
+    for index, (_, _, _, providers) in enumerate(jobs):
+        if providers - ({"dataforseo"} if use_tasks else set()):
+            remaining[index] += 1
+    for index in bulk_jobs:
+        remaining[index] += 1
 
+    completed = queue.Queue()
+    # Bound the results held in memory while the database catches up
+    slots = threading.BoundedSemaphore(workers * 2)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        def submit(index: int, fn: Callable, *args):
+            slots.acquire()
+            future = executor.submit(fn, *args)
+            future.add_done_callback(lambda f: completed.put((index, f)))
+
+        def feed_websites():
+            for index, (_, domain, website_url, providers) in enumerate(jobs):
+                direct = providers - {"dataforseo"} if use_tasks else providers
+                if direct:
+                    submit(index, fetch_website_data, domain, website_url, direct, stages)
+
+        def feed_tasks():
+            index_by_domain = {jobs[index][1]: index for index in bulk_jobs}
+            try:
+                for domain, pages_data in dataforseo_service.stream_pages_keywords(list(index_by_domain)):
+                    index = index_by_domain.pop(domain, None)
+                    if index is None:
+                        continue
+                    if isinstance(pages_data, ProviderError):
+                        submit(index, _failed_result, "dataforseo", str(pages_data))
+                    else:
+                        submit(index, vectorize_pages, domain, jobs[index][2], pages_data)
             except Exception as e:
-                logger.error(f"Error processing website {website_data.get('url')}: {e}")
-                db.rollback()
+                logger.error(f"Error collecting DataForSEO tasks: {e}")
+            finally:
+                # Every website must get a result, or the import would wait forever
+                for index in index_by_domain.values():
+                    submit(index, _failed_result, "dataforseo", "DataForSEO task stream ended early")
+
+        feeders = [threading.Thread(target=feed_websites, daemon=True)]
+        if bulk_jobs:
+            feeders.append(threading.Thread(target=feed_tasks, daemon=True))
+        for feeder in feeders:
+            feeder.start()
+
+        # A website's results are merged and written together in one commit
+        partial: Dict[int, Dict] = {}
+        failed: Set[int] = set()
+        for _ in range(sum(remaining)):
+            index, future = completed.get()
+            slots.release()
+            remaining[index] -= 1
+            website = jobs[index][0]
+            try:
+                result = future.result()
+                merged = partial.setdefault(index, {"errors": {}})
+                merged["errors"].update(result.pop("errors"))
+                merged.update(result)
+            except Exception as e:
+                logger.error(f"Error fetching data for {jobs[index][2]}: {e}")
+                failed.add(index)
+            if remaining[index] > 0:
                 continue
 
+            result = partial.pop(index, None)
+            if index in failed:
+                failed.discard(index)
+                on_done(website, "failed")
+                continue
+
+            try:
+                apply_website_data(website, result, db, stages, progress)
+                with stages.stage("db_commit"):
+                    db.commit()
+                outcome = "deferred" if result["errors"] else "processed"
+            except Exception as e:
+                logger.error(f"Error processing website {website.url}: {e}")
+                db.rollback()
+                outcome = "failed"
+            on_done(website, outcome)
+
+        for feeder in feeders:
+            feeder.join()
+
+def process_website_data(websites_data: list, import_id: int, db: Session):
+    """
+    Background task to process imported websites:
+    1. Deduplicate by canonical domain against the CSV and existing websites
+    2. Get DR and traffic from Ahrefs
+    3. Get keywords from DataForSEO
+    4. Vectorize keywords with Pinecone
+    5. Store everything in database
+    Provider calls for several websites run concurrently; websites whose
+    provider calls fail are queued for a deferred retry.
+    """
+    import_record = None
+    progress = None
+    try:
+        import_record = db.query(Import).filter(Import.id == import_id).first()
+        stages = StageTimer(IMPORT_STAGE_SECONDS)
+
+        # Deduplicate before any paid provider call is made
+        unique_websites = deduplicate_websites(websites_data)
+        domains = list(unique_websites.keys())
+        urls = [_clean_url(unique_websites[domain]['url']) for domain in domains]
+        existing_websites = find_existing_websites(domains, urls, db)
+
+        progress = ImportProgress(import_id, len(unique_websites))
+
+        logger.info(
+            f"Import {import_id}: {len(websites_data)} rows, {len(unique_websites)} unique domains, "
+            f"{len(existing_websites)} already known"
+        )
+
+        # Create or update every website row up front, so a failure while
+        # enriching one website never rolls back another
+        jobs = []
+        skipped = 0
+        for domain, url in zip(domains, urls):
+            website_data = unique_websites[domain]
+            website = existing_websites.get(domain)
+            if website:
+                website.domain = domain
+                website.email = website_data['email']
+                website.price = website_data['price']
+
+                # Already enriched, nothing to fetch from the providers
+                if website.keywords_data is not None or website.dr is not None:
+                    skipped += 1
+                    continue
+            else:
+                website = Website(
+                    url=url,
+                    domain=domain,
+                    email=website_data['email'],
+                    price=website_data['price']
+                )
+                db.add(website)
+            jobs.append((website, domain, website.url, set(PROVIDERS)))
+
+        import_record.total_websites = len(unique_websites)
+        import_record.processed_websites = skipped
+        db.commit()
+
+        progress.publish(force=True)
+        for _ in range(skipped):
+            IMPORT_WEBSITES.labels(outcome="skipped").inc()
+            progress.website_done("skipped")
+        logger.info(f"Import {import_id}: skipped {skipped} known websites")
+
+        def on_done(website: Website, outcome: str):
+            import_record.processed_websites = progress.done + 1
+            IMPORT_WEBSITES.labels(outcome=outcome).inc()
+            progress.website_done(outcome)
+            logger.info(f"Website {progress.done}/{len(domains)} {outcome}: {website.url}")
+
+        run_enrichment(jobs, db, stages, on_done, progress)
+
         # Mark import as completed
+        import_record.processed_websites = progress.done
         import_record.status = "completed"
         import_record.completed_at = datetime.utcnow()
         db.commit()
+        progress.finish("completed")
 
         logger.info(f"Import {import_id} completed successfully")
 
     except Exception as e:
         logger.error(f"Fatal error in process_website_data: {e}")
+        db.rollback()
         if import_record:
             import_record.status = "failed"
-            db.commit()
\ No newline at end of file
+            db.commit()
+        if progress:
+            progress.finish("failed")
+
+def process_deferred_retries(limit: int = 100) -> Dict[str, int]:
+    """
+    Background task to retry provider calls that failed in earlier imports.
+    Only the providers that failed are called again.
+    Returns the number of websites per outcome.
+    """
+    db = SessionLocal()
+    try:
+        providers_by_website: Dict[int, Set[str]] = {}
+        for retry in due_retries(db, limit):
+            providers_by_website.setdefault(retry.website_id, set()).add(retry.provider)
+
+        if not providers_by_website:
+            return {}
+
+        websites = db.query(Website).filter(Website.id.in_(list(providers_by_website))).all()
+        jobs = [
+            (website, website.domain or canonical_domain(website.url), website.url, providers_by_website[website.id])
+            for website in websites
+        ]
+
+        outcomes: Dict[str, int] = {}
+
+        def on_done(website: Website, outcome: str):
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            IMPORT_WEBSITES.labels(outcome=f"retry_{outcome}").inc()
+
+        run_enrichment(jobs, db, StageTimer(IMPORT_STAGE_SECONDS), on_done)
+        logger.info(f"Deferred retries: {outcomes}")
+        return outcomes
+    except Exception as e:
+        logger.error(f"Error processing deferred retries: {e}")
+        db.rollback()
+        return {}
+    finally:
+        db.close()
\ No newline at end of file
@@ -1,16 +1,44 @@
 import requests
 import base64
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple, Union
 from app.core.config import settings
+from app.core.metrics import PROVIDER_ERRORS
+from app.services.rate_limiter import get_provider_client, provider_timeout, ProviderError
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Task status codes DataForSEO returns inside a 200 response
+TASK_CREATED_STATUS = 20100
+NO_RESULTS_STATUS = 40102
+RATE_LIMITED_STATUS = 40202
+
+SERP_PATH = "/serp/google/organic"
+
+# DataForSEO limits: 100 tasks per task_post request, 1000 items per task
+TASKS_PER_POST = 100
+PAGE_SIZE = 1000
+
+# Concurrent task_get requests while collecting results
+TASK_GET_WORKERS = 8
+
 class DataForSEOService:
     def __init__(self):
         self.login = settings.DATAFORSEO_LOGIN
         self.password = settings.DATAFORSEO_PASSWORD
-        self.base_url = "https://api.dataforseo.com/v3"
+        self.base_url = settings.DATAFORSEO_BASE_URL.rstrip("/")
+        self._session = None
+        self.client = get_provider_client("dataforseo")
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session, created on first use and reused for connection pooling"""
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
 
     def _get_auth_header(self):
         if not self.login or not self.password:
@@ -19,59 +47,239 @@ class DataForSEOService:
         encoded = base64.b64encode(credentials.encode()).decode()
         return {"Authorization": f"Basic {encoded}"}
 
-    def get_website_pages_keywords(self, domain: str, limit: int = 1000) -> List[Dict[str, any]]:
+    def _request(self, method: str, path: str, headers: Dict, payload: List[Dict] = None) -> Dict:
+        """
+        Send a request through the shared DataForSEO limiter
+        Returns the JSON body; raises ProviderError when the request failed
+        """
+        url = f"{self.base_url}{path}"
+        if method == "POST":
+            response = self.client.request(lambda: self.session.post(url, json=payload, headers=headers, timeout=provider_timeout()))
+        else:
+            response = self.client.request(lambda: self.session.get(url, headers=headers, timeout=provider_timeout()))
+
+        if response.status_code != 200:
+            logger.error(f"DataForSEO API error: {response.status_code}")
+            PROVIDER_ERRORS.labels(provider="dataforseo", kind=f"http_{response.status_code}").inc()
+            raise ProviderError("dataforseo", f"HTTP {response.status_code} for {path}", response.status_code)
+
+        try:
+            return response.json()
+        except ValueError as e:
+            PROVIDER_ERRORS.labels(provider="dataforseo", kind=type(e).__name__).inc()
+            raise ProviderError("dataforseo", f"Invalid response for {path}: {e}")
+
+    def _task_payload(self, domain: str, offset: int, limit: int) -> Dict:
+        return {
+            "domain": domain,
+            "limit": limit,
+            "offset": offset,
+            "include_subdomains": True,
+            "load_rank_absolute": True,
+            "filters": ["rank_absolute", "<=", 100],
+            "tag": domain
+        }
+
+    def _task_pages(self, task: Dict, domain: str, generation: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """
+        Pages of a finished task and the total number of items available
+        `generation` is the limiter generation read before the request, see AdaptiveLimiter
+        """
+        self._check_task_status(task, domain, generation)
+
+        pages_data = []
+        total_count = 0
+        if task.get("result") and len(task["result"]) > 0:
+            result = task["result"][0] or {}
+            total_count = result.get("total_count") or 0
+
+            for item in result.get("items") or []:
+                page_info = {
+                    "url": item.get("url"),
+                    "keywords": self._extract_keywords(item),
+                    "position": item.get("rank_absolute"),
+                    "search_volume": item.get("keyword_data", {}).get("search_volume")
+                }
+                pages_data.append(page_info)
+
+        return pages_data, total_count
+
+    def get_website_pages_keywords(self, domain: str, limit: Optional[int] = None) -> List[Dict[str, any]]:
         """
-        Extract up to 1000 pages and their keywords from DataForSEO
+        Extract pages and their keywords from DataForSEO with the live endpoint,
+        paging past 1000 items up to `limit` (DATAFORSEO_MAX_ITEMS by default)
+        Raises ProviderError when DataForSEO could not be reached or kept throttling
         """
         headers = self._get_auth_header()
         if not headers:
             logger.warning("DataForSEO credentials not configured")
             return []
 
-        try:
-            # Get pages ranking data
-            endpoint = f"{self.base_url}/serp/google/organic/live/regular"
-
-            payload = [{
-                "domain": domain,
-                "limit": limit,
-                "include_subdomains": True,
-                "load_rank_absolute": True,
-                "filters": ["rank_absolute", "<=", 100]
-            }]
-
-            response = requests.post(
-                endpoint,
-                json=payload,
-                headers=headers
+        limit = limit or settings.DATAFORSEO_MAX_ITEMS
+        pages_data = []
+        offset = 0
+        while offset < limit:
+            page_limit = min(PAGE_SIZE, limit - offset)
+            generation = self.client.limiter.generation
+            data = self._request(
+                "POST",
+                f"{SERP_PATH}/live/regular",
+                headers,
+                [self._task_payload(domain, offset, page_limit)]
             )
+            if not data.get("tasks"):
+                break
+
+            items, total_count = self._task_pages(data["tasks"][0], domain, generation)
+            pages_data.extend(items)
+            offset += page_limit
+            if len(items) < page_limit or offset >= total_count:
+                break
 
-            if response.status_code != 200:
-                logger.error(f"DataForSEO API error: {response.status_code}")
-                return []
+        return pages_data
 
-            data = response.json()
-            pages_data = []
+    def stream_pages_keywords(
+        self,
+        domains: List[str],
+        limit: Optional[int] = None
+    ) -> Iterator[Tuple[str, Union[List[Dict], ProviderError]]]:
+        """
+        Fetch pages and keywords for many domains with the task flow:
+        task_post (100 tasks per request) -> poll tasks_ready -> task_get.
+        Yields (domain, pages) as soon as all pages of a domain are collected,
+        or (domain, ProviderError) when its tasks failed, so callers can start
+        embedding early domains while later ones are still queued.
+        Domains with more than 1000 items get follow-up tasks at higher offsets.
+        """
+        domains = list(dict.fromkeys(domains))
+        headers = self._get_auth_header()
+        if not headers:
+            logger.warning("DataForSEO credentials not configured")
+            for domain in domains:
+                yield domain, []
+            return
 
-            if data.get("tasks") and len(data["tasks"]) > 0:
-                task = data["tasks"][0]
-                if task.get("result") and len(task["result"]) > 0:
-                    items = task["result"][0].get("items", [])
+        limit = limit or settings.DATAFORSEO_MAX_ITEMS
 
-                    for item in items[:limit]:
-                        page_info = {
-                            "url": item.get("url"),
-                            "keywords": self._extract_keywords(item),
-                            "position": item.get("rank_absolute"),
-                            "search_volume": item.get("keyword_data", {}).get("search_volume")
-                        }
-                        pages_data.append(page_info)
+        # (domain, offset, limit) tasks waiting to be posted
+        to_post = deque((domain, 0, min(PAGE_SIZE, limit)) for domain in domains)
+        # task id -> (domain, offset) for posted tasks
+        posted: Dict[str, Tuple[str, int]] = {}
+        # Pages collected so far and tasks still open per domain
+        collected: Dict[str, List[Dict]] = {domain: [] for domain in domains}
+        open_tasks: Dict[str, int] = {domain: 1 for domain in domains}
 
-            return pages_data
+        def fail(domain: str, error: ProviderError) -> Tuple[str, ProviderError]:
+            collected.pop(domain, None)
+            open_tasks.pop(domain, None)
+            return domain, error
 
-        except Exception as e:
-            logger.error(f"Error fetching DataForSEO data for {domain}: {e}")
-            return []
+        last_progress = time.monotonic()
+        with ThreadPoolExecutor(max_workers=TASK_GET_WORKERS) as executor:
+            while open_tasks:
+                # Post queued tasks, 100 per request
+                while to_post:
+                    chunk = [to_post.popleft() for _ in range(min(TASKS_PER_POST, len(to_post)))]
+                    try:
+                        data = self._request(
+                            "POST",
+                            f"{SERP_PATH}/task_post",
+                            headers,
+                            [self._task_payload(domain, offset, page_limit) for domain, offset, page_limit in chunk]
+                        )
+                    except ProviderError as e:
+                        for domain in dict.fromkeys(domain for domain, _, _ in chunk):
+                            if domain in open_tasks:
+                                yield fail(domain, e)
+                        continue
+
+                    tasks = data.get("tasks") or []
+                    for index, (domain, offset, _) in enumerate(chunk):
+                        task = tasks[index] if index < len(tasks) else {}
+                        if domain not in open_tasks:
+                            continue
+                        if task.get("status_code") != TASK_CREATED_STATUS or not task.get("id"):
+                            PROVIDER_ERRORS.labels(provider="dataforseo", kind=f"task_{task.get('status_code')}").inc()
+                            yield fail(domain, ProviderError(
+                                "dataforseo",
+                                f"Task not created for {domain}: {task.get('status_message')}"
+                            ))
+                            continue
+                        posted[task["id"]] = (domain, offset)
+                    last_progress = time.monotonic()
+
+                if not open_tasks:
+                    break
+
+                # Collect whichever of our tasks are ready
+                try:
+                    data = self._request("GET", f"{SERP_PATH}/tasks_ready", headers)
+                    ready_ids = [
+                        ready["id"]
+                        for task in data.get("tasks") or []
+                        for ready in task.get("result") or []
+                        if ready.get("id") in posted
+                    ]
+                except ProviderError as e:
+                    logger.warning(f"Error polling DataForSEO tasks: {e}")
+                    ready_ids = []
+
+                if not ready_ids:
+                    if time.monotonic() - last_progress > settings.DATAFORSEO_TASK_TIMEOUT_SECONDS:
+                        error = ProviderError("dataforseo", "Timed out waiting for tasks")
+                        for domain in list(open_tasks):
+                            yield fail(domain, error)
+                        break
+                    time.sleep(settings.DATAFORSEO_POLL_INTERVAL_SECONDS)
+                    continue
+
+                generation = self.client.limiter.generation
+                futures = {
+                    task_id: executor.submit(self._request, "GET", f"{SERP_PATH}/task_get/regular/{task_id}", headers)
+                    for task_id in ready_ids
+                }
+                for task_id, future in futures.items():
+                    domain, offset = posted.pop(task_id)
+                    if domain not in open_tasks:
+                        continue
+
+                    try:
+                        tasks = future.result().get("tasks") or []
+                        if not tasks:
+                            raise ProviderError("dataforseo", f"Empty task result for {domain}")
+                        items, total_count = self._task_pages(tasks[0], domain, generation)
+                    except ProviderError as e:
+                        yield fail(domain, e)
+                        continue
+
+                    collected[domain].extend(items)
+                    open_tasks[domain] -= 1
+
+                    # The first page tells how many items exist; queue the rest
+                    if offset == 0:
+                        for next_offset in range(PAGE_SIZE, min(total_count, limit), PAGE_SIZE):
+                            to_post.append((domain, next_offset, min(PAGE_SIZE, limit - next_offset)))
+                            open_tasks[domain] += 1
+
+                    if open_tasks[domain] == 0:
+                        del open_tasks[domain]
+                        yield domain, collected.pop(domain)
+
+                last_progress = time.monotonic()
+
+    def _check_task_status(self, task: Dict, domain: str, generation: Optional[int] = None):
+        """
+        DataForSEO reports task errors in the body of a 200 response;
+        raise ProviderError for those so the domain is retried rather than stored empty
+        """
+        status_code = task.get("status_code")
+        if not status_code or status_code < 40000 or status_code == NO_RESULTS_STATUS:
+            return
+
+        if status_code == RATE_LIMITED_STATUS:
+            self.client.limiter.on_throttle(generation=generation)
+        PROVIDER_ERRORS.labels(provider="dataforseo", kind=f"task_{status_code}").inc()
+        raise ProviderError("dataforseo", f"Task error {status_code} for {domain}: {task.get('status_message')}")
 
     def _extract_keywords(self, item: Dict) -> List[str]:
         """
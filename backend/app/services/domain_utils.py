@@ -0,0 +1,37 @@
+from typing import Optional
+from urllib.parse import urlsplit
+
+def canonical_domain(url: str) -> Optional[str]:
+    """
+    Normalize a URL or bare domain to a canonical domain key.
+    Scheme, credentials, port, path, trailing dots and a leading "www." are
+    dropped and internationalized names are converted to punycode, so
+    "http://www.Example.com/", "example.com/blog" and "https://example.com"
+    all map to "example.com".
+    Returns None if no valid host can be extracted.
+    """
+    if not url:
+        return None
+
+    url = url.strip()
+    if "://" not in url:
+        url = f"//{url.lstrip('/')}"
+
+    try:
+        hostname = urlsplit(url).hostname
+    except ValueError:
+        return None
+
+    if not hostname:
+        return None
+
+    hostname = hostname.rstrip(".")
+    if hostname.startswith("www."):
+        hostname = hostname[4:]
+
+    try:
+        hostname = hostname.encode("idna").decode("ascii").lower()
+    except UnicodeError:
+        return None
+
+    return hostname or None
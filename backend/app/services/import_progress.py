@@ -0,0 +1,261 @@
+from typing import Callable, Dict, Optional, AsyncIterator, Set, Tuple
+from app.core.config import settings
+import asyncio
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Keep the latest progress around long enough for late watchers
+LATEST_TTL_SECONDS = 24 * 60 * 60
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+def _channel(import_id: int) -> str:
+    return f"import-progress:{import_id}"
+
+class MemoryProgressBroker:
+    """
+    In-process pub/sub for import progress.
+    Workers publish from background threads; watchers wait on an asyncio.Event
+    per connection and read the latest snapshot, so a slow watcher only ever
+    sees coalesced state instead of a growing queue.
+    Only sees imports running in the same process; snapshots of finished
+    imports are dropped after PROGRESS_TERMINAL_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self._latest: Dict[int, dict] = {}
+        self._finished_at: Dict[int, float] = {}
+        self._watchers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, import_id: int, event: dict):
+        with self._lock:
+            self._latest[import_id] = event
+            if event.get("status") in TERMINAL_STATUSES:
+                self._finished_at[import_id] = time.monotonic()
+            self._prune()
+            watchers = list(self._watchers.get(import_id, ()))
+
+        for loop, changed in watchers:
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                # Event loop already closed, the watcher is gone
+                pass
+
+    def _prune(self):
+        """Drop snapshots of imports finished longer than the TTL ago; the database has their final state"""
+        cutoff = time.monotonic() - settings.PROGRESS_TERMINAL_TTL_SECONDS
+        for import_id, finished_at in list(self._finished_at.items()):
+            if finished_at < cutoff:
+                del self._finished_at[import_id]
+                self._latest.pop(import_id, None)
+
+    def latest(self, import_id: int) -> Optional[dict]:
+        with self._lock:
+            self._prune()
+            return self._latest.get(import_id)
+
+    async def subscribe(self, import_id: int) -> AsyncIterator[Optional[dict]]:
+        """
+        Yield the current snapshot (None if unknown), then each new snapshot,
+        or None when nothing changed within the keepalive interval
+        """
+        watcher = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._watchers.setdefault(import_id, set()).add(watcher)
+
+        try:
+            # Current state first, registered before reading so no update is lost
+            yield self.latest(import_id)
+            while True:
+                try:
+                    await asyncio.wait_for(watcher[1].wait(), timeout=settings.PROGRESS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                watcher[1].clear()
+                yield self.latest(import_id)
+        finally:
+            with self._lock:
+                watchers = self._watchers.get(import_id)
+                if watchers is not None:
+                    watchers.discard(watcher)
+                    if not watchers:
+                        del self._watchers[import_id]
+
+class RedisProgressBroker:
+    """
+    Redis pub/sub for import progress, for deployments with several workers.
+    The latest snapshot is also stored under a key so watchers that connect
+    mid-import get the current state immediately.
+    """
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def publish(self, import_id: int, event: dict):
+        payload = json.dumps(event)
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(f"{_channel(import_id)}:latest", payload, ex=LATEST_TTL_SECONDS)
+            pipe.publish(_channel(import_id), payload)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error publishing progress for import {import_id}: {e}")
+
+    def latest(self, import_id: int) -> Optional[dict]:
+        try:
+            payload = self.client.get(f"{_channel(import_id)}:latest")
+        except Exception as e:
+            logger.error(f"Error reading progress for import {import_id}: {e}")
+            return None
+        return json.loads(payload) if payload else None
+
+    async def subscribe(self, import_id: int) -> AsyncIterator[Optional[dict]]:
+        """
+        Yield the current snapshot (None if unknown), then each new snapshot,
+        or None when nothing changed within the keepalive interval
+        """
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.redis_url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(_channel(import_id))
+        try:
+            # Current state first, read after subscribing so no update is lost
+            payload = await client.get(f"{_channel(import_id)}:latest")
+            yield json.loads(payload) if payload else None
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=settings.PROGRESS_KEEPALIVE_SECONDS
+                )
+                yield json.loads(message["data"]) if message else None
+        finally:
+            await pubsub.unsubscribe(_channel(import_id))
+            await pubsub.close()
+            await client.close()
+
+class ImportStatusPoller:
+    """
+    Import status from the database for streams that got no update within
+    the keepalive interval. All streams of an import in this process share
+    one query per PROGRESS_KEEPALIVE_SECONDS, however many are watching.
+    """
+
+    def __init__(self, load: Callable[[int], Optional[dict]]):
+        self._load = load
+        self._results: Dict[int, Tuple[float, Optional[dict]]] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+
+    def _done(self, import_id: int, future: asyncio.Future):
+        self._pending.pop(import_id, None)
+        if not future.cancelled() and future.exception() is None:
+            self._results[import_id] = (time.monotonic(), future.result())
+
+    async def status(self, import_id: int) -> Optional[dict]:
+        cutoff = time.monotonic() - settings.PROGRESS_KEEPALIVE_SECONDS
+        for polled_id, (polled_at, _) in list(self._results.items()):
+            if polled_at < cutoff:
+                del self._results[polled_id]
+        if import_id in self._results:
+            return self._results[import_id][1]
+
+        pending = self._pending.get(import_id)
+        if pending is None:
+            pending = asyncio.ensure_future(asyncio.to_thread(self._load, import_id))
+            pending.add_done_callback(lambda future: self._done(import_id, future))
+            self._pending[import_id] = pending
+        # Shielded, so a watcher disconnecting does not cancel the query for the others
+        return await asyncio.shield(pending)
+
+def _create_broker():
+    if settings.PROGRESS_BACKEND == "redis":
+        return RedisProgressBroker(settings.REDIS_URL)
+    return MemoryProgressBroker()
+
+progress_broker = _create_broker()
+
+class ImportProgress:
+    """
+    Progress of one running import, published to watchers as it changes.
+    Publishing is throttled so large imports do not flood the channel;
+    terminal states are always published.
+    """
+
+    def __init__(self, import_id: int, total_websites: int, broker=None):
+        self.import_id = import_id
+        self.total_websites = total_websites
+        self.broker = broker or progress_broker
+        self.status = "processing"
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.deferred = 0
+        self.stages: Dict[str, int] = {}
+        self._started = time.monotonic()
+        self._last_published = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.processed + self.skipped + self.failed + self.deferred
+
+    def stage_done(self, stage: str, count: int = 1):
+        self.stages[stage] = self.stages.get(stage, 0) + count
+
+    def website_done(self, outcome: str):
+        """Record a website as processed, skipped, failed or deferred for retry"""
+        if outcome == "skipped":
+            self.skipped += 1
+        elif outcome == "failed":
+            self.failed += 1
+        elif outcome == "deferred":
+            self.deferred += 1
+        else:
+            self.processed += 1
+        self.publish()
+
+    def finish(self, status: str):
+        self.status = status
+        self.publish(force=True)
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self._started
+        remaining = max(self.total_websites - self.done, 0)
+        eta_seconds = None
+        if self.done and self.status not in TERMINAL_STATUSES:
+            eta_seconds = round(elapsed / self.done * remaining, 1)
+
+        return {
+            "import_id": self.import_id,
+            "status": self.status,
+            "total_websites": self.total_websites,
+            "processed_websites": self.done,
+            "succeeded": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "deferred": self.deferred,
+            "stages": dict(self.stages),
+            "elapsed_seconds": round(elapsed, 1),
+            "eta_seconds": eta_seconds
+        }
+
+    def publish(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_published < settings.PROGRESS_PUBLISH_INTERVAL_SECONDS:
+            return
+        self._last_published = now
+        self.broker.publish(self.import_id, self.snapshot())
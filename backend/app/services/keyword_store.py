@@ -0,0 +1,239 @@
+from sqlalchemy import false, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
+from typing import List, Dict, Iterable, Optional
+from app.models.models import Keyword, PageKeyword, Page, Website
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK_SIZE = 500
+
+def normalize_keyword(text: str) -> str:
+    """Lowercase and collapse whitespace so equal keywords intern to one row"""
+    return " ".join(text.lower().split())
+
+def _insert_new_keywords(texts: List[str], db: Session):
+    """
+    Insert keyword texts, skipping ones another import inserted meanwhile
+    (ON CONFLICT DO NOTHING where the dialect has it)
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(dialect_insert(Keyword).on_conflict_do_nothing(index_elements=["text"]), [{"text": text} for text in texts])
+        return
+
+    for text in texts:
+        try:
+            with db.begin_nested():
+                db.execute(insert(Keyword), [{"text": text}])
+        except IntegrityError:
+            pass
+
+def intern_keywords(texts: Iterable[str], db: Session) -> Dict[str, int]:
+    """
+    Map keyword texts to keyword IDs, inserting the ones not seen before
+    """
+    normalized = list(dict.fromkeys(normalize_keyword(t) for t in texts if t and t.strip()))
+
+    keyword_ids = {}
+    for start in range(0, len(normalized), LOOKUP_CHUNK_SIZE):
+        chunk = normalized[start:start + LOOKUP_CHUNK_SIZE]
+        for keyword_id, text in db.query(Keyword.id, Keyword.text).filter(Keyword.text.in_(chunk)):
+            keyword_ids[text] = keyword_id
+
+    # Sorted, so concurrent imports lock the unique index in the same order
+    missing = sorted(text for text in normalized if text not in keyword_ids)
+    if missing:
+        _insert_new_keywords(missing, db)
+        for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+            chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+            for keyword_id, text in db.query(Keyword.id, Keyword.text).filter(Keyword.text.in_(chunk)):
+                keyword_ids[text] = keyword_id
+
+    return keyword_ids
+
+def _merge_metrics(target: Dict, position: Optional[int], search_volume: Optional[int]):
+    """Keep the best (lowest) position and the highest search volume"""
+    if position is not None and (target["position"] is None or position < target["position"]):
+        target["position"] = position
+    if search_volume is not None and (target["search_volume"] is None or search_volume > target["search_volume"]):
+        target["search_volume"] = search_volume
+
+def merge_page_items(pages_data: List[Dict]) -> List[Dict]:
+    """
+    Merge DataForSEO items of the same page URL into one page with the union
+    of their keywords, in first-seen order.
+    An item's position and search volume belong to its main (first) keyword;
+    "keyword_metrics" keeps them per normalized keyword, with the best
+    position and highest volume when several items rank for the same keyword.
+    The page's own position and search volume are the best over its items.
+    """
+    pages: Dict[Optional[str], Dict] = {}
+    for item in pages_data:
+        page = pages.setdefault(item.get("url"), {
+            "url": item.get("url"),
+            "keywords": [],
+            "position": None,
+            "search_volume": None,
+            "keyword_metrics": {}
+        })
+        for idx, keyword in enumerate(item.get("keywords") or []):
+            normalized = normalize_keyword(keyword)
+            if not normalized:
+                continue
+            metrics = page["keyword_metrics"].get(normalized)
+            if metrics is None:
+                metrics = page["keyword_metrics"][normalized] = {"position": None, "search_volume": None}
+                page["keywords"].append(keyword)
+            if idx == 0:
+                _merge_metrics(metrics, item.get("position"), item.get("search_volume"))
+        _merge_metrics(page, item.get("position"), item.get("search_volume"))
+    return list(pages.values())
+
+def store_page_keywords(pages: List[Page], pages_data: List[Dict], db: Session):
+    """
+    Link stored pages to their interned keywords, with the position and
+    search volume of each keyword (see merge_page_items). Pages not merged
+    yet count as a single item: their main keyword carries the metrics.
+    """
+    keyword_ids = intern_keywords(
+        (keyword for page_data in pages_data for keyword in page_data.get("keywords") or []),
+        db
+    )
+
+    rows = []
+    for page, page_data in zip(pages, pages_data):
+        if "keyword_metrics" not in page_data:
+            page_data = merge_page_items([page_data])[0]
+        seen = set()
+        for keyword in page_data["keywords"]:
+            normalized = normalize_keyword(keyword)
+            keyword_id = keyword_ids.get(normalized)
+            if keyword_id is None or keyword_id in seen:
+                continue
+            seen.add(keyword_id)
+            metrics = page_data["keyword_metrics"][normalized]
+            rows.append({
+                "page_id": page.id,
+                "keyword_id": keyword_id,
+                "website_id": page.website_id,
+                "position": metrics["position"],
+                "search_volume": metrics["search_volume"]
+            })
+
+    if rows:
+        db.execute(insert(PageKeyword), rows)
+
+def get_page_keywords(page_ids: List[int], db: Session) -> Dict[int, List[str]]:
+    """Keywords per page, main keyword first"""
+    if not page_ids:
+        return {}
+
+    rows = db.query(PageKeyword.page_id, Keyword.text).join(
+        Keyword, Keyword.id == PageKeyword.keyword_id
+    ).filter(
+        PageKeyword.page_id.in_(page_ids)
+    ).order_by(PageKeyword.page_id, PageKeyword.position.is_(None), Keyword.id)
+
+    keywords: Dict[int, List[str]] = {}
+    for page_id, text in rows:
+        keywords.setdefault(page_id, []).append(text)
+    return keywords
+
+def get_keywords_by_vector_ids(vector_ids: List[str], db: Session) -> Dict[str, List[str]]:
+    """Keywords per Pinecone vector ID, main keyword first"""
+    if not vector_ids:
+        return {}
+
+    rows = db.query(Page.vector_id, Keyword.text).join(
+        PageKeyword, PageKeyword.page_id == Page.id
+    ).join(
+        Keyword, Keyword.id == PageKeyword.keyword_id
+    ).filter(
+        Page.vector_id.in_(vector_ids)
+    ).order_by(Page.vector_id, PageKeyword.position.is_(None), Keyword.id)
+
+    keywords: Dict[str, List[str]] = {}
+    for vector_id, text in rows:
+        keywords.setdefault(vector_id, []).append(text)
+    return keywords
+
+def get_top_keywords(website_ids: List[int], db: Session, limit: int = 10) -> Dict[int, List[str]]:
+    """
+    Top keywords per website from one grouped query,
+    ranked by number of pages ranking for the keyword, then search volume
+    """
+    if not website_ids:
+        return {}
+
+    page_count = func.count(PageKeyword.page_id)
+    total_volume = func.coalesce(func.sum(PageKeyword.search_volume), 0)
+    grouped = db.query(
+        PageKeyword.website_id.label("website_id"),
+        PageKeyword.keyword_id.label("keyword_id"),
+        func.row_number().over(
+            partition_by=PageKeyword.website_id,
+            order_by=(page_count.desc(), total_volume.desc(), PageKeyword.keyword_id)
+        ).label("rank")
+    ).filter(
+        PageKeyword.website_id.in_(website_ids)
+    ).group_by(PageKeyword.website_id, PageKeyword.keyword_id).subquery()
+
+    rows = db.query(grouped.c.website_id, Keyword.text).join(
+        Keyword, Keyword.id == grouped.c.keyword_id
+    ).filter(
+        grouped.c.rank <= limit
+    ).order_by(grouped.c.website_id, grouped.c.rank)
+
+    top_keywords: Dict[int, List[str]] = {}
+    for website_id, text in rows:
+        top_keywords.setdefault(website_id, []).append(text)
+    return top_keywords
+
+def _keyword_id(keyword: str, db: Session) -> Optional[int]:
+    return db.query(Keyword.id).filter(Keyword.text == normalize_keyword(keyword)).scalar()
+
+def filter_by_keyword(query: Query, keyword: str, db: Session) -> Query:
+    """
+    Restrict a Website query to websites with a page ranking for the keyword,
+    through the (keyword_id, website_id) index like find_websites_by_keyword
+    """
+    keyword_id = _keyword_id(keyword, db)
+    if keyword_id is None:
+        return query.filter(false())
+    return query.filter(
+        Website.id.in_(select(PageKeyword.website_id).where(PageKeyword.keyword_id == keyword_id))
+    )
+
+def find_websites_by_keyword(keyword: str, db: Session, limit: int = 100) -> List[Dict]:
+    """
+    Websites ranking for a keyword, best position first.
+    Uses the (keyword_id, website_id) index instead of scanning pages.
+    """
+    keyword_id = _keyword_id(keyword, db)
+    if keyword_id is None:
+        return []
+
+    rows = db.query(
+        PageKeyword.website_id,
+        func.min(PageKeyword.position),
+        func.max(PageKeyword.search_volume),
+        func.count(PageKeyword.page_id)
+    ).filter(
+        PageKeyword.keyword_id == keyword_id
+    ).group_by(PageKeyword.website_id).order_by(
+        func.min(PageKeyword.position).is_(None), func.min(PageKeyword.position)
+    ).limit(limit)
+
+    return [
+        {
+            "website_id": website_id,
+            "best_position": best_position,
+            "search_volume": search_volume,
+            "pages": pages
+        }
+        for website_id, best_position, search_volume, pages in rows
+    ]
@@ -0,0 +1,292 @@
+from typing import Callable, Dict, Optional, Any, Tuple
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.core.metrics import PROVIDER_ERRORS, PROVIDER_RETRIES
+import logging
+import random
+import requests
+import sys
+import threading
+import time
+import urllib3
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean "slow down" rather than "this request is wrong"
+THROTTLE_STATUSES = (429, 503)
+
+# Connection failures and timeouts of requests, urllib3 (Pinecone) and the standard library
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    urllib3.exceptions.MaxRetryError,
+    urllib3.exceptions.ProtocolError,
+    urllib3.exceptions.TimeoutError,
+    ConnectionError,
+    TimeoutError
+)
+
+def provider_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout for HTTP requests to providers"""
+    return (settings.PROVIDER_CONNECT_TIMEOUT_SECONDS, settings.PROVIDER_READ_TIMEOUT_SECONDS)
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an exception is a connection failure or timeout, worth retrying"""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    # The OpenAI SDK is imported lazily; APITimeoutError subclasses APIConnectionError
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(error, openai.APIConnectionError)
+
+class ProviderError(Exception):
+    """
+    An external provider call failed after retries.
+    Unlike an empty result, this means the data is missing and should be retried later.
+    """
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header as seconds; accepts delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveLimiter:
+    """
+    Client-side concurrency limiter using AIMD:
+    the allowed concurrency grows by one after a full window of successes and
+    is cut multiplicatively on throttling, at most once per window: throttles
+    of requests started before the last cut are already accounted for.
+    Retry-After pauses all new calls to the provider until the given time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        decrease_factor: float = 0.5
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._successes = 0
+        # Incremented on every decrease; requests remember the one they started in
+        self.generation = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> int:
+        """Wait for a free slot; returns the generation to pass to on_throttle"""
+        with self._condition:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return self.generation
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= int(self.limit):
+                self._successes = 0
+                if self.limit < self.max_limit:
+                    self.limit += 1
+                    self._condition.notify()
+
+    def on_throttle(self, retry_after: Optional[float] = None, generation: Optional[int] = None):
+        with self._condition:
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            if generation is not None and generation < self.generation:
+                # Sent before the last decrease, which already reacted to this burst
+                return
+            self.generation += 1
+            self._successes = 0
+            self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+            logger.warning(
+                f"{self.name} throttled: concurrency limit now {int(self.limit)}"
+                + (f", pausing {retry_after:.1f}s" if retry_after else "")
+            )
+
+    @contextmanager
+    def slot(self):
+        generation = self.acquire()
+        try:
+            yield generation
+        finally:
+            self.release()
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of requests, so an outage cannot multiply
+    traffic to a struggling provider. Every request earns `ratio` retry
+    tokens, plus a small time-based allowance so low-volume callers can
+    still retry; tokens are capped at `max_tokens`.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 2.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, amount: float = 0.0):
+        now = time.monotonic()
+        amount += (now - self._refilled_at) * self.min_per_second
+        self._refilled_at = now
+        self.tokens = min(self.max_tokens, self.tokens + amount)
+
+    def deposit(self):
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class ProviderClient:
+    """
+    Wraps calls to one external provider with the adaptive limiter,
+    jittered exponential backoff and the retry budget
+    """
+
+    def __init__(self, name: str, limiter: AdaptiveLimiter, budget: RetryBudget):
+        self.name = name
+        self.limiter = limiter
+        self.budget = budget
+        self.max_attempts = settings.PROVIDER_MAX_ATTEMPTS
+        self.backoff_base = settings.PROVIDER_BACKOFF_BASE_SECONDS
+        self.backoff_max = settings.PROVIDER_BACKOFF_MAX_SECONDS
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+
+    def _retry_or_raise(self, attempt: int, retry_after: Optional[float], message: str, status_code: Optional[int]):
+        if attempt + 1 >= self.max_attempts:
+            raise ProviderError(self.name, f"{message} after {attempt + 1} attempts", status_code)
+        if not self.budget.withdraw():
+            raise ProviderError(self.name, f"{message}, retry budget exhausted", status_code)
+        PROVIDER_RETRIES.labels(provider=self.name).inc()
+        time.sleep(self._backoff(attempt, retry_after))
+
+    def request(self, send: Callable[[], Any]) -> Any:
+        """
+        Send an HTTP request (a callable returning a requests.Response).
+        Returns the response for success and non-retryable client errors;
+        raises ProviderError once throttling, server or connection errors
+        exhaust the retries. Other exceptions are raised as-is.
+        """
+        self.budget.deposit()
+        for attempt in range(self.max_attempts):
+            retry_after = None
+            with self.limiter.slot() as generation:
+                try:
+                    response = send()
+                except Exception as e:
+                    PROVIDER_ERRORS.labels(provider=self.name, kind=type(e).__name__).inc()
+                    if not is_transient_error(e):
+                        raise
+                    message, status_code = f"{type(e).__name__}: {e}", None
+                else:
+                    status_code = response.status_code
+                    if status_code in THROTTLE_STATUSES:
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        self.limiter.on_throttle(retry_after, generation)
+                    elif status_code < 500:
+                        self.limiter.on_success()
+                        return response
+                    PROVIDER_ERRORS.labels(provider=self.name, kind=f"http_{status_code}").inc()
+                    message = f"HTTP {status_code}"
+
+            self._retry_or_raise(attempt, retry_after, message, status_code)
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Call an SDK method (OpenAI, Pinecone). Exceptions carrying a 429/503
+        status (status_code or status attribute) count as throttling, other
+        5xx, connection errors and timeouts are retried, anything else
+        (including programming errors) is raised as-is.
+        """
+        self.budget.deposit()
+        for attempt in range(self.max_attempts):
+            retry_after = None
+            with self.limiter.slot() as generation:
+                try:
+                    result = fn()
+                except Exception as e:
+                    status_code = getattr(e, "status_code", None) or getattr(e, "status", None)
+                    if not isinstance(status_code, int):
+                        status_code = None
+                    PROVIDER_ERRORS.labels(
+                        provider=self.name,
+                        kind=f"http_{status_code}" if status_code else type(e).__name__
+                    ).inc()
+
+                    if status_code in THROTTLE_STATUSES:
+                        response = getattr(e, "response", None)
+                        headers = getattr(response, "headers", None) or getattr(e, "headers", None) or {}
+                        retry_after = parse_retry_after(headers.get("Retry-After") or headers.get("retry-after"))
+                        self.limiter.on_throttle(retry_after, generation)
+                    elif status_code is None and not is_transient_error(e):
+                        raise
+                    elif status_code is not None and status_code < 500:
+                        raise
+                    message = f"{type(e).__name__}: {e}"
+                else:
+                    self.limiter.on_success()
+                    return result
+
+            self._retry_or_raise(attempt, retry_after, message, status_code)
+
+_clients: Dict[str, ProviderClient] = {}
+_clients_lock = threading.Lock()
+
+def get_provider_client(name: str) -> ProviderClient:
+    """Shared ProviderClient per provider, so all callers in the process share its limits"""
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = ProviderClient(
+                name,
+                AdaptiveLimiter(
+                    name,
+                    initial_limit=settings.PROVIDER_INITIAL_CONCURRENCY,
+                    max_limit=settings.PROVIDER_MAX_CONCURRENCY
+                ),
+                RetryBudget(ratio=settings.PROVIDER_RETRY_BUDGET_RATIO)
+            )
+            _clients[name] = client
+        return client
\ No newline at end of file
@@ -0,0 +1,319 @@
+from sqlalchemy import func, or_, and_, case, exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.models import Website, ProviderRetry, RefreshRun, RefreshBudget
+from app.core.metrics import IMPORT_STAGE_SECONDS, IMPORT_WEBSITES, StageTimer
+from app.services.data_processor import run_enrichment, process_deferred_retries, PROVIDERS
+from app.services.domain_utils import canonical_domain
+from app.services.retry_queue import due_retries
+from app.services.website_demand import demand_tracker
+from datetime import date, datetime, timedelta
+import asyncio
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 24 * 60 * 60
+
+def provider_calls_per_website() -> int:
+    """Ahrefs domain rating and traffic, plus one DataForSEO request per 1000 items"""
+    return 2 + math.ceil(settings.DATAFORSEO_MAX_ITEMS / 1000)
+
+def calls_used_today(db: Session) -> int:
+    """Provider calls claimed by refresh and retry runs today (UTC), across all workers"""
+    used = db.query(RefreshBudget.calls).filter(RefreshBudget.day == datetime.utcnow().date()).scalar()
+    return used or 0
+
+def _ensure_budget_row(day: date, db: Session):
+    if db.query(RefreshBudget.day).filter(RefreshBudget.day == day).first() is None:
+        try:
+            with db.begin_nested():
+                db.add(RefreshBudget(day=day, calls=0))
+        except IntegrityError:
+            # Another worker created it first
+            pass
+        db.commit()
+
+def claim_calls(websites: int, db: Session) -> int:
+    """
+    Claim today's provider calls for up to `websites` websites.
+    Each claim is a single conditional UPDATE of the day's budget row, so
+    workers sharing the database never claim more than
+    REFRESH_DAILY_CALL_BUDGET together. Returns the number of websites granted.
+    """
+    per_website = provider_calls_per_website()
+    day = datetime.utcnow().date()
+    _ensure_budget_row(day, db)
+
+    while websites > 0:
+        calls = websites * per_website
+        claimed = db.query(RefreshBudget).filter(
+            RefreshBudget.day == day,
+            RefreshBudget.calls + calls <= settings.REFRESH_DAILY_CALL_BUDGET
+        ).update({RefreshBudget.calls: RefreshBudget.calls + calls}, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return websites
+        # Another worker claimed part of the budget meanwhile; take what is left
+        remaining = settings.REFRESH_DAILY_CALL_BUDGET - calls_used_today(db)
+        websites = min(websites - 1, remaining // per_website)
+    return 0
+
+def release_calls(websites: int, day: date, db: Session):
+    """Return calls claimed for websites that were not processed"""
+    if websites <= 0:
+        return
+    db.query(RefreshBudget).filter(RefreshBudget.day == day).update(
+        {RefreshBudget.calls: RefreshBudget.calls - websites * provider_calls_per_website()},
+        synchronize_session=False
+    )
+    db.commit()
+
+class CallBudget:
+    """
+    Token bucket refilled at REFRESH_DAILY_CALL_BUDGET calls per day, so each
+    tick may spend about one interval's share and a missed tick can be caught
+    up once, but the budget is never spent in a single burst.
+    Starts with one interval's share so restarts do not burst either.
+    """
+
+    def __init__(self, daily_calls: int, interval_seconds: float):
+        self.rate = daily_calls / DAY_SECONDS
+        self.capacity = max(self.rate * interval_seconds * 2, provider_calls_per_website())
+        self._tokens = min(self.rate * interval_seconds, self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def spend(self, calls: int):
+        with self._lock:
+            self._refill()
+            self._tokens = max(self._tokens - calls, 0.0)
+
+def _stale_filter(now: datetime):
+    stale_before = now - timedelta(days=settings.REFRESH_MAX_AGE_DAYS)
+    demanded_stale_before = now - timedelta(days=settings.REFRESH_DEMANDED_MAX_AGE_DAYS)
+    demanded_since = now - timedelta(days=settings.REFRESH_DEMAND_WINDOW_DAYS)
+    return or_(
+        Website.updated_at.is_(None),
+        Website.updated_at < stale_before,
+        and_(Website.last_demanded_at >= demanded_since, Website.updated_at < demanded_stale_before)
+    )
+
+def _demanded(now: datetime):
+    return Website.last_demanded_at >= now - timedelta(days=settings.REFRESH_DEMAND_WINDOW_DAYS)
+
+def find_stale_websites(limit: int, db: Session) -> List[Website]:
+    """
+    Stale websites, recently demanded ones first, then the oldest.
+    Websites with a pending deferred retry are left to the retry queue.
+    """
+    now = datetime.utcnow()
+    pending_retry = exists().where(
+        ProviderRetry.website_id == Website.id,
+        ProviderRetry.status == "pending"
+    )
+    return db.query(Website).filter(
+        _stale_filter(now),
+        ~pending_retry
+    ).order_by(
+        case((_demanded(now), 0), else_=1),
+        Website.updated_at
+    ).limit(limit).all()
+
+def claim_websites(websites: List[Website], now: datetime, db: Session) -> List[Website]:
+    """
+    Mark websites as refreshed at `now`, each with a conditional UPDATE on the
+    updated_at it was selected with, so overlapping runs on other workers
+    never refresh the same website. Returns the websites this run claimed.
+    """
+    claimed = []
+    for website in websites:
+        unchanged = Website.updated_at.is_(None) if website.updated_at is None else Website.updated_at == website.updated_at
+        if db.query(Website).filter(Website.id == website.id, unchanged).update(
+            {Website.updated_at: now}, synchronize_session=False
+        ):
+            claimed.append(website)
+    db.commit()
+    return claimed
+
+def count_stale_websites(db: Session) -> Dict[str, int]:
+    now = datetime.utcnow()
+    total, demanded = db.query(
+        func.count(Website.id),
+        func.sum(case((_demanded(now), 1), else_=0))
+    ).filter(_stale_filter(now)).one()
+    return {"stale": total or 0, "stale_demanded": demanded or 0}
+
+def _start_run(kind: str, db: Session) -> RefreshRun:
+    run = RefreshRun(kind=kind, status="running", websites=0, provider_calls=0)
+    db.add(run)
+    db.commit()
+    return run
+
+def _finish_run(run: RefreshRun, outcomes: Dict[str, int], db: Session, error: Optional[str] = None):
+    run.websites = sum(outcomes.values())
+    # Refresh runs count their calls up front; keep that if the run stopped early
+    run.provider_calls = max(run.provider_calls or 0, run.websites * provider_calls_per_website())
+    run.outcomes = outcomes
+    run.status = "failed" if error else "completed"
+    run.error = error
+    run.completed_at = datetime.utcnow()
+    db.commit()
+
+def refresh_stale_websites(limit: int) -> Dict[str, int]:
+    """
+    Background task to refetch DR, traffic and page keywords of up to `limit`
+    stale websites through the import pipeline (rate limiters, retry queue,
+    page replacement), as far as today's call budget allows.
+    Returns the number of websites per outcome.
+    """
+    db = SessionLocal()
+    run = None
+    outcomes: Dict[str, int] = {}
+    try:
+        websites = find_stale_websites(limit, db)
+        if not websites:
+            return outcomes
+        day = datetime.utcnow().date()
+        granted = claim_calls(len(websites), db)
+        if not granted:
+            logger.info("Daily refresh call budget used up")
+            return outcomes
+
+        # Claim the websites first so overlapping runs do not pick them again;
+        # failures are retried through the deferred retry queue
+        websites = claim_websites(websites[:granted], datetime.utcnow(), db)
+        release_calls(granted - len(websites), day, db)
+        if not websites:
+            return outcomes
+        run = _start_run("refresh", db)
+
+        # The budget was claimed up front, so a crashed run still uses it up
+        run.provider_calls = len(websites) * provider_calls_per_website()
+        db.commit()
+
+        jobs = [
+            (website, website.domain or canonical_domain(website.url), website.url, set(PROVIDERS))
+            for website in websites
+        ]
+
+        def on_done(website: Website, outcome: str):
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            IMPORT_WEBSITES.labels(outcome=f"refresh_{outcome}").inc()
+
+        run_enrichment(jobs, db, StageTimer(IMPORT_STAGE_SECONDS), on_done)
+        _finish_run(run, outcomes, db)
+        logger.info(f"Refreshed websites: {outcomes}")
+        return outcomes
+    except Exception as e:
+        logger.error(f"Error refreshing stale websites: {e}")
+        db.rollback()
+        if run:
+            _finish_run(run, outcomes, db, error=str(e))
+        return outcomes
+    finally:
+        db.close()
+
+def retry_deferred_websites(limit: int) -> Dict[str, int]:
+    """Run due deferred retries as a recorded run, within today's call budget"""
+    db = SessionLocal()
+    try:
+        websites = len({retry.website_id for retry in due_retries(db, limit)})
+        if not websites:
+            return {}
+        day = datetime.utcnow().date()
+        granted = claim_calls(websites, db)
+        if not granted:
+            return {}
+
+        run = _start_run("retry", db)
+        outcomes = process_deferred_retries(granted)
+        _finish_run(run, outcomes, db)
+        release_calls(granted - sum(outcomes.values()), day, db)
+        return outcomes
+    finally:
+        db.close()
+
+class RefreshScheduler:
+    """
+    Periodic refresh of stale websites in the API process.
+    Every REFRESH_INTERVAL_SECONDS it runs due deferred retries
+    (RETRY_QUEUE_ENABLED) and then refreshes the stalest websites
+    (REFRESH_ENABLED), paced by a per-process token bucket;
+    runs claim their calls from the daily budget shared by all workers.
+    """
+
+    def __init__(self):
+        self.budget = CallBudget(settings.REFRESH_DAILY_CALL_BUDGET, settings.REFRESH_INTERVAL_SECONDS)
+        self._task: Optional[asyncio.Task] = None
+
+    def allowance(self, db: Session) -> int:
+        """Websites the next run may fetch"""
+        remaining_today = settings.REFRESH_DAILY_CALL_BUDGET - calls_used_today(db)
+        calls = min(self.budget.available(), remaining_today)
+        return max(0, min(int(calls // provider_calls_per_website()), settings.REFRESH_MAX_BATCH))
+
+    def tick(self) -> Dict[str, Dict[str, int]]:
+        """One scheduler round; returns outcomes of the retry and refresh runs"""
+        db = SessionLocal()
+        try:
+            # Demand is flushed on its own timer too; flush now so the next run sees it
+            demand_tracker.flush(db)
+            allowance = self.allowance(db)
+        except Exception as e:
+            logger.error(f"Error preparing refresh run: {e}")
+            return {}
+        finally:
+            db.close()
+
+        results = {}
+        if allowance and settings.RETRY_QUEUE_ENABLED:
+            results["retry"] = retry_deferred_websites(allowance)
+            spent = sum(results["retry"].values())
+            self.budget.spend(spent * provider_calls_per_website())
+            allowance -= spent
+
+        if allowance and settings.REFRESH_ENABLED:
+            results["refresh"] = refresh_stale_websites(allowance)
+            self.budget.spend(sum(results["refresh"].values()) * provider_calls_per_website())
+
+        return results
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.REFRESH_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self.tick)
+            except Exception as e:
+                logger.error(f"Error in refresh scheduler: {e}")
+
+    def start(self):
+        if (settings.REFRESH_ENABLED or settings.RETRY_QUEUE_ENABLED) and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+refresh_scheduler = RefreshScheduler()
\ No newline at end of file
@@ -0,0 +1,247 @@
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from typing import List, Dict, Tuple, Optional
+from app.core.config import settings
+from app.core.metrics import REINDEX_PAGES
+from app.db.database import SessionLocal
+from app.models.models import Page, PageKeyword, Website, ReindexJob
+from app.services.keyword_store import get_page_keywords
+from app.services.vector_service import vector_service
+from app.services.vector_targets import vector_targets, job_target, VectorTarget, SWITCH_GRACE_SECONDS
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# (vector_id, text to embed, metadata)
+Document = Tuple[str, str, Dict]
+
+def load_page_documents(after_id: int, limit: int, db: Session) -> Tuple[List[Document], Optional[int]]:
+    """
+    Next chunk of pages after a checkpoint, rebuilt as documents from the
+    stored page keywords. Returns the documents and the last page ID read
+    (None once there are no more pages).
+    """
+    rows = db.query(Page.id, Page.vector_id, Page.url, Website.url).join(
+        Website, Website.id == Page.website_id
+    ).filter(
+        Page.id > after_id
+    ).order_by(Page.id).limit(limit).all()
+    if not rows:
+        return [], None
+
+    page_ids = [page_id for page_id, _, _, _ in rows]
+    keywords = get_page_keywords(page_ids, db)
+
+    # The main keyword row carries the page's position and search volume
+    main_rows = db.query(PageKeyword.page_id, PageKeyword.position, PageKeyword.search_volume).filter(
+        PageKeyword.page_id.in_(page_ids),
+        or_(PageKeyword.position.isnot(None), PageKeyword.search_volume.isnot(None))
+    )
+    ranking = {page_id: (position, search_volume) for page_id, position, search_volume in main_rows}
+
+    documents = []
+    for page_id, vector_id, page_url, website_url in rows:
+        if not vector_id or not keywords.get(page_id):
+            continue
+        position, search_volume = ranking.get(page_id, (None, None))
+        documents.append((vector_id, " ".join(keywords[page_id]), {
+            "website_url": website_url,
+            "page_url": page_url,
+            "position": position,
+            "search_volume": search_volume
+        }))
+
+    return documents, rows[-1][0]
+
+def _embed_and_upsert(documents: List[Document], target: VectorTarget):
+    vectors = vector_service.embed_documents(documents, target)
+    vector_service.upsert_vectors(vectors, target)
+
+def _new_lease() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.REINDEX_LEASE_SECONDS)
+
+def _lease_expired():
+    return or_(ReindexJob.lease_expires_at.is_(None), ReindexJob.lease_expires_at < datetime.utcnow())
+
+def take_lease(job_id: int, statuses: Tuple[str, ...], new_status: str, db: Session) -> Optional[str]:
+    """
+    Take a job in one of `statuses` whose lease is free or expired, in a single
+    conditional UPDATE so only one worker can win it.
+    Returns the lease owner token, or None if the job was not available.
+    """
+    owner = uuid.uuid4().hex
+    claimed = db.query(ReindexJob).filter(
+        ReindexJob.id == job_id,
+        ReindexJob.status.in_(statuses),
+        _lease_expired()
+    ).update({"status": new_status, "lease_owner": owner, "lease_expires_at": _new_lease()}, synchronize_session=False)
+    db.commit()
+    return owner if claimed else None
+
+def release_lease(job_id: int, owner: str, db: Session, **values) -> bool:
+    """Clear the lease and set `values`, only if `owner` still holds it"""
+    released = db.query(ReindexJob).filter(
+        ReindexJob.id == job_id,
+        ReindexJob.lease_owner == owner
+    ).update({"lease_owner": None, "lease_expires_at": None, **values}, synchronize_session=False)
+    db.commit()
+    return released == 1
+
+def build_shadow_index(job: ReindexJob, owner: str, db: Session) -> bool:
+    """
+    Embed every page after the job's checkpoint into its target.
+    Each chunk of REINDEX_CHUNK_SIZE pages is embedded in parallel batches and
+    checkpointed once complete, so an interrupted job resumes where it stopped.
+    Pages created meanwhile get higher IDs and are picked up by the same loop.
+    Checkpoints renew the lease of `owner` and only apply while it holds it,
+    so a worker whose lease was taken over stops instead of racing.
+    Returns False if the job was cancelled or the lease lost.
+    """
+    target = job_target(job)
+    started = time.monotonic()
+    processed = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, settings.REINDEX_WORKERS)) as executor:
+        while True:
+            db.refresh(job)
+            if job.status == "cancelled":
+                logger.info(f"Re-index job {job.id} cancelled at page {job.last_page_id}")
+                return False
+
+            documents, last_page_id = load_page_documents(job.last_page_id or 0, settings.REINDEX_CHUNK_SIZE, db)
+            if last_page_id is None:
+                return True
+
+            batches = [
+                documents[start:start + settings.EMBEDDING_BATCH_SIZE]
+                for start in range(0, len(documents), settings.EMBEDDING_BATCH_SIZE)
+            ]
+            # Raises the first batch failure; the checkpoint stays at the previous chunk
+            list(executor.map(lambda batch: _embed_and_upsert(batch, target), batches))
+
+            processed += len(documents)
+            REINDEX_PAGES.inc(len(documents))
+            checkpointed = db.query(ReindexJob).filter(
+                ReindexJob.id == job.id,
+                ReindexJob.lease_owner == owner
+            ).update({
+                "last_page_id": last_page_id,
+                "processed_pages": (job.processed_pages or 0) + len(documents),
+                "pages_per_second": round(processed / max(time.monotonic() - started, 1e-6), 1),
+                "lease_expires_at": _new_lease()
+            }, synchronize_session=False)
+            db.commit()
+            if not checkpointed:
+                logger.warning(f"Re-index job {job.id} lost its lease at page {job.last_page_id}, stopping")
+                return False
+
+            db.refresh(job)
+            logger.info(
+                f"Re-index job {job.id}: {job.processed_pages}/{job.total_pages} pages, "
+                f"{job.pages_per_second} pages/s"
+            )
+
+def _count_pages(db: Session) -> int:
+    return db.query(Page).filter(Page.vector_id.isnot(None)).count()
+
+def can_resume(job: ReindexJob) -> bool:
+    """Failed jobs, and building jobs whose worker stopped renewing the lease"""
+    if job.status == "failed":
+        return True
+    return job.status == "building" and (job.lease_expires_at is None or job.lease_expires_at < datetime.utcnow())
+
+def run_reindex(job_id: int):
+    """
+    Background task to build a re-index job's shadow index from stored page
+    keywords. Searches keep using the active index meanwhile; with dual_write,
+    new imports also write to the shadow index.
+    Ends in status "ready", to be switched to with activate_reindex.
+    """
+    db = SessionLocal()
+    owner = None
+    try:
+        owner = take_lease(job_id, ("pending", "failed", "building"), "building", db)
+        if not owner:
+            logger.info(f"Re-index job {job_id} is not pending or resumable, or another worker holds it")
+            return
+        job = db.query(ReindexJob).filter(ReindexJob.id == job_id).first()
+
+        job.error = None
+        job.started_at = job.started_at or datetime.utcnow()
+        job.total_pages = _count_pages(db)
+        db.commit()
+        # Deletes (and dual-writes) in this process reach the shadow index from now on
+        vector_targets.reload()
+
+        if not build_shadow_index(job, owner, db):
+            return
+
+        release_lease(job_id, owner, db, status="ready", completed_at=datetime.utcnow())
+        logger.info(f"Re-index job {job_id} ready: {job.processed_pages} pages")
+
+    except Exception as e:
+        logger.error(f"Error in re-index job {job_id}: {e}")
+        db.rollback()
+        if owner:
+            release_lease(job_id, owner, db, status="failed", error=str(e))
+    finally:
+        vector_targets.reload()
+        db.close()
+
+def activate_reindex(job_id: int):
+    """
+    Background task to switch searches to a finished re-index job:
+    embed pages added since the build finished, then mark the job active and
+    retire the previous one in a single transaction.
+    Other workers pick up the switch within REFRESH_SECONDS and keep writing
+    to the previous target for SWITCH_GRACE_SECONDS, so once that window has
+    passed a second catch-up embeds pages written only to the previous index.
+    On failure before the switch the job goes back to "ready" so activation
+    can be retried.
+    """
+    db = SessionLocal()
+    owner = None
+    switched = False
+    try:
+        owner = take_lease(job_id, ("activating",), "activating", db)
+        if not owner:
+            return
+        job = db.query(ReindexJob).filter(ReindexJob.id == job_id).first()
+
+        job.total_pages = _count_pages(db)
+        db.commit()
+        if not build_shadow_index(job, owner, db):
+            return
+
+        db.query(ReindexJob).filter(
+            ReindexJob.status == "active",
+            ReindexJob.id != job.id
+        ).update({"status": "retired"}, synchronize_session=False)
+        job.status = "active"
+        job.activated_at = datetime.utcnow()
+        db.commit()
+        switched = True
+        vector_targets.reload()
+        logger.info(f"Re-index job {job_id} is now active: {job.index_name}/{job.namespace} ({job.model})")
+
+        time.sleep(SWITCH_GRACE_SECONDS)
+        job.lease_expires_at = _new_lease()
+        db.commit()
+        build_shadow_index(job, owner, db)
+        release_lease(job_id, owner, db)
+        logger.info(f"Re-index job {job_id} caught up after the switch: {job.processed_pages} pages")
+
+    except Exception as e:
+        logger.error(f"Error activating re-index job {job_id}: {e}")
+        db.rollback()
+        if owner:
+            # After the switch the job stays active; a failed catch-up is only reported
+            values = {"error": str(e)} if switched else {"status": "ready", "error": str(e)}
+            release_lease(job_id, owner, db, **values)
+    finally:
+        vector_targets.reload()
+        db.close()
\ No newline at end of file
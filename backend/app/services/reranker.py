@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Columns of the candidate feature matrix, in order
+FEATURES = ("similarity", "position", "search_volume", "dr", "traffic", "price_per_dr")
+
+# Log-scaled features are divided by these so typical values land in [0, 1]
+SEARCH_VOLUME_SCALE = np.log1p(1_000_000)
+TRAFFIC_SCALE = np.log1p(10_000_000)
+PRICE_PER_DR_SCALE = np.log1p(1_000)
+MAX_POSITION = 100
+
+def _column(values: Sequence[Optional[float]]) -> np.ndarray:
+    """Float column with NaN for missing values"""
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+class Reranker:
+    """
+    Scores search candidates (one per website) on vector similarity, the
+    ranking of the matched pages and the site's metrics.
+    Features are normalized to roughly [0, 1] and scored as a weighted sum in
+    a single matrix-vector product. Weights come from RERANK_WEIGHTS, or from
+    a linear model file (RERANK_MODEL_PATH) loaded at startup.
+    """
+
+    def __init__(self):
+        self.source = "settings"
+        self._weights = self._weight_vector(settings.RERANK_WEIGHTS)
+        self._mean = np.zeros(len(FEATURES))
+        self._scale = np.ones(len(FEATURES))
+        self._bias = 0.0
+
+    @staticmethod
+    def _weight_vector(weights: Dict[str, float]) -> np.ndarray:
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown re-rank features: {', '.join(sorted(unknown))}")
+        return np.array([float(weights.get(name, 0.0)) for name in FEATURES])
+
+    def load(self, path: Optional[str] = None):
+        """
+        Load a linear model exported as JSON:
+        {"weights": {feature: w}, "bias": b, "mean": {feature: m}, "scale": {feature: s}}
+        Features are standardized with mean and scale (when given) before weighting.
+        Keeps the configured weights if the file is missing or invalid.
+        """
+        path = path or settings.RERANK_MODEL_PATH
+        if not path:
+            return
+
+        try:
+            with open(path) as f:
+                model = json.load(f)
+            weights = self._weight_vector(model["weights"])
+            mean = np.array([float(model.get("mean", {}).get(name, 0.0)) for name in FEATURES])
+            scale = np.array([float(model.get("scale", {}).get(name, 1.0)) for name in FEATURES])
+            if np.any(scale == 0):
+                raise ValueError("Feature scale must not be zero")
+            bias = float(model.get("bias", 0.0))
+        except Exception as e:
+            logger.error(f"Error loading re-rank model {path}: {e}")
+            return
+
+        self._weights, self._mean, self._scale, self._bias = weights, mean, scale, bias
+        self.source = path
+        logger.info(f"Loaded re-rank model from {path}")
+
+    def feature_matrix(
+        self,
+        similarity: Sequence[float],
+        position: Sequence[Optional[int]],
+        search_volume: Sequence[Optional[int]],
+        dr: Sequence[Optional[int]],
+        traffic: Sequence[Optional[int]],
+        price: Sequence[Optional[float]]
+    ) -> np.ndarray:
+        """
+        Normalized (candidates x FEATURES) matrix. Missing values score 0,
+        except price per DR, where a missing price is neutral as well.
+        """
+        position = _column(position)
+        dr = _column(dr)
+        price = _column(price)
+
+        with np.errstate(invalid="ignore"):
+            matrix = np.column_stack((
+                _column(similarity),
+                (MAX_POSITION - np.clip(position, 1, MAX_POSITION) + 1) / MAX_POSITION,
+                np.log1p(np.maximum(_column(search_volume), 0)) / SEARCH_VOLUME_SCALE,
+                dr / 100,
+                np.log1p(np.maximum(_column(traffic), 0)) / TRAFFIC_SCALE,
+                np.log1p(np.maximum(price, 0) / np.maximum(np.nan_to_num(dr), 1)) / PRICE_PER_DR_SCALE
+            ))
+        return np.nan_to_num(matrix, nan=0.0)
+
+    def score(self, matrix: np.ndarray) -> np.ndarray:
+        """One score per candidate row"""
+        if matrix.size == 0:
+            return np.zeros(len(matrix))
+        return ((matrix - self._mean) / self._scale) @ self._weights + self._bias
+
+    def rank(self, matrix: np.ndarray) -> Tuple[np.ndarray, List[int]]:
+        """Scores and the candidate order by descending score (ties keep input order)"""
+        scores = self.score(matrix)
+        return scores, np.argsort(-scores, kind="stable").tolist()
+
+reranker = Reranker()
\ No newline at end of file
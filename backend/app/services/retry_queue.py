@@ -0,0 +1,65 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Dict
+from app.core.config import settings
+from app.models.models import ProviderRetry
+from datetime import datetime, timedelta
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+# Providers whose data can be refetched for a single website
+RETRYABLE_PROVIDERS = ("ahrefs", "dataforseo")
+
+def _retry_delay(attempts: int) -> timedelta:
+    """Exponential delay with jitter, capped at a day"""
+    base = settings.RETRY_QUEUE_BASE_DELAY_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(base, 24 * 60 * 60) * random.uniform(0.8, 1.2))
+
+def schedule_retry(website_id: int, provider: str, error: str, db: Session) -> ProviderRetry:
+    """
+    Queue a website for another attempt at a provider, or push back an existing entry.
+    Entries that keep failing are marked abandoned instead of retried forever.
+    """
+    retry = db.query(ProviderRetry).filter(
+        ProviderRetry.website_id == website_id,
+        ProviderRetry.provider == provider
+    ).first()
+    if retry is None:
+        retry = ProviderRetry(website_id=website_id, provider=provider, attempts=0)
+        db.add(retry)
+
+    retry.attempts = (retry.attempts or 0) + 1
+    retry.last_error = error[:1000]
+    retry.next_attempt_at = datetime.utcnow() + _retry_delay(retry.attempts)
+    if retry.attempts >= settings.RETRY_QUEUE_MAX_ATTEMPTS:
+        retry.status = "abandoned"
+        logger.warning(f"Giving up on {provider} for website {website_id} after {retry.attempts} attempts: {error}")
+    else:
+        retry.status = "pending"
+    return retry
+
+def clear_retry(website_id: int, provider: str, db: Session):
+    """Drop a queued retry once the provider data has been fetched"""
+    db.query(ProviderRetry).filter(
+        ProviderRetry.website_id == website_id,
+        ProviderRetry.provider == provider
+    ).delete(synchronize_session=False)
+
+def due_retries(db: Session, limit: int = 100) -> List[ProviderRetry]:
+    """Pending retries whose backoff has elapsed, oldest first"""
+    return db.query(ProviderRetry).filter(
+        ProviderRetry.status == "pending",
+        ProviderRetry.next_attempt_at <= datetime.utcnow()
+    ).order_by(ProviderRetry.next_attempt_at).limit(limit).all()
+
+def retry_queue_stats(db: Session) -> Dict[str, Dict[str, int]]:
+    """Queued retries counted per provider and status"""
+    stats: Dict[str, Dict[str, int]] = {}
+    rows = db.query(
+        ProviderRetry.provider, ProviderRetry.status, func.count(ProviderRetry.id)
+    ).group_by(ProviderRetry.provider, ProviderRetry.status)
+    for provider, status, count in rows:
+        stats.setdefault(provider, {})[status] = count
+    return stats
\ No newline at end of file
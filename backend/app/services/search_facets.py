@@ -0,0 +1,52 @@
+from sqlalchemy import func, case, and_
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional, Tuple
+from app.models.models import Website
+
+# Band edges per facet; the last band is open-ended
+DR_EDGES = (0, 10, 20, 30, 40, 50, 60, 70, 80, 90)
+TRAFFIC_EDGES = (0, 1_000, 10_000, 100_000, 1_000_000)
+PRICE_EDGES = (0, 50, 100, 250, 500, 1_000)
+
+FACETS = {
+    "dr": (Website.dr, DR_EDGES),
+    "traffic": (Website.traffic, TRAFFIC_EDGES),
+    "price": (Website.price, PRICE_EDGES)
+}
+
+def _bands(edges: Tuple) -> List[Tuple[float, Optional[float]]]:
+    return [(low, edges[i + 1] if i + 1 < len(edges) else None) for i, low in enumerate(edges)]
+
+def _facet_columns() -> List:
+    """Total count, then one CASE sum per band and one for missing values, per facet"""
+    columns = [func.count(Website.id)]
+    for column, edges in FACETS.values():
+        for low, high in _bands(edges):
+            condition = column >= low if high is None else and_(column >= low, column < high)
+            columns.append(func.sum(case((condition, 1), else_=0)))
+        columns.append(func.sum(case((column.is_(None), 1), else_=0)))
+    return columns
+
+# Built once; constructing the expressions costs more than running the query
+FACET_COLUMNS = _facet_columns()
+
+def compute_facets(website_urls: List[str], db: Session) -> Dict:
+    """
+    Count candidate websites per DR, traffic and price band in a single
+    aggregate query (one CASE sum per band), ignoring the request's filters
+    so clients can show how many results each filter change would leave.
+    Websites without a value are counted as "unknown".
+    """
+    row = db.query(*FACET_COLUMNS).filter(Website.url.in_(website_urls)).one() if website_urls else None
+    counts = iter(row or [0] * len(FACET_COLUMNS))
+
+    facets = {"total": next(counts) or 0}
+    for name, (_, edges) in FACETS.items():
+        facets[name] = {
+            "bands": [
+                {"min": low, "max": high, "count": next(counts) or 0}
+                for low, high in _bands(edges)
+            ],
+            "unknown": next(counts) or 0
+        }
+    return facets
\ No newline at end of file
@@ -1,48 +1,159 @@
-from pinecone import Pinecone, ServerlessSpec
-import openai
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from app.core.config import settings
+from app.core.metrics import IMPORT_STAGE_SECONDS, record_cache
+from app.services.keyword_store import merge_page_items
+from app.services.rate_limiter import get_provider_client, provider_timeout, ProviderError
+from app.services.vector_targets import vector_targets, VectorTarget
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 import hashlib
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Pinecone accepts at most 1000 IDs per delete request
+DELETE_CHUNK_SIZE = 1000
+DELETE_WORKERS = 4
+# Keeps upsert requests under Pinecone's 2MB request limit at 1536 dimensions
+UPSERT_BATCH_SIZE = 100
+QUERY_WORKERS = 8
+
+# Wait this long before retrying a failed index initialization
+INDEX_RETRY_SECONDS = 30
+
 class VectorService:
+    """
+    Embedding and Pinecone access.
+    Clients are created on first use rather than at import, so worker startup
+    makes no network calls and a Pinecone outage does not block the API.
+    """
+
     def __init__(self):
         self.openai_api_key = settings.OPENAI_API_KEY
         self.pinecone_api_key = settings.PINECONE_API_KEY
 
-        if self.openai_api_key:
-            openai.api_key = self.openai_api_key
+        self._pc = None
+        self._index = None
+        self._indexes = {}
+        self._openai_client = None
+        self._index_failed_at = None
+        self._lock = threading.Lock()
+
+        self.openai_limits = get_provider_client("openai")
+        self.pinecone_limits = get_provider_client("pinecone")
 
-        if self.pinecone_api_key:
-            self.pc = Pinecone(api_key=self.pinecone_api_key)
+        self._query_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def index(self):
+        """Pinecone index handle, initialized on first access"""
+        if self._index is None and self.pinecone_api_key:
             self._initialize_index()
+        return self._index
+
+    @property
+    def openai_client(self):
+        """OpenAI client, created on first access and reused"""
+        if self._openai_client is None and self.openai_api_key:
+            with self._lock:
+                if self._openai_client is None:
+                    import httpx
+                    import openai
+                    connect_timeout, read_timeout = provider_timeout()
+                    # Retries go through the shared limiter instead of the SDK's own
+                    self._openai_client = openai.OpenAI(
+                        api_key=self.openai_api_key,
+                        base_url=settings.OPENAI_BASE_URL,
+                        max_retries=0,
+                        timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+                    )
+        return self._openai_client
 
     def _initialize_index(self):
         """Initialize Pinecone index if it doesn't exist"""
-        try:
-            indexes = self.pc.list_indexes()
-            if settings.PINECONE_INDEX not in [index.name for index in indexes]:
-                self.pc.create_index(
-                    name=settings.PINECONE_INDEX,
-                    dimension=1536,  # OpenAI embedding dimension
-                    metric='cosine',
-                    spec=ServerlessSpec(
-                        cloud='aws',
-                        region='us-west-2'
-                    )
+        with self._lock:
+            if self._index is not None:
+                return
+
+            # Avoid hammering Pinecone on every request while it is down
+            if self._index_failed_at and time.monotonic() - self._index_failed_at < INDEX_RETRY_SECONDS:
+                return
+
+            try:
+                self._index = self._open_index(settings.PINECONE_INDEX, settings.EMBEDDING_DIMENSION)
+                self._index_failed_at = None
+            except Exception as e:
+                logger.error(f"Error initializing Pinecone index: {e}")
+                self._index = None
+                self._index_failed_at = time.monotonic()
+
+    def _open_index(self, name: str, dimension: int):
+        """Open a Pinecone index, creating it with the given dimension if it doesn't exist"""
+        from pinecone import Pinecone, ServerlessSpec
+
+        if self._pc is None:
+            self._pc = Pinecone(api_key=self.pinecone_api_key, host=settings.PINECONE_HOST)
+
+        indexes = self._pc.list_indexes()
+        if name not in [index.name for index in indexes]:
+            self._pc.create_index(
+                name=name,
+                dimension=dimension,
+                metric='cosine',
+                spec=ServerlessSpec(
+                    cloud='aws',
+                    region='us-west-2'
                 )
-                logger.info(f"Created Pinecone index: {settings.PINECONE_INDEX}")
+            )
+            logger.info(f"Created Pinecone index: {name} ({dimension} dimensions)")
 
-            self.index = self.pc.Index(settings.PINECONE_INDEX)
-        except Exception as e:
-            logger.error(f"Error initializing Pinecone index: {e}")
-            self.index = None
+        return self._pc.Index(name)
+
+    def get_index(self, target: VectorTarget):
+        """Index handle for a vector target, or None if unavailable"""
+        if target.index_name == settings.PINECONE_INDEX:
+            return self.index
+        if not self.pinecone_api_key:
+            return None
+
+        if target.index_name not in self._indexes:
+            with self._lock:
+                if target.index_name not in self._indexes:
+                    try:
+                        self._indexes[target.index_name] = self._open_index(target.index_name, target.dimension)
+                    except Exception as e:
+                        logger.error(f"Error initializing Pinecone index {target.index_name}: {e}")
+                        return None
+        return self._indexes[target.index_name]
+
+    def active_target(self) -> VectorTarget:
+        """Target searches should use; resolve it once per search so embedding and index match"""
+        return vector_targets.active()
+
+    def is_ready(self) -> bool:
+        """Whether the active Pinecone index is reachable (initializes it if needed)"""
+        return self.get_index(self.active_target()) is not None
+
+    def _embed(self, texts: List[str], target: Optional[VectorTarget] = None) -> List[List[float]]:
+        """Embed texts with the target's model through the shared OpenAI limiter; raises on failure"""
+        target = target or self.active_target()
+        # The pinned SDK predates the `dimensions` argument, so send it in the body
+        options = {"dimensions": target.dimension} if target.model.startswith("text-embedding-3") else None
+        response = self.openai_limits.call(
+            lambda: self.openai_client.embeddings.create(
+                input=texts,
+                model=target.model,
+                extra_body=options
+            )
+        )
+        return [embedding.embedding for embedding in response.data]
 
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings(self, texts: List[str], target: Optional[VectorTarget] = None) -> List[List[float]]:
         """
-        Generate embeddings using OpenAI's text-embedding-3-small model
+        Generate embeddings with the model of the target (the active one by default)
         Best practice: Use text-embedding-3-small for cost-effectiveness
         """
         if not self.openai_api_key:
@@ -50,106 +161,283 @@ class VectorService:
             return []
 
         try:
-            client = openai.OpenAI(api_key=self.openai_api_key)
-            response = client.embeddings.create(
-                input=texts,
-                model="text-embedding-3-small"
-            )
-            return [embedding.embedding for embedding in response.data]
+            return self._embed(texts, target)
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             return []
 
+    @staticmethod
+    def make_vector_id(website_url: str, page_url: str) -> str:
+        """Deterministic vector ID for a page of a website"""
+        return hashlib.md5(f"{website_url}_{page_url}".encode()).hexdigest()
+
+    def embed_documents(self, documents: List[Tuple[str, str, Dict]], target: VectorTarget) -> List[Dict]:
+        """
+        Embed (vector_id, text, metadata) documents in batches of EMBEDDING_BATCH_SIZE
+        Returns vectors ready to upsert; raises ProviderError on failure
+        """
+        vectors = []
+        for start in range(0, len(documents), settings.EMBEDDING_BATCH_SIZE):
+            batch = documents[start:start + settings.EMBEDDING_BATCH_SIZE]
+            try:
+                embeddings = self._embed([text for _, text, _ in batch], target)
+            except ProviderError:
+                raise
+            except Exception as e:
+                raise ProviderError("openai", f"{type(e).__name__}: {e}")
+
+            for (vector_id, _, metadata), embedding in zip(batch, embeddings):
+                # Pinecone rejects null metadata values
+                metadata = {key: value for key, value in metadata.items() if value is not None}
+                vectors.append({"id": vector_id, "values": embedding, "metadata": metadata})
+        return vectors
+
+    def upsert_vectors(self, vectors: List[Dict], target: VectorTarget):
+        """Upsert vectors into the target in request-sized batches; raises ProviderError on failure"""
+        index = self.get_index(target)
+        if not index:
+            raise ProviderError("pinecone", f"Pinecone index {target.index_name} not available")
+
+        try:
+            for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+                batch = vectors[start:start + UPSERT_BATCH_SIZE]
+                self.pinecone_limits.call(lambda: index.upsert(vectors=batch, namespace=target.namespace))
+        except ProviderError:
+            raise
+        except Exception as e:
+            logger.error(f"Error storing vectors: {e}")
+            raise ProviderError("pinecone", f"{type(e).__name__}: {e}")
+
     def store_vectors(self, website_url: str, page_data: List[Dict]) -> List[str]:
         """
         Store keyword vectors in Pinecone with metadata
+        Writes to the active target, and to shadow targets of re-index jobs with dual-write
         Returns list of vector IDs
+        Raises ProviderError when embedding or upserting into the active target failed,
+        so the caller can retry later
         """
-        if not self.index:
-            logger.warning("Pinecone index not available")
+        if not self.openai_api_key or not self.pinecone_api_key:
+            logger.warning("OpenAI or Pinecone API key not configured")
             return []
 
-        vector_ids = []
-        vectors_to_upsert = []
-
-        for page in page_data:
-            if not page.get("keywords"):
+        # One vector per page URL, from the keywords of all its items, for pages that have keywords
+        documents = {}
+        for page in merge_page_items(page_data):
+            if not page["keywords"]:
                 continue
+            vector_id = self.make_vector_id(website_url, page["url"])
+            # Combine the page's keywords into a single text for embedding
+            documents[vector_id] = (vector_id, " ".join(page["keywords"]), {
+                "website_url": website_url,
+                "page_url": page["url"],
+                "position": page["position"],
+                "search_volume": page["search_volume"]
+            })
+        vector_ids = list(documents)
 
-            # Combine keywords into a single text for embedding
-            keywords_text = " ".join(page["keywords"])
+        for position, target in enumerate(vector_targets.write_targets()):
+            try:
+                with IMPORT_STAGE_SECONDS.labels(stage="embed").time():
+                    vectors = self.embed_documents(list(documents.values()), target)
+                with IMPORT_STAGE_SECONDS.labels(stage="vector_upsert").time():
+                    self.upsert_vectors(vectors, target)
+            except ProviderError as e:
+                if position == 0:
+                    raise
+                # The re-index job catches up on pages the shadow index missed
+                logger.warning(f"Dual-write to {target.index_name}/{target.namespace} failed: {e}")
 
-            # Generate unique ID for this page
-            vector_id = hashlib.md5(
-                f"{website_url}_{page['url']}".encode()
-            ).hexdigest()
+        if vector_ids:
+            logger.info(f"Stored {len(vector_ids)} vectors for {website_url}")
 
-            # Generate embedding
-            embeddings = self.generate_embeddings([keywords_text])
-            if not embeddings:
-                continue
+        return vector_ids
 
-            # Prepare vector with metadata
-            vector_data = {
-                "id": vector_id,
-                "values": embeddings[0],
-                "metadata": {
-                    "website_url": website_url,
-                    "page_url": page["url"],
-                    "keywords": keywords_text,
-                    "position": page.get("position"),
-                    "search_volume": page.get("search_volume")
-                }
-            }
+    def embed_queries(self, queries: List[str], target: Optional[VectorTarget] = None) -> List[List[float]]:
+        """
+        Embed search queries, serving repeated queries from an LRU cache
+        Returns one embedding per query, or an empty list on failure
+        """
+        target = target or self.active_target()
+        # Embeddings from different models are not comparable, so the model is part of the key
+        key = lambda query: (target.model, target.dimension, query)
 
-            vectors_to_upsert.append(vector_data)
-            vector_ids.append(vector_id)
+        embeddings = {}
+        missing = []
+        with self._cache_lock:
+            for query in dict.fromkeys(queries):
+                embedding = self._query_cache.get(key(query))
+                if embedding is not None:
+                    self._query_cache.move_to_end(key(query))
+                    embeddings[query] = embedding
+                else:
+                    missing.append(query)
 
-        # Batch upsert to Pinecone
-        if vectors_to_upsert:
-            try:
-                self.index.upsert(vectors=vectors_to_upsert)
-                logger.info(f"Stored {len(vectors_to_upsert)} vectors for {website_url}")
-            except Exception as e:
-                logger.error(f"Error storing vectors: {e}")
+        for query in dict.fromkeys(queries):
+            record_cache("query_embedding", query in embeddings)
+
+        if missing:
+            generated = self.generate_embeddings(missing, target)
+            if len(generated) != len(missing):
                 return []
 
-        return vector_ids
+            embeddings.update(zip(missing, generated))
+            with self._cache_lock:
+                for query, embedding in zip(missing, generated):
+                    self._query_cache[key(query)] = embedding
+                while len(self._query_cache) > settings.EMBEDDING_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
 
-    def search_similar(self, query: str, filters: Dict = None, top_k: int = 10) -> List[Dict]:
+        return [embeddings[query] for query in queries]
+
+    def _query_index(self, index, vector: List[float], filters: Dict, top_k: int, namespace: str) -> List[Dict]:
+        """Run a single Pinecone query and flatten the matches"""
+        results = self.pinecone_limits.call(
+            lambda: index.query(
+                vector=vector,
+                top_k=top_k,
+                include_metadata=True,
+                filter=filters,
+                namespace=namespace
+            )
+        )
+
+        return [
+            {
+                "id": match.id,
+                "score": match.score,
+                "website_url": match.metadata.get("website_url"),
+                "page_url": match.metadata.get("page_url"),
+                "position": match.metadata.get("position"),
+                "search_volume": match.metadata.get("search_volume")
+            }
+            for match in results.matches
+        ]
+
+    def query_similar(self, vector: List[float], filters: Dict = None, top_k: int = 10,
+                      target: Optional[VectorTarget] = None) -> List[Dict]:
         """
-        Search for similar content using vector similarity
+        Query Pinecone with an existing embedding
         """
-        if not self.index:
+        target = target or self.active_target()
+        index = self.get_index(target)
+        if not index:
             logger.warning("Pinecone index not available")
             return []
 
-        # Generate embedding for query
-        embeddings = self.generate_embeddings([query])
-        if not embeddings:
-            return []
-
         try:
-            # Search in Pinecone
-            results = self.index.query(
-                vector=embeddings[0],
-                top_k=top_k,
-                include_metadata=True,
-                filter=filters
-            )
-
-            return [
-                {
-                    "score": match.score,
-                    "website_url": match.metadata.get("website_url"),
-                    "page_url": match.metadata.get("page_url"),
-                    "keywords": match.metadata.get("keywords"),
-                    "position": match.metadata.get("position")
-                }
-                for match in results.matches
-            ]
+            return self._query_index(index, vector, filters, top_k, target.namespace)
         except Exception as e:
             logger.error(f"Error searching vectors: {e}")
             return []
 
+    def query_similar_batch(self, vectors: Dict[str, List[float]], filters: Dict = None, top_k: int = 10,
+                            target: Optional[VectorTarget] = None) -> Dict[str, List[Dict]]:
+        """
+        Run Pinecone queries for many embeddings concurrently
+        Returns results keyed like the input
+        """
+        if not vectors:
+            return {}
+
+        target = target or self.active_target()
+        index = self.get_index(target)
+        if not index:
+            logger.warning("Pinecone index not available")
+            return {query: [] for query in vectors}
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(QUERY_WORKERS, len(vectors))) as executor:
+            futures = {
+                executor.submit(self._query_index, index, vector, filters, top_k, target.namespace): query
+                for query, vector in vectors.items()
+            }
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    results[query] = future.result()
+                except Exception as e:
+                    logger.error(f"Error searching vectors for '{query}': {e}")
+                    results[query] = []
+
+        return results
+
+    def search_similar(self, query: str, filters: Dict = None, top_k: int = 10) -> List[Dict]:
+        """
+        Search for similar content using vector similarity
+        """
+        target = self.active_target()
+        embeddings = self.embed_queries([query], target)
+        if not embeddings:
+            return []
+
+        return self.query_similar(embeddings[0], filters=filters, top_k=top_k, target=target)
+
+    def search_similar_batch(self, queries: List[str], filters: Dict = None, top_k: int = 10) -> Dict[str, List[Dict]]:
+        """
+        Search for many queries at once: one embedding call for all queries,
+        then the Pinecone queries run concurrently
+        Returns results keyed by query
+        """
+        if not queries:
+            return {}
+
+        target = self.active_target()
+        embeddings = self.embed_queries(queries, target)
+        if not embeddings:
+            return {query: [] for query in queries}
+
+        return self.query_similar_batch(dict(zip(queries, embeddings)), filters=filters, top_k=top_k, target=target)
+
+    def delete_vectors(self, vector_ids: List[str]) -> int:
+        """
+        Delete vectors by ID in parallel chunks, from the active index and
+        from shadow indexes of running re-index jobs
+        Returns number of vector IDs successfully deleted from the active index
+        """
+        deleted, _ = self.delete_vectors_with_failures(vector_ids)
+        return deleted
+
+    def delete_vectors_with_failures(self, vector_ids: List[str]) -> Tuple[int, List[str]]:
+        """
+        Like delete_vectors, but also returns the IDs that could not be deleted
+        from the active index (all of them if Pinecone is unavailable)
+        """
+        if not vector_ids:
+            return 0, []
+
+        targets = vector_targets.all_targets()
+        indexes = [(target, self.get_index(target)) for target in targets]
+        if not indexes[0][1]:
+            logger.warning("Pinecone index not available")
+            return 0, list(vector_ids)
+
+        chunks = [
+            vector_ids[i:i + DELETE_CHUNK_SIZE]
+            for i in range(0, len(vector_ids), DELETE_CHUNK_SIZE)
+        ]
+
+        deleted = 0
+        failed: List[str] = []
+        with ThreadPoolExecutor(max_workers=min(DELETE_WORKERS, len(chunks) * len(indexes))) as executor:
+            futures = {
+                executor.submit(
+                    self.pinecone_limits.call,
+                    lambda index=index, chunk=chunk, namespace=target.namespace: index.delete(ids=chunk, namespace=namespace)
+                ): (position, chunk)
+                for position, (target, index) in enumerate(indexes) if index
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                position, chunk = futures[future]
+                try:
+                    future.result()
+                    if position == 0:
+                        deleted += len(chunk)
+                except Exception as e:
+                    logger.error(f"Error deleting {len(chunk)} vectors from {targets[position].index_name}: {e}")
+                    if position == 0:
+                        failed.extend(chunk)
+
+        return deleted, failed
+
 vector_service = VectorService()
\ No newline at end of file
@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.models import ReindexJob
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How often each worker re-reads which index is active, so a switch made by
+# another worker is picked up without a restart
+REFRESH_SECONDS = 10
+
+# After a switch, writes and deletes also go to the previous target for this
+# long, covering workers that still had it cached as active; the activation
+# then catches up on pages written meanwhile (see reindex.activate_reindex)
+SWITCH_GRACE_SECONDS = 3 * REFRESH_SECONDS
+
+# Re-index jobs whose shadow index must receive deletes (and, with dual_write, new vectors)
+SHADOW_STATUSES = ("building", "ready", "activating")
+
+@dataclass(frozen=True)
+class VectorTarget:
+    """Where vectors live and how they are embedded"""
+    index_name: str
+    namespace: str
+    model: str
+    dimension: int
+
+def default_target() -> VectorTarget:
+    return VectorTarget(
+        index_name=settings.PINECONE_INDEX,
+        namespace="",
+        model=settings.EMBEDDING_MODEL,
+        dimension=settings.EMBEDDING_DIMENSION
+    )
+
+def job_target(job: ReindexJob) -> VectorTarget:
+    return VectorTarget(
+        index_name=job.index_name,
+        namespace=job.namespace or "",
+        model=job.model,
+        dimension=job.dimension
+    )
+
+class VectorTargets:
+    """
+    The active vector target plus the shadow targets of running re-index jobs,
+    read from reindex_jobs and cached per process.
+    The active target is swapped as a single reference, so every search sees
+    either the old or the new index, never a mix.
+    """
+
+    def __init__(self):
+        self._active = default_target()
+        self._shadows: List[VectorTarget] = []
+        self._dual_write: List[VectorTarget] = []
+        # (previous active target, until when it still receives writes)
+        self._previous: Optional[Tuple[VectorTarget, datetime]] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._loaded_at is not None and now - self._loaded_at < REFRESH_SECONDS:
+            return
+
+        with self._lock:
+            if not force and self._loaded_at is not None and now - self._loaded_at < REFRESH_SECONDS:
+                return
+
+            db = SessionLocal()
+            try:
+                active_job = db.query(ReindexJob).filter(
+                    ReindexJob.status == "active"
+                ).order_by(ReindexJob.activated_at.desc()).first()
+                shadow_jobs = db.query(ReindexJob).filter(ReindexJob.status.in_(SHADOW_STATUSES)).all()
+
+                self._active = job_target(active_job) if active_job else default_target()
+                self._shadows = [job_target(job) for job in shadow_jobs]
+                self._dual_write = [job_target(job) for job in shadow_jobs if job.dual_write]
+
+                self._previous = None
+                if active_job and active_job.activated_at:
+                    previous_until = active_job.activated_at + timedelta(seconds=SWITCH_GRACE_SECONDS)
+                    if datetime.utcnow() < previous_until:
+                        previous_job = db.query(ReindexJob).filter(
+                            ReindexJob.status == "retired",
+                            ReindexJob.activated_at < active_job.activated_at
+                        ).order_by(ReindexJob.activated_at.desc()).first()
+                        self._previous = (job_target(previous_job) if previous_job else default_target(), previous_until)
+            except Exception as e:
+                # Keep serving the last known targets while the database is unavailable
+                logger.error(f"Error loading vector targets: {e}")
+            finally:
+                db.close()
+                self._loaded_at = now
+
+    def active(self) -> VectorTarget:
+        """Target searches read from and imports write to"""
+        self._refresh()
+        return self._active
+
+    def _with_previous(self, targets: List[VectorTarget]) -> List[VectorTarget]:
+        if self._previous is None:
+            return targets
+        previous, until = self._previous
+        if previous in targets or datetime.utcnow() >= until:
+            return targets
+        return targets + [previous]
+
+    def write_targets(self) -> List[VectorTarget]:
+        """
+        Active target first, then shadow targets with dual-write enabled and,
+        right after a switch, the previous active target
+        """
+        self._refresh()
+        targets = [self._active] + [target for target in self._dual_write if target != self._active]
+        return self._with_previous(targets)
+
+    def all_targets(self) -> List[VectorTarget]:
+        """Every target that must see deletes"""
+        self._refresh()
+        targets = [self._active] + [target for target in self._shadows if target != self._active]
+        return self._with_previous(targets)
+
+    def reload(self):
+        """Pick up a change made in this process immediately"""
+        self._refresh(force=True)
+
+vector_targets = VectorTargets()
\ No newline at end of file
@@ -0,0 +1,171 @@
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Set
+from app.db.database import SessionLocal
+from app.models.models import Website, Page, PageKeyword, DeletionJob, ProviderRetry
+from app.services.vector_service import vector_service
+from app.services.website_filters import apply_website_filters
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 500
+
+def collect_vector_ids(website_ids: List[int], db: Session) -> Dict[int, Set[str]]:
+    """
+    Collect all Pinecone vector IDs belonging to the given websites, per website
+    """
+    vector_ids: Dict[int, Set[str]] = {website_id: set() for website_id in website_ids}
+
+    for website_id, vector_id in db.query(Page.website_id, Page.vector_id).filter(
+        Page.website_id.in_(website_ids),
+        Page.vector_id.isnot(None)
+    ):
+        vector_ids[website_id].add(vector_id)
+
+    for website_id, website_vector_ids in db.query(Website.id, Website.vector_ids).filter(Website.id.in_(website_ids)):
+        if website_vector_ids:
+            vector_ids[website_id].update(website_vector_ids)
+
+    return vector_ids
+
+def delete_website_batch(website_ids: List[int], db: Session) -> Dict[str, int]:
+    """
+    Delete a batch of websites with their pages and vectors.
+    Vectors are removed first, and websites whose vectors could not all be
+    deleted keep their rows (and the vector IDs on them), so a failure never
+    leaves orphan vectors occupying top_k slots in search without a database
+    row behind them. Deleting them again retries the vectors.
+    """
+    vector_ids_by_website = collect_vector_ids(website_ids, db)
+    vector_ids = list(set().union(*vector_ids_by_website.values())) if vector_ids_by_website else []
+    deleted_vectors, failed = vector_service.delete_vectors_with_failures(vector_ids)
+
+    failed = set(failed)
+    deletable_ids = [
+        website_id for website_id, website_vector_ids in vector_ids_by_website.items()
+        if not website_vector_ids & failed
+    ]
+    kept_websites = len(website_ids) - len(deletable_ids)
+    if kept_websites:
+        logger.warning(f"Kept {kept_websites} websites whose vectors could not be deleted")
+
+    deleted_websites = 0
+    if deletable_ids:
+        db.query(PageKeyword).filter(PageKeyword.website_id.in_(deletable_ids)).delete(synchronize_session=False)
+        db.query(ProviderRetry).filter(ProviderRetry.website_id.in_(deletable_ids)).delete(synchronize_session=False)
+        db.query(Page).filter(Page.website_id.in_(deletable_ids)).delete(synchronize_session=False)
+        deleted_websites = db.query(Website).filter(
+            Website.id.in_(deletable_ids)
+        ).delete(synchronize_session=False)
+
+    return {
+        "deleted_websites": deleted_websites,
+        "failed_websites": kept_websites,
+        "deleted_vectors": deleted_vectors,
+        "failed_vectors": len(failed)
+    }
+
+def replace_website_pages(website_id: int, new_vector_ids: List[str], db: Session) -> int:
+    """
+    Remove a website's stored pages before refreshed ones are added.
+    Vectors of pages that are gone are deleted; the others were just
+    overwritten in place (vector IDs are derived from the page URL).
+    Returns the number of vectors deleted.
+    """
+    keep = set(new_vector_ids)
+    stale_vector_ids = [
+        vector_id
+        for (vector_id,) in db.query(Page.vector_id).filter(Page.website_id == website_id)
+        if vector_id and vector_id not in keep
+    ]
+    deleted_vectors = vector_service.delete_vectors(stale_vector_ids) if stale_vector_ids else 0
+
+    db.query(PageKeyword).filter(PageKeyword.website_id == website_id).delete(synchronize_session=False)
+    db.query(Page).filter(Page.website_id == website_id).delete(synchronize_session=False)
+
+    return deleted_vectors
+
+def resolve_website_ids(criteria: Dict[str, Any], db: Session) -> List[int]:
+    """
+    Resolve bulk delete criteria (explicit IDs and/or filters) to website IDs
+    """
+    query = db.query(Website.id)
+
+    if criteria.get("website_ids") is not None:
+        query = query.filter(Website.id.in_(criteria["website_ids"]))
+
+    query = apply_website_filters(
+        query,
+        min_dr=criteria.get("min_dr"),
+        max_dr=criteria.get("max_dr"),
+        min_traffic=criteria.get("min_traffic"),
+        max_traffic=criteria.get("max_traffic"),
+        min_price=criteria.get("min_price"),
+        max_price=criteria.get("max_price")
+    )
+
+    return [website_id for (website_id,) in query.order_by(Website.id)]
+
+def process_bulk_delete(job_id: int):
+    """
+    Background task to delete many websites:
+    1. Resolve the matching website IDs
+    2. Delete their vectors from Pinecone in parallel chunks
+    3. Delete pages and websites from the database in batches, keeping
+       websites whose vectors could not be deleted
+    4. Record progress on the deletion job after each batch; the job ends
+       "partial" if any website was kept
+    """
+    db = SessionLocal()
+    job = None
+    try:
+        job = db.query(DeletionJob).filter(DeletionJob.id == job_id).first()
+        job.status = "processing"
+
+        website_ids = resolve_website_ids(job.criteria or {}, db)
+        job.total_websites = len(website_ids)
+        db.commit()
+
+        for start in range(0, len(website_ids), DELETE_BATCH_SIZE):
+            batch = website_ids[start:start + DELETE_BATCH_SIZE]
+            try:
+                result = delete_website_batch(batch, db)
+                job.deleted_websites += result["deleted_websites"]
+                job.failed_websites = (job.failed_websites or 0) + result["failed_websites"]
+                job.deleted_vectors += result["deleted_vectors"]
+                job.failed_vectors += result["failed_vectors"]
+                db.commit()
+
+                logger.info(
+                    f"Deletion job {job_id}: deleted {job.deleted_websites}/{job.total_websites} websites"
+                )
+
+            except Exception as e:
+                logger.error(f"Error deleting website batch in job {job_id}: {e}")
+                db.rollback()
+                job.failed_websites = (job.failed_websites or 0) + len(batch)
+                job.error = str(e)
+                db.commit()
+                continue
+
+        # Websites that were kept can be deleted again with the same criteria
+        if job.failed_websites:
+            job.status = "partial"
+            job.error = job.error or f"{job.failed_websites} websites kept because their vectors could not be deleted"
+        else:
+            job.status = "completed"
+        job.completed_at = datetime.utcnow()
+        db.commit()
+
+        logger.info(f"Deletion job {job_id} {job.status}")
+
+    except Exception as e:
+        logger.error(f"Fatal error in process_bulk_delete: {e}")
+        db.rollback()
+        if job:
+            job.status = "failed"
+            job.error = str(e)
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,96 @@
+from sqlalchemy.orm import Session
+from typing import Iterable, Optional
+from app.db.database import SessionLocal
+from app.models.models import Website
+from datetime import datetime
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+FLUSH_CHUNK_SIZE = 500
+FLUSH_INTERVAL_SECONDS = 60
+# Demand beyond this many buffered websites is dropped until the next flush
+MAX_PENDING = 50000
+
+class DemandTracker:
+    """
+    Remembers which websites were returned by searches or exported, so the
+    refresh scheduler can keep them fresher than the rest.
+    IDs are buffered in memory (at most MAX_PENDING) and written by flush()
+    with one UPDATE per chunk, instead of a write on every search request.
+    Flushes run every FLUSH_INTERVAL_SECONDS whether or not refreshes are enabled.
+    """
+
+    def __init__(self):
+        self._pending = set()
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, website_ids: Iterable[int]):
+        with self._lock:
+            for website_id in website_ids:
+                if len(self._pending) >= MAX_PENDING:
+                    self._dropped += 1
+                else:
+                    self._pending.add(website_id)
+
+    def flush(self, db: Session) -> int:
+        """Store the buffered demand as last_demanded_at; returns the number of websites"""
+        with self._lock:
+            website_ids, self._pending = list(self._pending), set()
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            logger.warning(f"Dropped demand of {dropped} websites over the buffer limit")
+
+        now = datetime.utcnow()
+        try:
+            for start in range(0, len(website_ids), FLUSH_CHUNK_SIZE):
+                chunk = website_ids[start:start + FLUSH_CHUNK_SIZE]
+                # Setting updated_at to itself keeps its onupdate from marking the website fresh
+                db.query(Website).filter(Website.id.in_(chunk)).update(
+                    {Website.last_demanded_at: now, Website.updated_at: Website.updated_at},
+                    synchronize_session=False
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.record(website_ids)
+            raise
+        return len(website_ids)
+
+    def _flush_now(self):
+        db = SessionLocal()
+        try:
+            self.flush(db)
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self._flush_now)
+            except Exception as e:
+                logger.error(f"Error flushing website demand: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await asyncio.to_thread(self._flush_now)
+        except Exception as e:
+            logger.error(f"Error flushing website demand: {e}")
+
+demand_tracker = DemandTracker()
\ No newline at end of file
@@ -0,0 +1,119 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Iterator, Optional
+from app.db.database import SessionLocal
+from app.models.models import Website, Page
+from app.services.website_filters import apply_website_filters
+from app.services.keyword_store import filter_by_keyword, get_top_keywords
+from app.services.website_demand import demand_tracker
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FIELDS = ["id", "url", "email", "price", "dr", "traffic", "created_at", "updated_at"]
+
+def _get_page_counts(website_ids: List[int], db: Session) -> Dict[int, int]:
+    """Count pages per website with one grouped query"""
+    rows = db.query(Page.website_id, func.count(Page.id)).filter(
+        Page.website_id.in_(website_ids)
+    ).group_by(Page.website_id)
+    return {website_id: count for website_id, count in rows}
+
+def _serialize_batch(
+    websites: List[Website],
+    db: Session,
+    include_page_counts: bool,
+    include_top_keywords: bool,
+    top_keywords_limit: int
+) -> List[Dict[str, Any]]:
+    website_ids = [website.id for website in websites]
+    # Exported websites are in use, so they are refreshed sooner like search results
+    demand_tracker.record(website_ids)
+    page_counts = _get_page_counts(website_ids, db) if include_page_counts else {}
+    top_keywords = get_top_keywords(website_ids, db, top_keywords_limit) if include_top_keywords else {}
+
+    rows = []
+    for website in websites:
+        row = {field: getattr(website, field) for field in EXPORT_FIELDS}
+        row["created_at"] = website.created_at.isoformat() if website.created_at else None
+        row["updated_at"] = website.updated_at.isoformat() if website.updated_at else None
+        if include_page_counts:
+            row["page_count"] = page_counts.get(website.id, 0)
+        if include_top_keywords:
+            row["top_keywords"] = top_keywords.get(website.id, [])
+        rows.append(row)
+
+    return rows
+
+def _format_csv(rows: List[Dict[str, Any]], fieldnames: List[str], write_header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    if write_header:
+        writer.writeheader()
+    for row in rows:
+        if "top_keywords" in row:
+            row = {**row, "top_keywords": "|".join(row["top_keywords"])}
+        writer.writerow(row)
+    return buffer.getvalue()
+
+def _format_ndjson(rows: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+def stream_websites_export(
+    export_format: str = "csv",
+    filters: Dict[str, Any] = None,
+    include_page_counts: bool = False,
+    include_top_keywords: bool = False,
+    top_keywords_limit: int = 10,
+    keyword: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Stream filtered websites (optionally only those ranking for a keyword)
+    as CSV or NDJSON chunks.
+    Rows are read through a server-side cursor (yield_per) and aggregates are
+    loaded per batch, so memory stays constant regardless of export size.
+    The generator owns its session because it outlives the request scope.
+    """
+    fieldnames = list(EXPORT_FIELDS)
+    if include_page_counts:
+        fieldnames.append("page_count")
+    if include_top_keywords:
+        fieldnames.append("top_keywords")
+
+    db = SessionLocal()
+    try:
+        query = apply_website_filters(db.query(Website), **(filters or {}))
+        if keyword:
+            query = filter_by_keyword(query, keyword, db)
+        query = query.order_by(Website.id).yield_per(EXPORT_BATCH_SIZE)
+
+        if export_format == "csv":
+            yield _format_csv([], fieldnames, write_header=True)
+
+        batch = []
+        exported = 0
+        for website in query:
+            batch.append(website)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                rows = _serialize_batch(batch, db, include_page_counts, include_top_keywords, top_keywords_limit)
+                yield _format_csv(rows, fieldnames, write_header=False) if export_format == "csv" else _format_ndjson(rows)
+                exported += len(batch)
+                batch = []
+
+        if batch:
+            rows = _serialize_batch(batch, db, include_page_counts, include_top_keywords, top_keywords_limit)
+            yield _format_csv(rows, fieldnames, write_header=False) if export_format == "csv" else _format_ndjson(rows)
+            exported += len(batch)
+
+        logger.info(f"Exported {exported} websites as {export_format}")
+
+    except Exception as e:
+        logger.error(f"Error streaming website export: {e}")
+        raise
+    finally:
+        db.close()
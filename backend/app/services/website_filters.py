@@ -0,0 +1,32 @@
+from sqlalchemy.orm import Query
+from typing import Optional
+from app.models.models import Website
+
+def apply_website_filters(
+    query: Query,
+    min_dr: Optional[int] = None,
+    max_dr: Optional[int] = None,
+    min_traffic: Optional[int] = None,
+    max_traffic: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+) -> Query:
+    """
+    Apply the DR/traffic/price filters shared by search, export and bulk operations
+    """
+    if min_dr is not None:
+        query = query.filter(Website.dr >= min_dr)
+    if max_dr is not None:
+        query = query.filter(Website.dr <= max_dr)
+
+    if min_traffic is not None:
+        query = query.filter(Website.traffic >= min_traffic)
+    if max_traffic is not None:
+        query = query.filter(Website.traffic <= max_traffic)
+
+    if min_price is not None:
+        query = query.filter(Website.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Website.price <= max_price)
+
+    return query
@@ -0,0 +1,70 @@
+"""
+Compare two benchmark result files produced by benchmarks.run or benchmarks.startup.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+
+Exits with code 1 when any tracked metric regresses by more than the
+threshold percentage.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Optional
+
+# (path, higher_is_better)
+TRACKED_METRICS = [
+    ("search.search_websites.p50_ms", False),
+    ("search.search_websites.p95_ms", False),
+    ("search.search_websites.p99_ms", False),
+    ("search.search_websites.peak_memory_kb", False),
+    ("search.get_search_filters.p50_ms", False),
+    ("search.get_search_filters.p95_ms", False),
+    ("search.get_search_filters.p99_ms", False),
+    ("search.get_search_filters.peak_memory_kb", False),
+    ("import.websites_per_second", True),
+    ("import.peak_memory_kb", False),
+    ("total_ms.median", False)
+]
+
+def lookup(results: Dict, path: str) -> Optional[float]:
+    value = results
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    print(f"baseline: {lookup(baseline, 'meta.commit')}  current: {lookup(current, 'meta.commit')}")
+    print(f"{'metric':<45} {'baseline':>12} {'current':>12} {'change':>9}")
+
+    regressions = []
+    for path, higher_is_better in TRACKED_METRICS:
+        before = lookup(baseline, path)
+        after = lookup(current, path)
+        if before is None or after is None:
+            continue
+
+        change = ((after - before) / before * 100) if before else 0.0
+        regressed = change < -args.threshold if higher_is_better else change > args.threshold
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{path:<45} {before:>12.2f} {after:>12.2f} {change:>+8.1f}%{marker}")
+
+        if regressed:
+            regressions.append(path)
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
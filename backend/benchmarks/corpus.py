@@ -0,0 +1,163 @@
+"""
+Deterministic synthetic corpora for the benchmarks.
+
+Websites are grouped around topics so keyword similarity search returns
+clustered, realistic-looking candidate sets. The same seed always produces the
+same corpus, which keeps results comparable between commits.
+"""
+import random
+from typing import List, Dict, Iterator
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+TOPICS = [
+    "seo", "marketing", "fitness", "travel", "finance", "crypto", "recipes", "gardening",
+    "parenting", "fashion", "beauty", "gaming", "software", "cloud", "security", "health",
+    "nutrition", "yoga", "photography", "music", "movies", "books", "education", "career",
+    "real estate", "insurance", "loans", "cars", "motorcycles", "cycling", "running", "hiking",
+    "camping", "fishing", "pets", "dogs", "cats", "home decor", "diy", "woodworking",
+    "wedding", "dating", "mental health", "skincare", "coffee", "wine", "beer", "vegan",
+    "keto", "startups", "ecommerce", "dropshipping", "web design", "wordpress", "hosting",
+    "smartphones", "laptops", "smart home", "solar", "electric cars"
+]
+
+MODIFIERS = [
+    "best", "cheap", "top", "how to", "guide", "tips", "review", "free", "online", "local",
+    "professional", "beginner", "advanced", "ultimate", "easy", "fast", "affordable", "premium",
+    "trending", "new", "2024", "vs", "alternatives", "tools", "services", "ideas", "examples",
+    "checklist", "course", "strategy", "software", "near me", "for beginners", "for business",
+    "for kids", "at home", "comparison", "statistics", "trends", "mistakes"
+]
+
+SUFFIXES = ["", "blog", "uk", "usa", "2025", "online", "course", "app", "kit", "plan"]
+
+VOCABULARY_BLOCK = len(MODIFIERS) * len(TOPICS) * len(SUFFIXES)
+
+def keyword(i: int) -> str:
+    """The i-th keyword of the unbounded synthetic vocabulary"""
+    modifier = MODIFIERS[i % len(MODIFIERS)]
+    topic = TOPICS[(i // len(MODIFIERS)) % len(TOPICS)]
+    suffix = SUFFIXES[(i // (len(MODIFIERS) * len(TOPICS))) % len(SUFFIXES)]
+    text = f"{modifier} {topic} {suffix}".strip()
+    if i >= VOCABULARY_BLOCK:
+        text = f"{text} {i // VOCABULARY_BLOCK}"
+    return text
+
+def keywords_for_domain(domain: str, count: int, vocabulary_size: int = VOCABULARY_BLOCK) -> List[str]:
+    """
+    Keywords for a site, clustered around one topic picked from the domain
+    """
+    rng = random.Random(domain)
+    topic = rng.randrange(len(TOPICS))
+    keywords = []
+    for _ in range(count):
+        block = rng.randrange(max(1, vocabulary_size // (len(MODIFIERS) * len(TOPICS))))
+        i = block * len(MODIFIERS) * len(TOPICS) + topic * len(MODIFIERS) + rng.randrange(len(MODIFIERS))
+        keywords.append(keyword(i % vocabulary_size))
+    return keywords
+
+def search_queries(count: int, seed: int = 7) -> List[str]:
+    """Search keywords drawn from the same topics as the corpus"""
+    rng = random.Random(seed)
+    return [f"{rng.choice(MODIFIERS)} {rng.choice(TOPICS)}" for _ in range(count)]
+
+def import_rows(count: int, offset: int = 0) -> List[Dict]:
+    """CSV-shaped rows as produced by the import endpoint"""
+    rng = random.Random(offset)
+    return [
+        {
+            "url": f"import-{offset + i}.example.com",
+            "email": f"owner@import-{offset + i}.example.com",
+            "price": round(rng.uniform(20, 2000), 2)
+        }
+        for i in range(count)
+    ]
+
+def _chunks(total: int, size: int) -> Iterator[range]:
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+def seed_corpus(
+    db: Session,
+    index,
+    scale: int,
+    pages_per_site: int = 5,
+    keywords_per_page: int = 3,
+    chunk_size: int = 5000,
+    seed: int = 42
+) -> Dict[str, int]:
+    """
+    Bulk load `scale` websites with their pages, interned keywords and vectors
+    straight into the database and the fake index, bypassing the providers
+    """
+    from app.models.models import Website, Page, Keyword, PageKeyword
+    from app.services.vector_service import VectorService
+    from benchmarks.fakes import fake_embedding
+
+    rng = random.Random(seed)
+    vocabulary_size = max(1000, min(scale * 2, VOCABULARY_BLOCK * 20))
+
+    for ids in _chunks(vocabulary_size, chunk_size):
+        db.execute(insert(Keyword), [{"id": i + 1, "text": keyword(i)} for i in ids])
+    db.commit()
+    keyword_ids = {keyword(i): i + 1 for i in range(vocabulary_size)}
+
+    page_id = 0
+    for site_ids in _chunks(scale, chunk_size):
+        websites, pages, page_keywords = [], [], []
+        vector_ids, vectors, metadata = [], [], []
+
+        for i in site_ids:
+            domain = f"site-{i}.example.com"
+            url = f"https://{domain}"
+            dr = rng.randint(1, 95)
+            websites.append({
+                "id": i + 1,
+                "url": url,
+                "domain": domain,
+                "email": f"owner@{domain}",
+                "price": round(rng.uniform(20, 2000), 2),
+                "dr": dr,
+                "traffic": int(rng.lognormvariate(8, 2)),
+                "keywords_data": {"total_pages": pages_per_site, "vectorized_pages": pages_per_site}
+            })
+
+            site_keywords = keywords_for_domain(domain, pages_per_site * keywords_per_page, vocabulary_size)
+            for p in range(pages_per_site):
+                page_id += 1
+                page_url = f"{url}/page-{p}"
+                vector_id = VectorService.make_vector_id(url, page_url)
+                page_keyword_texts = list(dict.fromkeys(
+                    site_keywords[p * keywords_per_page:(p + 1) * keywords_per_page]
+                ))
+                position = rng.randint(1, 100)
+                search_volume = rng.randint(10, 50000)
+
+                pages.append({"id": page_id, "website_id": i + 1, "url": page_url, "vector_id": vector_id})
+                for k, text in enumerate(page_keyword_texts):
+                    page_keywords.append({
+                        "page_id": page_id,
+                        "keyword_id": keyword_ids[text],
+                        "website_id": i + 1,
+                        "position": position if k == 0 else None,
+                        "search_volume": search_volume if k == 0 else None
+                    })
+
+                vector_ids.append(vector_id)
+                vectors.append(fake_embedding(" ".join(page_keyword_texts), index.dimension))
+                metadata.append({
+                    "website_url": url,
+                    "page_url": page_url,
+                    "position": position,
+                    "search_volume": search_volume
+                })
+
+        db.execute(insert(Website), websites)
+        db.execute(insert(Page), pages)
+        db.execute(insert(PageKeyword), page_keywords)
+        db.commit()
+        index.load(vector_ids, np.asarray(vectors, dtype=np.float32), metadata)
+
+    return {"websites": scale, "pages": page_id, "keywords": vocabulary_size}
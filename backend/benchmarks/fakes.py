@@ -0,0 +1,204 @@
+"""
+In-process fakes for the external providers.
+
+The fakes replace the HTTP session, OpenAI client and Pinecone index on the
+existing service singletons, so the real service code (request building,
+response parsing, batching) still runs; only the network is simulated.
+Responses are deterministic per domain/text, and each call sleeps for the
+configured latency.
+"""
+import hashlib
+import random
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import List, Dict
+
+from benchmarks.corpus import keywords_for_domain
+from emulator.pinecone import EmulatedIndex
+
+@dataclass
+class LatencyConfig:
+    """Simulated per-call latency in milliseconds"""
+    ahrefs_ms: float = 0.0
+    dataforseo_ms: float = 0.0
+    embedding_ms: float = 0.0
+    vector_ms: float = 0.0
+
+def _sleep(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000.0)
+
+def _seed(value: str) -> int:
+    return int(hashlib.md5(value.encode()).hexdigest()[:8], 16)
+
+class FakeResponse:
+    def __init__(self, payload: Dict, status_code: int = 200):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = {}
+
+    def json(self):
+        return self._payload
+
+class FakeAhrefsSession:
+    """Stands in for AhrefsService.session, serving from an in-process emulator.AhrefsEmulator"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        from emulator.ahrefs import AhrefsEmulator
+
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self.emulator = AhrefsEmulator()
+
+    def get(self, url: str, params: Dict = None, headers: Dict = None, **kwargs):
+        _sleep(self.latency_ms)
+        self.calls += 1
+        target = (params or {}).get("target", "")
+        data = None
+        if url.endswith("/domain-rating"):
+            data = self.emulator.domain_rating(target)
+        elif url.endswith("/organic-traffic"):
+            data = self.emulator.organic_traffic(target)
+        if data is None:
+            return FakeResponse({}, status_code=404)
+        return FakeResponse(data)
+
+class FakeDataForSEOSession:
+    """
+    Stands in for DataForSEOService.session, serving both the live endpoint
+    and the task flow from an in-process emulator.DataForSEOEmulator
+    """
+
+    def __init__(self, latency_ms: float = 0.0, pages_per_site: int = 5):
+        from emulator.dataforseo import DataForSEOEmulator
+
+        self.latency_ms = latency_ms
+        self.pages_per_site = pages_per_site
+        self.calls = 0
+        # Tasks take as long as a live request would
+        self.emulator = DataForSEOEmulator(items=self._items, task_delay_seconds=latency_ms / 1000.0)
+
+    def _items(self, domain: str, offset: int, limit: int):
+        items = fake_serp_items(domain, self.pages_per_site)
+        return items[offset:offset + limit], len(items)
+
+    def post(self, url: str, json: List[Dict] = None, headers: Dict = None, **kwargs):
+        self.calls += 1
+        if url.endswith("/task_post"):
+            return FakeResponse(self.emulator.task_post(json or []))
+        _sleep(self.latency_ms)
+        return FakeResponse(self.emulator.live(json or [{}]))
+
+    def get(self, url: str, headers: Dict = None, **kwargs):
+        self.calls += 1
+        if url.endswith("/tasks_ready"):
+            return FakeResponse(self.emulator.tasks_ready())
+        if "/task_get/regular/" in url:
+            return FakeResponse(self.emulator.task_get(url.rsplit("/", 1)[1]))
+        return FakeResponse({}, status_code=404)
+
+def fake_serp_items(domain: str, count: int) -> List[Dict]:
+    """Deterministic organic result items for a domain"""
+    rng = random.Random(_seed(domain))
+    keywords = keywords_for_domain(domain, count * 3)
+    items = []
+    for i in range(count):
+        items.append({
+            "url": f"https://{domain}/page-{i}",
+            "keyword": keywords[i],
+            "rank_absolute": rng.randint(1, 100),
+            "keyword_data": {
+                "search_volume": rng.randint(10, 50000),
+                "keyword_info": {"related_keywords": keywords[count + 2 * i:count + 2 * i + 2]}
+            }
+        })
+    return items
+
+def fake_embedding(text: str, dimension: int) -> List[float]:
+    """Same hashed bag-of-words embedding the OpenAI emulator serves"""
+    from emulator.openai import embed_text
+
+    return embed_text(text, dimension).tolist()
+
+class FakeOpenAIClient:
+    """Stands in for VectorService.openai_client"""
+
+    def __init__(self, dimension: int, latency_ms: float = 0.0):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self.embeddings = SimpleNamespace(create=self._create)
+
+    def _create(self, input: List[str], model: str, **kwargs):
+        _sleep(self.latency_ms)
+        self.calls += 1
+        return SimpleNamespace(data=[
+            SimpleNamespace(embedding=fake_embedding(text, self.dimension)) for text in input
+        ])
+
+class FakeIndex(EmulatedIndex):
+    """
+    emulator.pinecone.EmulatedIndex behind the subset of the Pinecone
+    Index API the services use (upsert, query, delete), with latency
+    """
+
+    def __init__(self, dimension: int, latency_ms: float = 0.0, capacity: int = 1024):
+        super().__init__("fake", dimension, capacity=capacity)
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def upsert(self, vectors: List[Dict], namespace: str = None, **kwargs):
+        _sleep(self.latency_ms)
+        self.calls += 1
+        return SimpleNamespace(upserted_count=super().upsert(vectors, namespace or ""))
+
+    def query(self, vector: List[float], top_k: int = 10, include_metadata: bool = False,
+              filter: Dict = None, namespace: str = None, **kwargs):
+        _sleep(self.latency_ms)
+        self.calls += 1
+        matches = super().query(vector, top_k, namespace or "", filter)
+        return SimpleNamespace(matches=[
+            SimpleNamespace(
+                id=match["id"],
+                score=match["score"],
+                metadata=match["metadata"] if include_metadata else None
+            )
+            for match in matches
+        ])
+
+    def delete(self, ids: List[str] = None, namespace: str = None, **kwargs):
+        _sleep(self.latency_ms)
+        self.calls += 1
+        super().delete(ids, namespace or "")
+
+
+def install_fakes(latency: LatencyConfig, dimension: int = 64, pages_per_site: int = 5) -> Dict:
+    """
+    Swap the provider clients on the service singletons for fakes.
+    Returns the installed fakes so callers can inspect call counts or seed the index.
+    """
+    from app.services.ahrefs_service import ahrefs_service
+    from app.services.dataforseo_service import dataforseo_service
+    from app.services.vector_service import vector_service
+
+    fakes = {
+        "ahrefs": FakeAhrefsSession(latency.ahrefs_ms),
+        "dataforseo": FakeDataForSEOSession(latency.dataforseo_ms, pages_per_site),
+        "openai": FakeOpenAIClient(dimension, latency.embedding_ms),
+        "index": FakeIndex(dimension, latency.vector_ms)
+    }
+
+    ahrefs_service.api_key = "fake"
+    ahrefs_service._session = fakes["ahrefs"]
+
+    dataforseo_service.login = "fake"
+    dataforseo_service.password = "fake"
+    dataforseo_service._session = fakes["dataforseo"]
+
+    vector_service.openai_api_key = "fake"
+    vector_service.pinecone_api_key = "fake"
+    vector_service._openai_client = fakes["openai"]
+    vector_service._index = fakes["index"]
+
+    return fakes
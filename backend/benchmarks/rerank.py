@@ -0,0 +1,70 @@
+"""
+Micro-benchmark for the search re-ranking stage.
+
+Builds the feature matrix and scores it for synthetic candidate sets, which is
+what each search pays on top of the vector query. Fails with exit code 1 when
+the median for the largest candidate set exceeds the budget.
+
+    cd backend && python -m benchmarks.rerank --candidates 100 300 500 --budget-ms 1
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+DEFAULT_BUDGET_MS = 1.0
+
+def random_candidates(count: int, rng: random.Random) -> dict:
+    maybe = lambda value: value if rng.random() > 0.1 else None
+    return {
+        "similarity": [rng.uniform(0.2, 0.9) for _ in range(count)],
+        "position": [maybe(rng.randint(1, 100)) for _ in range(count)],
+        "search_volume": [maybe(rng.randint(0, 100_000)) for _ in range(count)],
+        "dr": [maybe(rng.randint(0, 100)) for _ in range(count)],
+        "traffic": [maybe(rng.randint(0, 5_000_000)) for _ in range(count)],
+        "price": [rng.uniform(10, 2000) for _ in range(count)]
+    }
+
+def bench(count: int, samples: int) -> dict:
+    from app.services.reranker import reranker
+
+    rng = random.Random(count)
+    candidates = random_candidates(count, rng)
+
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        reranker.rank(reranker.feature_matrix(**candidates))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "candidates": count,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1],
+        "max_ms": timings[-1]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure search re-ranking cost")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[100, 300, 500])
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    results = [bench(count, args.samples) for count in sorted(args.candidates)]
+    result = {
+        "benchmark": "rerank",
+        "samples": args.samples,
+        "budget_ms": args.budget_ms,
+        "results": results,
+        "within_budget": results[-1]["p50_ms"] <= args.budget_ms
+    }
+
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["within_budget"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Search and import benchmark suite.
+
+Seeds a synthetic corpus, swaps the external providers for in-process fakes
+with configurable latency, and measures:
+- process_website_data throughput
+- search_websites and get_search_filters latency percentiles
+- peak traced memory per operation
+
+Results are written as JSON so runs can be compared between commits with
+benchmarks.compare.
+
+    cd backend && python -m benchmarks.run --scale 10k --output bench-10k.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+def parse_scale(value: str) -> int:
+    if value in SCALES:
+        return SCALES[value]
+    return int(value)
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1]
+    }
+
+def peak_memory_kb(operation: Callable[[], None], repeat: int) -> float:
+    """Peak traced allocation of one operation, the worst of `repeat` runs"""
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        operation()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak / 1024
+
+def git_revision() -> Dict[str, object]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True
+        ).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except Exception:
+        return {"commit": None, "dirty": None}
+
+def random_search_request(keyword: str, rng: random.Random):
+    from app.schemas.search import SearchRequest
+
+    request = {"keyword": keyword, "limit": 20}
+    if rng.random() < 0.5:
+        request["min_dr"] = rng.choice([10, 20, 30, 40])
+    if rng.random() < 0.3:
+        request["max_price"] = rng.choice([200.0, 500.0, 1000.0])
+    if rng.random() < 0.3:
+        request["min_traffic"] = rng.choice([100, 1000, 10000])
+    return SearchRequest(**request)
+
+def run_search(request, db):
+    from fastapi import Response
+    from app.api.endpoints.search import search_websites
+    return search_websites(request=request, response=Response(), timing=False, db=db)
+
+def run_filters(db):
+    from app.api.endpoints.search import get_search_filters
+    return get_search_filters(db=db)
+
+def bench_search(queries: List[str], memory_samples: int) -> Dict[str, Dict]:
+    from app.db.database import SessionLocal
+
+    rng = random.Random(11)
+    requests = [random_search_request(q, rng) for q in queries]
+
+    def timed(operation: Callable) -> List[float]:
+        samples = []
+        for item in requests:
+            db = SessionLocal()
+            try:
+                start = time.perf_counter()
+                operation(item, db)
+                samples.append((time.perf_counter() - start) * 1000)
+            finally:
+                db.close()
+        return samples
+
+    def once(operation: Callable, item) -> Callable[[], None]:
+        def run():
+            db = SessionLocal()
+            try:
+                operation(item, db)
+            finally:
+                db.close()
+        return run
+
+    search = lambda item, db: run_search(item, db)
+    filters = lambda item, db: run_filters(db)
+
+    # Warm caches and connection pools before measuring
+    for item in requests[:10]:
+        once(search, item)()
+        once(filters, item)()
+
+    search_stats = percentiles(timed(search))
+    search_stats["peak_memory_kb"] = peak_memory_kb(once(search, requests[0]), memory_samples)
+
+    filters_stats = percentiles(timed(filters))
+    filters_stats["peak_memory_kb"] = peak_memory_kb(once(filters, requests[0]), memory_samples)
+
+    return {"search_websites": search_stats, "get_search_filters": filters_stats}
+
+def bench_import(sites: int, offset: int, fakes: Dict) -> Dict:
+    from app.db.database import SessionLocal
+    from app.models.models import User, Import
+    from app.services.data_processor import process_website_data
+    from benchmarks.corpus import import_rows
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "bench@example.com").first()
+        if not user:
+            user = User(email="bench@example.com", hashed_password="-")
+            db.add(user)
+            db.commit()
+
+        def run_import(rows: List[Dict]) -> float:
+            import_record = Import(user_id=user.id, filename="bench.csv", total_websites=len(rows), status="processing")
+            db.add(import_record)
+            db.commit()
+            start = time.perf_counter()
+            process_website_data(rows, import_record.id, db)
+            return time.perf_counter() - start
+
+        calls_before = {name: getattr(fake, "calls", 0) for name, fake in fakes.items()}
+        elapsed = run_import(import_rows(sites, offset))
+        calls = {name: getattr(fake, "calls", 0) - calls_before[name] for name, fake in fakes.items()}
+
+        memory_rows = import_rows(min(sites, 20), offset + sites)
+        tracemalloc.start()
+        run_import(memory_rows)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            "websites": sites,
+            "seconds": elapsed,
+            "websites_per_second": sites / elapsed if elapsed else None,
+            "provider_calls": calls,
+            "peak_memory_kb": peak / 1024,
+            "peak_memory_sites": len(memory_rows)
+        }
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search and import with fake providers")
+    parser.add_argument("--scale", default="10k", help="Corpus size in websites: 10k, 100k, 1M or a number")
+    parser.add_argument("--pages-per-site", type=int, default=5)
+    parser.add_argument("--keywords-per-page", type=int, default=3)
+    parser.add_argument("--dimension", type=int, default=64, help="Fake embedding dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--import-sites", type=int, default=500)
+    parser.add_argument("--memory-samples", type=int, default=3)
+    parser.add_argument("--ahrefs-ms", type=float, default=0.0, help="Simulated Ahrefs latency per call")
+    parser.add_argument("--dataforseo-ms", type=float, default=0.0, help="Simulated DataForSEO latency per call")
+    parser.add_argument("--embedding-ms", type=float, default=0.0, help="Simulated embedding latency per call")
+    parser.add_argument("--vector-ms", type=float, default=0.0, help="Simulated Pinecone latency per call")
+    parser.add_argument("--dataforseo-mode", default="auto", choices=["auto", "live", "tasks"])
+    parser.add_argument("--poll-interval", type=float, default=0.02, help="DataForSEO tasks_ready poll interval in seconds")
+    parser.add_argument("--database-url", default=None, help="Defaults to a fresh temporary SQLite file")
+    parser.add_argument(
+        "--reset-database",
+        action="store_true",
+        help="Drop and recreate all tables of --database-url; required with --database-url, which the corpus overwrites"
+    )
+    parser.add_argument("--output", default=None, help="Write JSON results here as well as stdout")
+    args = parser.parse_args()
+    if args.database_url and not args.reset_database:
+        parser.error("--database-url drops every table of that database; pass --reset-database to confirm")
+
+    scale = parse_scale(args.scale)
+    workdir = tempfile.mkdtemp(prefix="lqs-bench-")
+
+    # Settings are read at import, so configure the environment first
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["AUTO_CREATE_SCHEMA"] = "false"
+    os.environ["DATAFORSEO_MODE"] = args.dataforseo_mode
+    os.environ["DATAFORSEO_POLL_INTERVAL_SECONDS"] = str(args.poll_interval)
+    os.environ["EMBEDDING_DIMENSION"] = str(args.dimension)
+    logging.basicConfig(level=logging.WARNING)
+
+    from app.db.database import Base, engine, SessionLocal
+    from app.db.init_db import init_db
+    from benchmarks.corpus import seed_corpus, search_queries
+    from benchmarks.fakes import LatencyConfig, install_fakes
+
+    # The default temporary database starts empty; only an explicit reset drops tables
+    if args.database_url:
+        Base.metadata.drop_all(bind=engine)
+    init_db()
+
+    latency = LatencyConfig(
+        ahrefs_ms=args.ahrefs_ms,
+        dataforseo_ms=args.dataforseo_ms,
+        embedding_ms=args.embedding_ms,
+        vector_ms=args.vector_ms
+    )
+    fakes = install_fakes(latency, dimension=args.dimension, pages_per_site=args.pages_per_site)
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        corpus = seed_corpus(db, fakes["index"], scale, args.pages_per_site, args.keywords_per_page)
+        corpus["seed_seconds"] = time.perf_counter() - start
+    finally:
+        db.close()
+
+    results = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "args": vars(args)
+        },
+        "corpus": corpus,
+        "search": bench_search(search_queries(args.queries), args.memory_samples),
+        "import": bench_import(args.import_sites, scale, fakes)
+    }
+
+    engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Cold start benchmark for the API workers.
+
+Each sample runs in a fresh interpreter and measures importing app.main and
+running the startup handlers, i.e. what a new uvicorn worker pays before it can
+accept requests. Fails with exit code 1 when the median exceeds the budget.
+
+    cd backend && python -m benchmarks.startup --samples 5 --budget-ms 2500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 2500
+
+SAMPLE_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+asyncio.run(app.router.startup())
+ready = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "startup_ms": (ready - imported) * 1000}))
+"""
+
+def run_sample(env: dict) -> dict:
+    process = subprocess.run(
+        [sys.executable, "-c", SAMPLE_SCRIPT],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Startup sample failed:\n{process.stderr}")
+    sample = json.loads(process.stdout.strip().splitlines()[-1])
+    sample["total_ms"] = sample["import_ms"] + sample["startup_ms"]
+    return sample
+
+def summarize(samples: list, key: str) -> dict:
+    values = sorted(sample[key] for sample in samples)
+    return {
+        "median": statistics.median(values),
+        "min": values[0],
+        "max": values[-1]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API worker cold start time")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--with-schema", action="store_true", help="Include create_all in the startup handlers")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    if not args.with_schema:
+        env["AUTO_CREATE_SCHEMA"] = "false"
+
+    samples = [run_sample(env) for _ in range(args.samples)]
+    result = {
+        "benchmark": "startup",
+        "samples": args.samples,
+        "budget_ms": args.budget_ms,
+        "import_ms": summarize(samples, "import_ms"),
+        "startup_ms": summarize(samples, "startup_ms"),
+        "total_ms": summarize(samples, "total_ms")
+    }
+    result["within_budget"] = result["total_ms"]["median"] <= args.budget_ms
+
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["within_budget"] else 1)
+
+if __name__ == "__main__":
+    main()
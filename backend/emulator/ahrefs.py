@@ -0,0 +1,67 @@
+"""
+Ahrefs emulator for the two endpoints AhrefsService calls:
+GET /domain-rating and GET /organic-traffic with ?target=<domain>.
+
+Values are deterministic per domain; a small share of domains is unknown to
+Ahrefs and answers 404, which the service treats as "no data".
+"""
+import hashlib
+import random
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+
+def _rng(domain: str) -> random.Random:
+    return random.Random(int(hashlib.md5(domain.encode()).hexdigest()[:8], 16))
+
+def known_domain(domain: str) -> bool:
+    return _rng(f"known:{domain}").random() >= 0.02
+
+def domain_rating(domain: str) -> int:
+    return _rng(domain).randint(1, 95)
+
+def organic_traffic(domain: str) -> int:
+    rng = _rng(domain)
+    rng.random()
+    return int(rng.lognormvariate(8, 2))
+
+class AhrefsEmulator:
+    def __init__(self):
+        self.requests = 0
+
+    def domain_rating(self, target: str) -> Optional[Dict]:
+        self.requests += 1
+        if not known_domain(target):
+            return None
+        return {"domain_rating": domain_rating(target)}
+
+    def organic_traffic(self, target: str) -> Optional[Dict]:
+        self.requests += 1
+        if not known_domain(target):
+            return None
+        return {"traffic": organic_traffic(target)}
+
+def create_router(emulator: AhrefsEmulator) -> APIRouter:
+    router = APIRouter()
+
+    def check_auth(authorization: Optional[str]):
+        if not authorization or not authorization.startswith("Bearer "):
+            raise HTTPException(status_code=401, detail="Bearer token required")
+
+    @router.get("/domain-rating")
+    def get_domain_rating(target: str = Query(...), authorization: Optional[str] = Header(None)):
+        check_auth(authorization)
+        data = emulator.domain_rating(target)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Target not found")
+        return data
+
+    @router.get("/organic-traffic")
+    def get_organic_traffic(target: str = Query(...), authorization: Optional[str] = Header(None)):
+        check_auth(authorization)
+        data = emulator.organic_traffic(target)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Target not found")
+        return data
+
+    return router
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Local stand-ins for external providers, for development, load tests and
+exercising failure handling without paid API calls.
+
+    cd backend && uvicorn emulator.app:app --port 9100
+
+then point the API at it (any non-empty API keys are accepted):
+
+    AHREFS_BASE_URL=http://localhost:9100/ahrefs/v2
+    DATAFORSEO_BASE_URL=http://localhost:9100/dataforseo/v3
+    OPENAI_BASE_URL=http://localhost:9100/openai/v1
+    PINECONE_HOST=http://localhost:9100/pinecone
+
+Latency and failures are injected per provider from the environment, e.g.
+
+    EMULATOR_LATENCY_MS=50 EMULATOR_JITTER_MS=20
+    EMULATOR_AHREFS_THROTTLE_RATE=0.05 EMULATOR_AHREFS_RETRY_AFTER_SECONDS=2
+    EMULATOR_OPENAI_ERROR_RATE=0.01 EMULATOR_OPENAI_ERROR_STATUS=503
+
+and can be changed at runtime with PUT /_emulator/faults/{provider}.
+GET /_emulator/stats reports requests per provider and outcome.
+"""
+import os
+from typing import Dict
+
+from fastapi import Body, FastAPI, HTTPException
+
+from emulator import ahrefs, dataforseo, openai, pinecone
+from emulator.faults import FaultConfig, FaultInjector, FaultMiddleware
+
+PREFIXES = {
+    "ahrefs": "/ahrefs/v2",
+    "dataforseo": "/dataforseo/v3",
+    "openai": "/openai/v1",
+    "pinecone": "/pinecone"
+}
+
+app = FastAPI(title="Provider emulator")
+
+emulators = {
+    "ahrefs": ahrefs.AhrefsEmulator(),
+    "dataforseo": dataforseo.DataForSEOEmulator(task_delay_seconds=float(os.environ.get("EMULATOR_TASK_DELAY_SECONDS", "1"))),
+    "openai": openai.OpenAIEmulator(),
+    "pinecone": pinecone.PineconeEmulator()
+}
+
+app.include_router(ahrefs.create_router(emulators["ahrefs"]), prefix=PREFIXES["ahrefs"], tags=["ahrefs"])
+app.include_router(dataforseo.create_router(emulators["dataforseo"]), prefix=PREFIXES["dataforseo"], tags=["dataforseo"])
+app.include_router(openai.create_router(emulators["openai"]), prefix=PREFIXES["openai"], tags=["openai"])
+app.include_router(pinecone.create_router(emulators["pinecone"], PREFIXES["pinecone"]), prefix=PREFIXES["pinecone"], tags=["pinecone"])
+
+seed = os.environ.get("EMULATOR_SEED")
+faults = FaultInjector({provider: FaultConfig.from_env(provider) for provider in PREFIXES}, seed=int(seed) if seed else None)
+app.add_middleware(FaultMiddleware, injector=faults, prefixes=PREFIXES)
+
+@app.get("/_emulator/stats")
+def stats():
+    return {
+        provider: {
+            "handled": emulator.requests,
+            "responses": faults.counts.get(provider, {}),
+            "faults": vars(faults.configs[provider])
+        }
+        for provider, emulator in emulators.items()
+    }
+
+@app.put("/_emulator/faults/{provider}")
+def update_faults(provider: str, changes: Dict = Body(...)):
+    if provider not in faults.configs:
+        raise HTTPException(status_code=404, detail=f"Unknown provider: {provider}")
+    config = faults.configs[provider]
+    unknown = set(changes) - set(vars(config))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fault settings: {', '.join(sorted(unknown))}")
+    faults.configs[provider] = FaultConfig(**{**vars(config), **changes})
+    return vars(faults.configs[provider])
\ No newline at end of file
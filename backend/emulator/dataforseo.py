@@ -0,0 +1,154 @@
+"""
+DataForSEO emulator for the SERP organic API: the live endpoint and the
+task flow (task_post / tasks_ready / task_get).
+
+Items are generated deterministically per domain and some domains have more
+than 1000 items, so pagination with offset is exercised. Posted tasks become
+ready after a configurable delay and can be collected once.
+"""
+import hashlib
+import random
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Body, Header, HTTPException
+
+# (domain, offset, limit) -> (items, total_count)
+ItemsSource = Callable[[str, int, int], Tuple[List[Dict], int]]
+
+def _seed(value: str) -> int:
+    return int(hashlib.md5(value.encode()).hexdigest()[:8], 16)
+
+def total_items(domain: str) -> int:
+    """Most domains rank for a few dozen pages; one in ten for thousands"""
+    rng = random.Random(_seed(domain))
+    if rng.random() < 0.1:
+        return rng.randint(1500, 3500)
+    return rng.randint(5, 60)
+
+def synthetic_item(domain: str, i: int) -> Dict:
+    rng = random.Random(_seed(f"{domain}:{i}"))
+    words = domain.split(".")[0].replace("-", " ")
+    return {
+        "type": "organic",
+        "url": f"https://{domain}/page-{i // 3}",
+        "keyword": f"{words} topic {i}",
+        "rank_absolute": rng.randint(1, 100),
+        "keyword_data": {
+            "search_volume": rng.randint(10, 50000),
+            "keyword_info": {"related_keywords": [f"{words} related {i}-{j}" for j in range(2)]}
+        }
+    }
+
+def synthetic_items(domain: str, offset: int, limit: int) -> Tuple[List[Dict], int]:
+    total = total_items(domain)
+    return [synthetic_item(domain, i) for i in range(offset, min(offset + limit, total))], total
+
+def _envelope(tasks: List[Dict]) -> Dict:
+    return {
+        "version": "0.1.emulator",
+        "status_code": 20000,
+        "status_message": "Ok.",
+        "tasks_count": len(tasks),
+        "tasks_error": sum(1 for task in tasks if task["status_code"] >= 40000),
+        "tasks": tasks
+    }
+
+class DataForSEOEmulator:
+    def __init__(self, items: ItemsSource = synthetic_items, task_delay_seconds: float = 0.0):
+        self.items = items
+        self.task_delay_seconds = task_delay_seconds
+        self.requests = 0
+        self._tasks: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _result(self, data: Dict) -> List[Dict]:
+        limit = min(int(data.get("limit", 100)), 1000)
+        items, total = self.items(data.get("domain", ""), int(data.get("offset", 0)), limit)
+        return [{
+            "total_count": total,
+            "items_count": len(items),
+            "items": items
+        }]
+
+    def live(self, payload: List[Dict]) -> Dict:
+        self.requests += 1
+        tasks = [
+            {"id": str(uuid.uuid4()), "status_code": 20000, "status_message": "Ok.",
+             "data": data, "result": self._result(data)}
+            for data in payload[:1]
+        ]
+        return _envelope(tasks)
+
+    def task_post(self, payload: List[Dict]) -> Dict:
+        self.requests += 1
+        tasks = []
+        ready_at = time.monotonic() + self.task_delay_seconds
+        with self._lock:
+            for index, data in enumerate(payload):
+                if index >= 100:
+                    tasks.append({"id": None, "status_code": 40000, "status_message": "Too many tasks.", "data": data})
+                    continue
+                task_id = str(uuid.uuid4())
+                self._tasks[task_id] = {"data": data, "ready_at": ready_at}
+                tasks.append({"id": task_id, "status_code": 20100, "status_message": "Task Created.", "data": data})
+        return _envelope(tasks)
+
+    def tasks_ready(self) -> Dict:
+        self.requests += 1
+        now = time.monotonic()
+        with self._lock:
+            ready = [
+                {"id": task_id, "tag": task["data"].get("tag"),
+                 "endpoint_regular": f"/v3/serp/google/organic/task_get/regular/{task_id}"}
+                for task_id, task in self._tasks.items()
+                if task["ready_at"] <= now
+            ][:1000]
+        return _envelope([{"id": str(uuid.uuid4()), "status_code": 20000, "status_message": "Ok.", "result": ready}])
+
+    def task_get(self, task_id: str) -> Dict:
+        self.requests += 1
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is not None and task["ready_at"] <= time.monotonic():
+                del self._tasks[task_id]
+            elif task is not None:
+                return _envelope([{"id": task_id, "status_code": 40602, "status_message": "Task In Queue."}])
+
+        if task is None:
+            return _envelope([{"id": task_id, "status_code": 40400, "status_message": "Not Found."}])
+        return _envelope([{
+            "id": task_id, "status_code": 20000, "status_message": "Ok.",
+            "data": task["data"], "result": self._result(task["data"])
+        }])
+
+def create_router(emulator: DataForSEOEmulator) -> APIRouter:
+    router = APIRouter()
+
+    def check_auth(authorization: Optional[str]):
+        if not authorization or not authorization.startswith("Basic "):
+            raise HTTPException(status_code=401, detail="Basic authentication required")
+
+    @router.post("/serp/google/organic/live/regular")
+    def live(payload: List[Dict] = Body(...), authorization: Optional[str] = Header(None)):
+        check_auth(authorization)
+        return emulator.live(payload)
+
+    @router.post("/serp/google/organic/task_post")
+    def task_post(payload: List[Dict] = Body(...), authorization: Optional[str] = Header(None)):
+        check_auth(authorization)
+        return emulator.task_post(payload)
+
+    @router.get("/serp/google/organic/tasks_ready")
+    def tasks_ready(authorization: Optional[str] = Header(None)):
+        check_auth(authorization)
+        return emulator.tasks_ready()
+
+    @router.get("/serp/google/organic/task_get/regular/{task_id}")
+    def task_get(task_id: str, authorization: Optional[str] = Header(None)):
+        check_auth(authorization)
+        return emulator.task_get(task_id)
+
+    return router
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Latency and failure injection for the emulated providers.
+
+Each provider has a FaultConfig; the middleware looks up the provider by path
+prefix, sleeps for the configured latency and then fails a share of requests
+with 429 (with Retry-After) or 5xx before they reach the emulator.
+"""
+import asyncio
+import os
+import random
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0.0
+    # Latency is drawn uniformly from latency_ms +/- jitter_ms
+    jitter_ms: float = 0.0
+    # Share of requests answered with 429 and Retry-After
+    throttle_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    # Share of requests answered with error_status
+    error_rate: float = 0.0
+    error_status: int = 500
+
+    @classmethod
+    def from_env(cls, provider: str) -> "FaultConfig":
+        """
+        Read EMULATOR_<PROVIDER>_<FIELD>, falling back to EMULATOR_<FIELD>,
+        e.g. EMULATOR_AHREFS_LATENCY_MS=300 or EMULATOR_THROTTLE_RATE=0.05
+        """
+        values = {}
+        for field, default in asdict(cls()).items():
+            raw = os.environ.get(f"EMULATOR_{provider.upper()}_{field.upper()}", os.environ.get(f"EMULATOR_{field.upper()}"))
+            if raw is not None:
+                values[field] = type(default)(float(raw)) if isinstance(default, int) else float(raw)
+        return cls(**values)
+
+    def latency_seconds(self, rng: random.Random) -> float:
+        latency = self.latency_ms + (rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        return max(latency, 0.0) / 1000.0
+
+class FaultInjector:
+    """Per-provider fault configs and request counts by outcome"""
+
+    def __init__(self, configs: Dict[str, FaultConfig], seed: Optional[int] = None):
+        self.configs = configs
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def count(self, provider: str, outcome: str):
+        with self._lock:
+            provider_counts = self.counts.setdefault(provider, {})
+            provider_counts[outcome] = provider_counts.get(outcome, 0) + 1
+
+    def draw(self, provider: str):
+        """(latency in seconds, injected status or None) for the next request"""
+        config = self.configs.get(provider)
+        if config is None:
+            return 0.0, None
+        with self._lock:
+            latency = config.latency_seconds(self._rng)
+            roll = self._rng.random()
+        if roll < config.throttle_rate:
+            return latency, 429
+        if roll < config.throttle_rate + config.error_rate:
+            return latency, config.error_status
+        return latency, None
+
+class FaultMiddleware(BaseHTTPMiddleware):
+    """Applies a FaultInjector to requests under each provider's path prefix"""
+
+    def __init__(self, app, injector: FaultInjector, prefixes: Dict[str, str]):
+        super().__init__(app)
+        self.injector = injector
+        # Longest prefix first, so nested prefixes resolve to the right provider
+        self.prefixes = sorted(prefixes.items(), key=lambda item: len(item[1]), reverse=True)
+
+    async def dispatch(self, request: Request, call_next):
+        provider = next((name for name, prefix in self.prefixes if request.url.path.startswith(prefix)), None)
+        if provider is None:
+            return await call_next(request)
+
+        latency, status = self.injector.draw(provider)
+        if latency:
+            await asyncio.sleep(latency)
+
+        if status == 429:
+            self.injector.count(provider, "throttled")
+            retry_after = self.injector.configs[provider].retry_after_seconds
+            return JSONResponse(
+                {"error": {"code": 429, "message": "Rate limit exceeded (injected)"}},
+                status_code=429,
+                headers={"Retry-After": f"{retry_after:g}"}
+            )
+        if status is not None:
+            self.injector.count(provider, "error")
+            return JSONResponse({"error": {"code": status, "message": "Injected failure"}}, status_code=status)
+
+        response = await call_next(request)
+        self.injector.count(provider, str(response.status_code))
+        return response
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+OpenAI emulator for POST /v1/embeddings.
+
+Embeddings are hashed bag-of-words vectors: deterministic, normalized, and
+texts sharing words are similar, so vector search over them behaves
+plausibly. Both encoding formats are served; the Python SDK asks for base64
+when numpy is installed.
+"""
+import base64
+import hashlib
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from fastapi import APIRouter, Body, Header, HTTPException
+
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536
+}
+
+def _seed(value: str) -> int:
+    return int(hashlib.md5(value.encode()).hexdigest()[:8], 16)
+
+def embed_text(text: str, dimension: int) -> np.ndarray:
+    """Normalized float32 embedding of a text"""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for word in text.lower().split():
+        seed = _seed(word)
+        vector[seed % dimension] += 1.0 if (seed >> 16) & 1 else -1.0
+        vector[(seed >> 8) % dimension] += 0.5
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+class OpenAIEmulator:
+    def __init__(self):
+        self.requests = 0
+
+    def embeddings(self, payload: Dict) -> Dict:
+        self.requests += 1
+        model = payload.get("model")
+        if model not in MODEL_DIMENSIONS:
+            raise HTTPException(status_code=404, detail=f"The model `{model}` does not exist")
+
+        dimension = int(payload.get("dimensions") or MODEL_DIMENSIONS[model])
+        if not model.startswith("text-embedding-3") and dimension != MODEL_DIMENSIONS[model]:
+            raise HTTPException(status_code=400, detail=f"{model} does not support dimensions")
+
+        texts: Union[str, List[str]] = payload.get("input")
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts or not all(isinstance(text, str) for text in texts):
+            raise HTTPException(status_code=400, detail="input must be a string or a list of strings")
+        if len(texts) > 2048:
+            raise HTTPException(status_code=400, detail="input must have at most 2048 items")
+
+        as_base64 = payload.get("encoding_format") == "base64"
+        data = []
+        for index, text in enumerate(texts):
+            vector = embed_text(text, dimension)
+            data.append({
+                "object": "embedding",
+                "index": index,
+                "embedding": base64.b64encode(vector.tobytes()).decode() if as_base64 else vector.tolist()
+            })
+
+        tokens = sum(len(text.split()) for text in texts)
+        return {
+            "object": "list",
+            "data": data,
+            "model": model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+def create_router(emulator: OpenAIEmulator) -> APIRouter:
+    router = APIRouter()
+
+    @router.post("/embeddings")
+    def embeddings(payload: Dict = Body(...), authorization: Optional[str] = Header(None)):
+        if not authorization or not authorization.startswith("Bearer "):
+            raise HTTPException(status_code=401, detail="Bearer token required")
+        return emulator.embeddings(payload)
+
+    return router
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""
+Pinecone emulator: the control plane calls VectorService makes (list, create,
+describe and delete indexes) and the data plane of each index (upsert,
+query, delete, describe_index_stats), in the JSON shapes pinecone-client 3
+expects.
+
+Search is exact cosine similarity over an in-memory matrix per namespace.
+Indexes are served under <prefix>/indexes/<name>, which is returned as the
+index host, so the SDK needs only the control plane host.
+"""
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import APIRouter, Body, Header, HTTPException, Request, Response
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for operator, operand in condition.items():
+        if operator == "$eq" and value != operand:
+            return False
+        if operator == "$ne" and value == operand:
+            return False
+        if operator == "$in" and value not in operand:
+            return False
+        if operator == "$nin" and value in operand:
+            return False
+        if operator in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None:
+                return False
+            if operator == "$gt" and not value > operand:
+                return False
+            if operator == "$gte" and not value >= operand:
+                return False
+            if operator == "$lt" and not value < operand:
+                return False
+            if operator == "$lte" and not value <= operand:
+                return False
+    return True
+
+def matches_filter(metadata: Optional[Dict], metadata_filter: Optional[Dict]) -> bool:
+    """Pinecone metadata filter: field conditions, $and and $or"""
+    if not metadata_filter:
+        return True
+    metadata = metadata or {}
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, part) for part in condition):
+                return False
+        elif not _matches_condition(metadata.get(key), condition):
+            return False
+    return True
+
+class Namespace:
+    """Vectors of one namespace, as a growable matrix plus ID bookkeeping"""
+
+    def __init__(self, dimension: int, capacity: int):
+        self.dimension = dimension
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[Dict]] = []
+        self.positions: Dict[str, int] = {}
+        self.deleted = 0
+
+    def grow(self, needed: int):
+        if needed <= self.vectors.shape[0]:
+            return
+        capacity = max(needed, self.vectors.shape[0] * 2)
+        grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+        grown[:len(self.ids)] = self.vectors[:len(self.ids)]
+        self.vectors = grown
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+class EmulatedIndex:
+    """Exact cosine search over in-memory matrices, one per namespace"""
+
+    def __init__(self, name: str, dimension: int, metric: str = "cosine", capacity: int = 1024):
+        self.name = name
+        self.dimension = dimension
+        self.metric = metric
+        self._capacity = capacity
+        self._namespaces: Dict[str, Namespace] = {}
+        self._lock = threading.Lock()
+
+    def _namespace(self, namespace: Optional[str]) -> Namespace:
+        name = namespace or ""
+        if name not in self._namespaces:
+            self._namespaces[name] = Namespace(self.dimension, self._capacity)
+        return self._namespaces[name]
+
+    def count(self, namespace: str = "") -> int:
+        return len(self._namespace(namespace).positions)
+
+    def load(self, ids: List[str], vectors: np.ndarray, metadata: List[Dict], namespace: str = ""):
+        """Bulk load, for seeding a corpus"""
+        with self._lock:
+            space = self._namespace(namespace)
+            start = len(space.ids)
+            space.grow(start + len(ids))
+            space.vectors[start:start + len(ids)] = _normalize(np.asarray(vectors, dtype=np.float32))
+            for offset, (vector_id, meta) in enumerate(zip(ids, metadata)):
+                space.ids.append(vector_id)
+                space.metadata.append(meta)
+                space.positions[vector_id] = start + offset
+
+    def upsert(self, vectors: List[Dict], namespace: str = "") -> int:
+        for vector in vectors:
+            if len(vector["values"]) != self.dimension:
+                raise ValueError(
+                    f"Vector dimension {len(vector['values'])} does not match the dimension of the index {self.dimension}"
+                )
+        with self._lock:
+            space = self._namespace(namespace)
+            for vector in vectors:
+                position = space.positions.get(vector["id"])
+                if position is None:
+                    position = len(space.ids)
+                    space.grow(position + 1)
+                    space.ids.append(vector["id"])
+                    space.metadata.append(None)
+                    space.positions[vector["id"]] = position
+                space.vectors[position] = _normalize(np.asarray(vector["values"], dtype=np.float32))
+                space.metadata[position] = vector.get("metadata") or {}
+        return len(vectors)
+
+    def query(self, vector: List[float], top_k: int = 10, namespace: str = "",
+              metadata_filter: Optional[Dict] = None, include_values: bool = False) -> List[Dict]:
+        """Matches as dicts with id, score, metadata and (optionally) values, best first"""
+        space = self._namespace(namespace)
+        with self._lock:
+            count = len(space.ids)
+            if count == 0:
+                return []
+            scores = space.vectors[:count] @ _normalize(np.asarray(vector, dtype=np.float32))
+            ids = space.ids[:count]
+            metadata = space.metadata[:count]
+
+        # Deleted positions and filtered-out vectors drop out of the ranking
+        excluded = [position for position, vector_id in enumerate(ids) if vector_id is None] if space.deleted else []
+        if metadata_filter:
+            excluded += [position for position, meta in enumerate(metadata) if not matches_filter(meta, metadata_filter)]
+        if excluded:
+            scores[excluded] = -np.inf
+
+        top_k = min(top_k, count - len(set(excluded)))
+        if top_k <= 0:
+            return []
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        matches = []
+        for position in candidates:
+            match = {"id": ids[position], "score": float(scores[position]), "metadata": metadata[position] or {}}
+            if include_values:
+                match["values"] = space.vectors[position].tolist()
+            matches.append(match)
+        return matches
+
+    def delete(self, ids: Optional[List[str]] = None, namespace: str = "", delete_all: bool = False):
+        with self._lock:
+            if delete_all:
+                self._namespaces.pop(namespace or "", None)
+                return
+            space = self._namespace(namespace)
+            for vector_id in ids or []:
+                position = space.positions.pop(vector_id, None)
+                if position is not None:
+                    space.ids[position] = None
+                    space.deleted += 1
+                    space.vectors[position] = 0.0
+
+    def stats(self) -> Dict:
+        namespaces = {name: {"vectorCount": len(space.positions)} for name, space in self._namespaces.items()}
+        return {
+            "namespaces": namespaces,
+            "dimension": self.dimension,
+            "indexFullness": 0.0,
+            "totalVectorCount": sum(summary["vectorCount"] for summary in namespaces.values())
+        }
+
+class PineconeEmulator:
+    def __init__(self):
+        self.requests = 0
+        self.indexes: Dict[str, EmulatedIndex] = {}
+        self.specs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def create_index(self, name: str, dimension: int, metric: str = "cosine", spec: Optional[Dict] = None) -> EmulatedIndex:
+        with self._lock:
+            if name in self.indexes:
+                raise HTTPException(status_code=409, detail=f"Resource {name} already exists")
+            self.indexes[name] = EmulatedIndex(name, dimension, metric)
+            self.specs[name] = spec or {"serverless": {"cloud": "aws", "region": "us-west-2"}}
+            return self.indexes[name]
+
+    def get_index(self, name: str) -> EmulatedIndex:
+        index = self.indexes.get(name)
+        if index is None:
+            raise HTTPException(status_code=404, detail=f"Resource {name} not found")
+        return index
+
+    def delete_index(self, name: str):
+        with self._lock:
+            self.get_index(name)
+            del self.indexes[name]
+            del self.specs[name]
+
+def create_router(emulator: PineconeEmulator, prefix: str) -> APIRouter:
+    """Routes for both planes; `prefix` is where the router is mounted, used to build index hosts"""
+    router = APIRouter()
+
+    def check_auth(api_key: Optional[str]):
+        if not api_key:
+            raise HTTPException(status_code=401, detail="Api-Key header required")
+        emulator.requests += 1
+
+    def describe(request: Request, index: EmulatedIndex) -> Dict:
+        base = str(request.base_url).rstrip("/")
+        return {
+            "name": index.name,
+            "dimension": index.dimension,
+            "metric": index.metric,
+            "host": f"{base}{prefix}/indexes/{index.name}",
+            "spec": emulator.specs[index.name],
+            "status": {"ready": True, "state": "Ready"}
+        }
+
+    @router.get("/indexes")
+    def list_indexes(request: Request, api_key: Optional[str] = Header(None)):
+        check_auth(api_key)
+        return {"indexes": [describe(request, index) for index in list(emulator.indexes.values())]}
+
+    @router.post("/indexes", status_code=201)
+    def create_index(request: Request, payload: Dict = Body(...), api_key: Optional[str] = Header(None)):
+        check_auth(api_key)
+        index = emulator.create_index(payload["name"], int(payload["dimension"]), payload.get("metric", "cosine"), payload.get("spec"))
+        return describe(request, index)
+
+    @router.get("/indexes/{name}")
+    def describe_index(name: str, request: Request, api_key: Optional[str] = Header(None)):
+        check_auth(api_key)
+        return describe(request, emulator.get_index(name))
+
+    @router.delete("/indexes/{name}", status_code=202)
+    def delete_index(name: str, api_key: Optional[str] = Header(None)):
+        check_auth(api_key)
+        emulator.delete_index(name)
+        return Response(status_code=202)
+
+    @router.post("/indexes/{name}/vectors/upsert")
+    def upsert(name: str, payload: Dict = Body(...), api_key: Optional[str] = Header(None)):
+        check_auth(api_key)
+        index = emulator.get_index(name)
+        if len(payload.get("vectors") or []) > 1000:
+            raise HTTPException(status_code=400, detail="Upsert is limited to 1000 vectors per request")
+        try:
+            upserted = index.upsert(payload.get("vectors") or [], payload.get("namespace", ""))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"upsertedCount": upserted}
+
+    @router.post("/indexes/{name}/query")
+    def query(name: str, payload: Dict = Body(...), api_key: Optional[str] = Header(None)):
+        check_auth(api_key)
+        index = emulator.get_index(name)
+        vector = payload.get("vector")
+        if not vector or len(vector) != index.dimension:
+            raise HTTPException(status_code=400, detail=f"Query vector must have dimension {index.dimension}")
+        top_k = int(payload.get("topK", 10))
+        if top_k < 1 or top_k > 10000:
+            raise HTTPException(status_code=400, detail="topK must be between 1 and 10000")
+
+        matches = index.query(
+            vector,
+            top_k=top_k,
+            namespace=payload.get("namespace", ""),
+            metadata_filter=payload.get("filter"),
+            include_values=payload.get("includeValues", False)
+        )
+        if not payload.get("includeMetadata", False):
+            for match in matches:
+                match.pop("metadata", None)
+        return {"matches": matches, "namespace": payload.get("namespace", ""), "usage": {"readUnits": 5}}
+
+    @router.post("/indexes/{name}/vectors/delete")
+    def delete(name: str, payload: Dict = Body(...), api_key: Optional[str] = Header(None)):
+        check_auth(api_key)
+        if len(payload.get("ids") or []) > 1000:
+            raise HTTPException(status_code=400, detail="Delete is limited to 1000 IDs per request")
+        emulator.get_index(name).delete(payload.get("ids"), payload.get("namespace", ""), payload.get("deleteAll", False))
+        return {}
+
+    @router.post("/indexes/{name}/describe_index_stats")
+    def describe_index_stats(name: str, api_key: Optional[str] = Header(None)):
+        check_auth(api_key)
+        return emulator.get_index(name).stats()
+
+    return router
\ No newline at end of file
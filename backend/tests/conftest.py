@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+# A throwaway SQLite database, set before app.db.database creates its engine
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+import pytest
+from sqlalchemy import MetaData
+from app.db.database import Base, SessionLocal, engine
+import app.models.models  # noqa: F401 - registers the models on Base.metadata
+
+def drop_all_tables():
+    """Drop every table, including ones the models no longer describe"""
+    metadata = MetaData()
+    metadata.reflect(bind=engine)
+    metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def db():
+    """Session on a database with the current schema, emptied after the test"""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        drop_all_tables()
\ No newline at end of file
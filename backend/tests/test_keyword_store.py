@@ -0,0 +1,71 @@
+from app.models.models import Keyword, Page, PageKeyword, Website
+from app.services.keyword_store import (
+    find_websites_by_keyword, get_page_keywords, merge_page_items, store_page_keywords
+)
+
+# DataForSEO returns one item per ranked keyword, several per page URL
+ITEMS = [
+    {"url": "https://site0.com/a", "keywords": ["site0 topic 0", "related"], "position": 3, "search_volume": 100},
+    {"url": "https://site0.com/b", "keywords": ["site0 topic 1", "related"], "position": 1, "search_volume": 50},
+    {"url": "https://site0.com/a", "keywords": ["site0 topic 2", "Related"], "position": 7, "search_volume": 300},
+    {"url": "https://site0.com/a", "keywords": ["Site0  Topic 0"], "position": 2, "search_volume": 40},
+]
+
+def _store(db, items):
+    website = Website(url="https://site0.com", domain="site0.com")
+    db.add(website)
+    db.flush()
+
+    merged = merge_page_items(items)
+    pages = [Page(website_id=website.id, url=page["url"]) for page in merged]
+    db.add_all(pages)
+    db.flush()
+    store_page_keywords(pages, merged, db)
+    db.commit()
+    return website, pages
+
+def test_merge_page_items_unions_keywords_per_url():
+    pages = merge_page_items(ITEMS)
+
+    assert [page["url"] for page in pages] == ["https://site0.com/a", "https://site0.com/b"]
+    assert pages[0]["keywords"] == ["site0 topic 0", "related", "site0 topic 2"]
+    assert pages[0]["position"] == 2
+    assert pages[0]["search_volume"] == 300
+
+def test_merge_page_items_keeps_best_metrics_per_keyword():
+    metrics = merge_page_items(ITEMS)[0]["keyword_metrics"]
+
+    # Ranked by two items: best position, highest volume
+    assert metrics["site0 topic 0"] == {"position": 2, "search_volume": 100}
+    assert metrics["site0 topic 2"] == {"position": 7, "search_volume": 300}
+    # Related keywords carry no metrics of their own
+    assert metrics["related"] == {"position": None, "search_volume": None}
+
+def test_every_item_keyword_is_stored_for_its_page(db):
+    website, pages = _store(db, ITEMS)
+
+    keywords = get_page_keywords([page.id for page in pages], db)
+    assert sorted(keywords[pages[0].id]) == ["related", "site0 topic 0", "site0 topic 2"]
+    assert sorted(keywords[pages[1].id]) == ["related", "site0 topic 1"]
+
+    for keyword, position, volume in [("site0 topic 1", 1, 50), ("site0 topic 2", 7, 300), ("site0 topic 0", 2, 100)]:
+        assert find_websites_by_keyword(keyword, db) == [
+            {"website_id": website.id, "best_position": position, "search_volume": volume, "pages": 1}
+        ]
+    assert find_websites_by_keyword("related", db)[0]["pages"] == 2
+
+def test_unmerged_page_gives_its_main_keyword_the_metrics(db):
+    website = Website(url="https://legacy.com", domain="legacy.com")
+    db.add(website)
+    db.flush()
+    page = Page(website_id=website.id, url="https://legacy.com/x")
+    db.add(page)
+    db.flush()
+
+    store_page_keywords([page], [{"keywords": ["main", "other", "MAIN"], "position": 4, "search_volume": 9}], db)
+    db.commit()
+
+    rows = db.query(Keyword.text, PageKeyword.position, PageKeyword.search_volume).join(
+        Keyword, Keyword.id == PageKeyword.keyword_id
+    ).order_by(Keyword.text).all()
+    assert rows == [("main", 4, 9), ("other", None, None)]
\ No newline at end of file
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import inspect, text
+from app.db import migrate
+from app.db.database import SessionLocal, engine
+from app.models.models import Keyword, Page, PageKeyword, Website
+from tests.conftest import drop_all_tables
+
+# Tables as they were before domains, demand tracking and page_keywords
+BASELINE_SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, email VARCHAR UNIQUE, hashed_password VARCHAR, is_admin BOOLEAN, created_at DATETIME
+    )""",
+    """CREATE TABLE websites (
+        id INTEGER PRIMARY KEY, url VARCHAR UNIQUE, email VARCHAR, price FLOAT, dr INTEGER,
+        traffic INTEGER, keywords_data JSON, vector_ids JSON, created_at DATETIME, updated_at DATETIME
+    )""",
+    """CREATE TABLE pages (
+        id INTEGER PRIMARY KEY, website_id INTEGER REFERENCES websites (id), url VARCHAR,
+        keywords JSON, vector_id VARCHAR, created_at DATETIME
+    )""",
+]
+
+BASELINE_ROWS = [
+    "INSERT INTO websites (id, url, email, price, dr) VALUES (1, 'http://www.dup.com/', 'a@dup.com', 1.0, 10)",
+    "INSERT INTO websites (id, url, email, price, keywords_data, updated_at) "
+    "VALUES (2, 'https://dup.com', NULL, 2.0, '{\"total_pages\": 1}', '2024-01-01 00:00:00')",
+    "INSERT INTO websites (id, url, price) VALUES (3, 'https://solo.org/blog', 3.0)",
+    "INSERT INTO pages (id, website_id, url, keywords, vector_id) "
+    "VALUES (1, 3, 'https://solo.org/blog/x', '[\"Guest Post\", \"seo\"]', 'v1')",
+]
+
+@pytest.fixture
+def baseline_db():
+    """Database with the schema and data of a deployment before the upgrade"""
+    drop_all_tables()
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA + BASELINE_ROWS:
+            connection.execute(text(statement))
+    yield
+    drop_all_tables()
+
+def _columns(table_name):
+    return {column["name"] for column in inspect(engine).get_columns(table_name)}
+
+def _indexes(table_name):
+    return {index["name"]: index["unique"] for index in inspect(engine).get_indexes(table_name)}
+
+def _run_migrate(monkeypatch, *args):
+    monkeypatch.setattr("sys.argv", ["migrate", *args])
+    migrate.main()
+
+def test_migrate_upgrades_baseline_schema(baseline_db, monkeypatch):
+    _run_migrate(monkeypatch)
+
+    assert {"domain", "last_demanded_at"} <= _columns("websites")
+    assert _indexes("websites")["ix_websites_domain"]
+    assert {"ix_websites_last_demanded_at", "ix_websites_updated_at"} <= set(_indexes("websites"))
+    assert "ix_pages_vector_id" in _indexes("pages")
+
+    db = SessionLocal()
+    try:
+        websites = {website.domain: website for website in db.query(Website)}
+        assert set(websites) == {"dup.com", "solo.org"}
+        # The enriched row is kept and gets the other's missing fields
+        assert websites["dup.com"].id == 2
+        assert websites["dup.com"].email == "a@dup.com"
+        assert websites["dup.com"].dr == 10
+
+        keywords = db.query(Keyword.text).join(PageKeyword).filter(PageKeyword.page_id == 1).all()
+        assert sorted(text for (text,) in keywords) == ["guest post", "seo"]
+    finally:
+        db.close()
+
+def test_migrate_is_idempotent_and_drops_legacy_columns(baseline_db, monkeypatch):
+    _run_migrate(monkeypatch)
+    _run_migrate(monkeypatch, "--drop-legacy-columns")
+
+    assert "keywords" not in _columns("pages")
+    db = SessionLocal()
+    try:
+        assert migrate.add_missing_columns(db) == []
+        assert migrate.create_missing_indexes(db) == []
+        assert migrate.backfill_website_domains(db) == {"filled": 0, "merged": 0, "invalid": 0}
+        assert db.query(Website).count() == 2
+        assert db.query(PageKeyword).count() == 2
+        assert db.query(Page).count() == 1
+    finally:
+        db.close()
+
+def test_added_columns_fill_existing_rows(baseline_db):
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE deletion_jobs (id INTEGER PRIMARY KEY, status VARCHAR, total_websites INTEGER)"
+        ))
+        connection.execute(text("INSERT INTO deletion_jobs (id, status) VALUES (1, 'completed')"))
+
+    db = SessionLocal()
+    try:
+        assert "deletion_jobs.failed_websites" in migrate.add_missing_columns(db)
+        assert db.execute(text("SELECT failed_websites FROM deletion_jobs")).scalar() == 0
+    finally:
+        db.close()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import threading
+import time
+import pytest
+import requests
+from app.services.rate_limiter import AdaptiveLimiter, ProviderClient, ProviderError, RetryBudget
+
+def _throttle_burst(limiter: AdaptiveLimiter, requests_in_flight: int):
+    """Requests in flight together, all answered with 429"""
+    barrier = threading.Barrier(requests_in_flight)
+
+    def request():
+        with limiter.slot() as generation:
+            barrier.wait()
+            limiter.on_throttle(None, generation)
+
+    threads = [threading.Thread(target=request) for _ in range(requests_in_flight)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_burst_of_throttles_decreases_once():
+    limiter = AdaptiveLimiter("test", initial_limit=16, max_limit=32)
+
+    _throttle_burst(limiter, 16)
+
+    assert limiter.limit == 8
+
+def test_throttle_after_decrease_decreases_again():
+    limiter = AdaptiveLimiter("test", initial_limit=16, max_limit=32)
+    _throttle_burst(limiter, 8)
+
+    with limiter.slot() as generation:
+        limiter.on_throttle(None, generation)
+
+    assert limiter.limit == 4
+
+def test_limit_never_drops_below_min_limit():
+    limiter = AdaptiveLimiter("test", initial_limit=2, min_limit=1)
+    for _ in range(5):
+        limiter.on_throttle()
+
+    assert limiter.limit == 1
+
+def test_stale_throttle_still_pauses():
+    limiter = AdaptiveLimiter("test", initial_limit=4)
+    with limiter.slot() as generation:
+        limiter.on_throttle()
+        limiter.on_throttle(2.0, generation)
+
+    assert limiter.limit == 2
+    assert limiter.paused_until > time.monotonic() + 1
+
+def test_limit_grows_by_one_per_window_of_successes():
+    limiter = AdaptiveLimiter("test", initial_limit=4, max_limit=5)
+    for _ in range(3):
+        limiter.on_success()
+    assert limiter.limit == 4
+
+    limiter.on_success()
+    assert limiter.limit == 5
+
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.limit == 5
+
+def _client() -> ProviderClient:
+    client = ProviderClient("test", AdaptiveLimiter("test"), RetryBudget())
+    client.backoff_base = 0.0
+    return client
+
+def test_programming_errors_are_not_retried():
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise KeyError("domain_rating")
+
+    with pytest.raises(KeyError):
+        _client().call(fail)
+    assert len(calls) == 1
+
+def test_connection_errors_are_retried():
+    client = _client()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise requests.ConnectionError("connection refused")
+
+    with pytest.raises(ProviderError):
+        client.request(fail)
+    assert len(calls) == client.max_attempts
\ No newline at end of file
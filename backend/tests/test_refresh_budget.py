@@ -0,0 +1,68 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.models import Website
+from app.services.refresh_scheduler import (
+    calls_used_today, claim_calls, claim_websites, find_stale_websites, provider_calls_per_website, release_calls
+)
+
+@pytest.fixture(autouse=True)
+def budget(monkeypatch):
+    # Three calls per website, ten websites per day
+    monkeypatch.setattr(settings, "DATAFORSEO_MAX_ITEMS", 1000)
+    monkeypatch.setattr(settings, "REFRESH_DAILY_CALL_BUDGET", 30)
+    assert provider_calls_per_website() == 3
+
+def test_claim_grants_what_the_budget_allows(db):
+    assert claim_calls(4, db) == 4
+    assert calls_used_today(db) == 12
+
+    assert claim_calls(10, db) == 6
+    assert calls_used_today(db) == 30
+
+    assert claim_calls(1, db) == 0
+
+def test_released_calls_can_be_claimed_again(db):
+    assert claim_calls(10, db) == 10
+    release_calls(3, datetime.utcnow().date(), db)
+
+    assert calls_used_today(db) == 21
+    assert claim_calls(5, db) == 3
+
+def test_concurrent_claims_never_exceed_the_budget(db):
+    granted = []
+
+    def worker():
+        session = SessionLocal()
+        try:
+            granted.append(claim_calls(4, session))
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(granted) == 10
+    assert calls_used_today(db) == 30
+
+def test_stale_websites_are_claimed_by_one_run(db):
+    db.add_all([
+        Website(url=f"https://stale{i}.com", updated_at=datetime.utcnow() - timedelta(days=90))
+        for i in range(3)
+    ])
+    db.commit()
+
+    other = SessionLocal()
+    try:
+        mine, theirs = find_stale_websites(10, db), find_stale_websites(10, other)
+        assert len(mine) == len(theirs) == 3
+
+        assert len(claim_websites(mine, datetime.utcnow(), db)) == 3
+        assert claim_websites(theirs, datetime.utcnow(), other) == []
+    finally:
+        other.close()
\ No newline at end of file